@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, abort, current_app
 from datetime import datetime
 from models.amenity import Amenity
+from api.pagination import collection_response
 
 amenity_bp = Blueprint('amenity', __name__)
 
@@ -33,7 +34,11 @@ def create_amenity():
         amenity = Amenity(name, data_manager)
     except ValueError as e:
         abort(400, str(e))
-    data_manager.save(amenity)
+    try:
+        data_manager.save(amenity)
+    except ValueError as e:
+        # Another worker stored the same unique key first
+        abort(409, str(e))
     return jsonify(amenity.to_dict()), 201
 
 
@@ -47,17 +52,21 @@ def get_amenities():
 
     Methods: GET
 
+    Query Parameters:
+
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
     Returns:
 
-    - list: List of amenity data
+    - list: List of amenity data; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
 
 
     """
     data_manager = current_app.config['DATA_MANAGER_AMENITIES']
-    amenities = [amenity.to_dict()
-                 for amenity in
-                 data_manager.storage.get('Amenity', {}).values()]
-    return jsonify(amenities), 200
+    return collection_response(data_manager, 'Amenity',
+                               lambda amenity: amenity.to_dict())
 
 
 # ********************************************************************* #
@@ -122,11 +131,12 @@ def update_amenity(amenity_id):
     new_name = request.json.get('name', amenity.name)
 
     try:
-        amenity.name = new_name
-        amenity.updated_at = datetime.utcnow()
+        with data_manager.transaction('Amenity'):
+            amenity.name = new_name
+            amenity.updated_at = datetime.utcnow()
+            data_manager.update(amenity)
     except ValueError as e:
         abort(400, str(e))
-    data_manager.update(amenity)
     return jsonify(amenity.to_dict()), 200
 
 
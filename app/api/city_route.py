@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, abort, current_app
 from datetime import datetime
 from models.city import City
+from api.pagination import collection_response
 
 city_bp = Blueprint('city', __name__)
 
@@ -35,7 +36,11 @@ def create_city():
         city = City(name, country_id, data_manager)
     except ValueError as e:
         abort(400, str(e))
-    data_manager.save(city)
+    try:
+        data_manager.save(city)
+    except ValueError as e:
+        # Another worker stored the same unique key first
+        abort(409, str(e))
     return jsonify(city.to_dict()), 201
 
 
@@ -49,16 +54,21 @@ def get_cities():
 
     Methods: GET
 
+    Query Parameters:
+
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
     Returns:
 
-    - list: List of city data
+    - list: List of city data; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
 
     """
     data_manager = current_app.config['DATA_MANAGER_CITIES']
 
-    cities = [city.to_dict()
-              for city in data_manager.storage.get('City', {}).values()]
-    return jsonify(cities), 200
+    return collection_response(data_manager, 'City',
+                               lambda city: city.to_dict())
 
 
 # ********************************************************************* #
@@ -124,16 +134,17 @@ def update_city(city_id):
     new_country_id = request.json.get('country_id', city.country_id)
 
     try:
-        if 'name' in request.json and not new_name:
-            abort(400, 'Name is required!')
-        if 'country_id' in request.json and not new_country_id:
-            abort(400, 'Country ID is required!')
-        city.name = new_name
-        city.country_id = new_country_id
-        city.updated_at = datetime.utcnow()
+        with data_manager.transaction('City'):
+            if 'name' in request.json and not new_name:
+                abort(400, 'Name is required!')
+            if 'country_id' in request.json and not new_country_id:
+                abort(400, 'Country ID is required!')
+            city.name = new_name
+            city.country_id = new_country_id
+            city.updated_at = datetime.utcnow()
+            data_manager.update(city)
     except ValueError as e:
         abort(400, str(e))
-    data_manager.update(city)
     return jsonify(city.to_dict()), 200
 
 
@@ -186,7 +197,7 @@ def get_city_by_country_code(country_code):
     data_manager = current_app.config['DATA_MANAGER_CITIES']
     cities = []
 
-    for city in data_manager.storage.get('City', {}).values():
+    for city in data_manager.get_all('City'):
         if city.country_id == country_code:
             cities.append(city.to_dict())
 
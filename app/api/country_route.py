@@ -1,6 +1,8 @@
-from flask import Blueprint, jsonify, request, abort, current_app
+from flask import Blueprint, Response, jsonify, request, abort, current_app
 from models.country import Country
+from models.iso_countries import ISO_COUNTRIES
 from datetime import datetime
+from api.pagination import MAX_LIMIT, collection_response
 
 country_bp = Blueprint('country', __name__)
 
@@ -49,19 +51,66 @@ def get_countries():
 
     Methods: GET
 
+    Query Parameters:
+
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
     Returns:
 
-    - list: List of country data
+    - list: List of country data; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
 
 
     """
 
     data_manager = current_app.config['DATA_MANAGER_COUNTRIES']
 
-    countries = [country.to_dict()
-                 for country in
-                 data_manager.storage.get('Country', {}).values()]
-    return jsonify(countries), 200
+    return collection_response(data_manager, 'Country',
+                               lambda country: country.to_dict())
+
+
+# ********************************************************************* #
+
+
+@country_bp.route('/countries/iso', methods=['GET'])
+def get_iso_countries():
+    """
+    * This route lists the ISO 3166-1 countries, or searches them by code
+    or name *
+
+    Methods: GET
+
+    Query Parameters:
+
+    - q (str) A code, or the beginning of a name, matched regardless of
+      case and accents (optional)
+    - limit (int) The maximum number of countries matching q (optional,
+      default 10)
+
+    Returns:
+
+    - list: List of ISO countries, with their alpha_2, alpha_3 and
+      numeric codes and their name, official_name and common_name
+
+
+    """
+    query = request.args.get('q')
+
+    if query is None:
+        return Response(ISO_COUNTRIES.encoded, 200,
+                        mimetype='application/json')
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        abort(400, 'limit must be an integer')
+    if not 1 <= limit <= MAX_LIMIT:
+        abort(400, f'limit must be between 1 and {MAX_LIMIT}')
+
+    country = ISO_COUNTRIES.by_code(query)
+    countries = [country] if country is not None else \
+        ISO_COUNTRIES.search(query, limit)
+    return jsonify([country._asdict() for country in countries]), 200
 
 
 # ********************************************************************* #
@@ -129,12 +178,13 @@ def update_country(country_id):
     new_code = data.get('code', country.code)
 
     try:
-        if 'name' in data and not new_name:
-            abort(400, 'Name is required!')
-        country.name = new_name
-        country.code = new_code
-        country.updated_at = datetime.utcnow()
-        data_manager.save(country)
+        with data_manager.transaction('Country'):
+            if 'name' in data and not new_name:
+                abort(400, 'Name is required!')
+            country.name = new_name
+            country.code = new_code
+            country.updated_at = datetime.utcnow()
+            data_manager.save(country)
     except ValueError as e:
         abort(400, str(e))
     return jsonify(country.to_dict()), 200
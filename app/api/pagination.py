@@ -0,0 +1,188 @@
+import base64
+import binascii
+import json
+from flask import abort, jsonify, request
+from persistence.indexes import creation_key
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def encode_cursor(key):
+    """
+    Encodes the key of the last entity of a page into an opaque cursor.
+
+    Args:
+        key (tuple): The (created_at, id) or (value, id) key, or None after
+        the last page.
+
+    Returns:
+        str: The cursor, or None if key is None.
+    """
+    if key is None:
+        return None
+    data = json.dumps(list(key), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor, key_type=str):
+    """
+    Decodes a cursor returned by encode_cursor().
+
+    Args:
+        cursor (str): The cursor.
+        key_type (type or tuple, optional): The expected type of the first
+        key component. Defaults to str, for creation dates.
+
+    Returns:
+        tuple: The key.
+
+    Raises:
+        ValueError: If the cursor is malformed or is not of the expected
+        type, e.g. when it comes from another sort order.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, list) or len(key) != 2 \
+            or not isinstance(key[0], key_type) \
+            or isinstance(key[0], bool) or not isinstance(key[1], str):
+        raise ValueError('Invalid cursor')
+    return tuple(key)
+
+
+def pagination_args(key_type=str):
+    """
+    Reads the limit and cursor query parameters of the request.
+
+    Args:
+        key_type (type or tuple, optional): The expected type of the first
+        key component of the cursor. Defaults to str.
+
+    Returns:
+        tuple: The limit and the key to start after, or None if the
+        request asks for the whole collection.
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+
+    if limit is None and cursor is None:
+        return None
+    if limit is None:
+        limit = DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except ValueError:
+        abort(400, 'limit must be an integer')
+    if not 1 <= limit <= MAX_LIMIT:
+        abort(400, f'limit must be between 1 and {MAX_LIMIT}')
+    try:
+        after = decode_cursor(cursor, key_type) if cursor else None
+    except ValueError as e:
+        abort(400, str(e))
+    return limit, after
+
+
+def page_response(entities, next_key, serialize):
+    """
+    Builds the response of a page.
+
+    Args:
+        entities (list): The entities of the page.
+        next_key (tuple): The key of the last entity, or None on the last
+        page.
+        serialize (callable): Function turning an entity into a dict.
+
+    Returns:
+        tuple: The JSON response, with the items and the next cursor, and
+        the status code.
+    """
+    return jsonify({
+        'items': [serialize(entity) for entity in entities],
+        'next_cursor': encode_cursor(next_key),
+    }), 200
+
+
+def collection_response(data_manager, entity_type, serialize):
+    """
+    Builds the response listing the entities of a type. With a limit or a
+    cursor, only one page is produced, from the ordered index of the type;
+    otherwise the whole collection is returned as a list.
+
+    Args:
+        data_manager: The persistence manager owning the entities.
+        entity_type (str): The type of the entities.
+        serialize (callable): Function turning an entity into a dict.
+
+    Returns:
+        tuple: The JSON response and the status code.
+    """
+    args = pagination_args()
+
+    if args is None:
+        return jsonify([serialize(entity)
+                        for entity in data_manager.get_all(entity_type)]), 200
+    limit, after = args
+    entities, next_key = data_manager.page(entity_type, limit, after)
+    return page_response(entities, next_key, serialize)
+
+
+def sorted_response(data_manager, entity_type, attribute, serialize,
+                    low=None, high=None):
+    """
+    Builds the response listing the entities of a type sorted by an
+    attribute, within optional bounds. With a limit or a cursor, only one
+    page is produced.
+
+    Args:
+        data_manager: The persistence manager owning the entities.
+        entity_type (str): The type of the entities.
+        attribute (str): The numeric attribute to sort by.
+        serialize (callable): Function turning an entity into a dict.
+        low (optional): The inclusive minimum value. Defaults to None.
+        high (optional): The inclusive maximum value. Defaults to None.
+
+    Returns:
+        tuple: The JSON response and the status code.
+    """
+    args = pagination_args(key_type=(int, float))
+    limit, after = args or (None, None)
+    entities, next_key = data_manager.sorted_page(
+        entity_type, attribute, limit, after, low, high)
+
+    if args is None:
+        return jsonify([serialize(entity) for entity in entities]), 200
+    return page_response(entities, next_key, serialize)
+
+
+def list_response(entities, serialize, key=creation_key, key_type=str):
+    """
+    Builds the response listing a filtered set of entities, paginated like
+    collection_response() by sorting the set.
+
+    Args:
+        entities (list): The entities.
+        serialize (callable): Function turning an entity into a dict.
+        key (callable, optional): Function computing the sort key of an
+        entity, ending with its ID. Defaults to creation_key.
+        key_type (type or tuple, optional): The type of the first key
+        component. Defaults to str.
+
+    Returns:
+        tuple: The JSON response and the status code. Without a limit or a
+        cursor, the entities are listed unsorted unless key is given.
+    """
+    args = pagination_args(key_type)
+
+    if args is None:
+        if key is not creation_key:
+            entities = sorted(entities, key=key)
+        return jsonify([serialize(entity) for entity in entities]), 200
+    limit, after = args
+    keyed = sorted((key(entity), entity) for entity in entities
+                   if after is None or key(entity) > after)
+    next_key = keyed[limit - 1][0] if len(keyed) > limit else None
+    return page_response([entity for _, entity in keyed[:limit]],
+                         next_key, serialize)
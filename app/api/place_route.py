@@ -1,9 +1,185 @@
 from flask import Blueprint, jsonify, request, abort, current_app
 from models.place import Place
-from datetime import datetime
+from datetime import datetime, timedelta
+from api.pagination import MAX_LIMIT, collection_response, list_response, \
+    sorted_response
 
 place_bp = Blueprint('place', __name__)
 
+# The fields a client may change through PUT /places/<place_id>, with
+# the JSON types each accepts
+WRITABLE_FIELDS = {
+    'name': str,
+    'description': str,
+    'address': str,
+    'city_id': str,
+    'latitude': (int, float),
+    'longitude': (int, float),
+    'host_id': str,
+    'num_rooms': int,
+    'num_bathrooms': int,
+    'price_per_night': (int, float),
+    'max_guests': int,
+    'amenities': list,
+}
+
+
+def place_details(data_manager, place):
+    """
+    Returns the place data joined with its city, the city's country, its
+    amenities and its rating summary.
+
+    Args:
+        data_manager: The registry owning the cities, countries and
+        amenities.
+        place (Place): The place.
+
+    Returns:
+        dict: Place data
+    """
+    place_dict = place.to_dict()
+    city = data_manager.get(place_dict['city_id'], 'City')
+    if city is not None:
+        city_dict = city.to_dict()
+        country = data_manager.get_country_by_code(city.country_id)
+        city_dict['country'] = country.to_dict() if country else None
+        place_dict['city'] = city_dict
+    else:
+        place_dict['city'] = None
+    amenities = (data_manager.get(amenity_id, 'Amenity')
+                 for amenity_id in place_dict['amenities'])
+    place_dict['amenities'] = [amenity.to_dict() for amenity in amenities
+                               if amenity is not None]
+    place_dict['rating'] = data_manager.get_place_rating(place.id)
+    return place_dict
+
+
+def check_place_update(data):
+    """
+    Checks a place update body before anything is applied.
+
+    Args:
+        data (dict): The request body.
+
+    Returns:
+        str: The reason the body is rejected, or None if it is valid.
+    """
+    for key, value in data.items():
+        expected = WRITABLE_FIELDS.get(key)
+        if expected is None:
+            return f"Field {key} cannot be updated"
+        if not isinstance(value, expected) or isinstance(value, bool):
+            return f"Invalid type for {key}"
+        if key == 'amenities' \
+                and not all(isinstance(item, str) for item in value):
+            return "Amenities must be a list of amenity ids"
+        if not value:
+            return f"Empty value provided for {key}"
+    return None
+
+
+def place_filters():
+    """
+    Reads the numeric filters of the request.
+
+    Returns:
+        dict: The bounds of each filtered attribute, as
+        {attribute: (low, high)}, empty when the request has no filter.
+    """
+    filters = {
+        'min_price': ('price_per_night', 0, float),
+        'max_price': ('price_per_night', 1, float),
+        'min_guests': ('max_guests', 0, int),
+        'rooms': ('num_rooms', 0, int),
+    }
+    ranges = {}
+
+    for parameter, (attribute, bound, convert) in filters.items():
+        value = request.args.get(parameter)
+        if value is None:
+            continue
+        try:
+            value = convert(value)
+        except ValueError:
+            abort(400, f'{parameter} must be a number')
+        bounds = list(ranges.get(attribute, (None, None)))
+        bounds[bound] = value
+        ranges[attribute] = tuple(bounds)
+    return ranges
+
+
+def number_arg(name, low, high):
+    """
+    Reads a required numeric query parameter, such as a coordinate.
+
+    Args:
+        name (str): The name of the parameter.
+        low (float): The minimum value.
+        high (float): The maximum value.
+
+    Returns:
+        float: The value.
+    """
+    value = request.args.get(name)
+
+    if value is None:
+        abort(400, f'Missing {name}')
+    try:
+        value = float(value)
+    except ValueError:
+        abort(400, f'{name} must be a number')
+    if not low <= value <= high:
+        abort(400, f'{name} must be between {low} and {high}')
+    return value
+
+
+def limit_arg(default):
+    """
+    Reads the optional limit query parameter of a ranked search.
+
+    Args:
+        default (int): The limit when the parameter is missing.
+
+    Returns:
+        int: The limit, between 1 and MAX_LIMIT.
+    """
+    limit = request.args.get('limit', default)
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        abort(400, 'limit must be an integer')
+    if not 1 <= limit <= MAX_LIMIT:
+        abort(400, f'limit must be between 1 and {MAX_LIMIT}')
+    return limit
+
+
+def window_arg(default='7d', longest=timedelta(days=90)):
+    """
+    Reads the window query parameter, a number of hours, days or weeks
+    such as 24h, 7d or 2w.
+
+    Args:
+        default (str, optional): The window when the parameter is missing.
+        Defaults to '7d'.
+        longest (timedelta, optional): The longest window accepted.
+        Defaults to 90 days.
+
+    Returns:
+        timedelta: The window.
+    """
+    window = request.args.get('window', default)
+    units = {'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+    if len(window) < 2 or window[-1] not in units or \
+            not window[:-1].isdigit():
+        abort(400, 'window must be a number of hours, days or weeks, '
+                   'such as 24h, 7d or 2w')
+    window = timedelta(**{units[window[-1]]: int(window[:-1])})
+    if not timedelta(hours=1) <= window <= longest:
+        abort(400, f'window must be between 1h and {longest.days}d')
+    return window
+
 
 @place_bp.route('/places', methods=['POST'])
 def create_place():
@@ -72,7 +248,11 @@ def create_place():
                       max_guests, amenities, data_manager)
     except ValueError as e:
         abort(400, str(e))
-    data_manager.save(place)
+    try:
+        data_manager.save(place)
+    except ValueError as e:
+        # Another worker stored the same unique key first
+        abort(409, str(e))
     return jsonify(place.to_dict()), 201
 
 # ********************************************************************* #
@@ -80,17 +260,115 @@ def create_place():
 
 @place_bp.route('/places', methods=['GET'])
 def get_places():
+    """
+    * This route gets all places, joined with their city and amenities *
+
+    Methods: GET
+
+    Query Parameters:
+
+    - min_price (float) The minimum price per night (optional)
+    - max_price (float) The maximum price per night (optional)
+    - min_guests (int) The minimum capacity in guests (optional)
+    - rooms (int) The minimum number of rooms (optional)
+    - sort (str) "price" to list the cheapest places first (optional)
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
+    Returns:
+
+    - list: List of place data; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
+
+    """
+    data_manager = current_app.config['DATA_MANAGER_PLACES']
+    ranges = place_filters()
+    sort = request.args.get('sort')
+
+    def serialize(place):
+        return place_details(data_manager, place)
+
+    if sort not in (None, 'price'):
+        abort(400, 'sort must be price')
+    if sort == 'price' and set(ranges) <= {'price_per_night'}:
+        low, high = ranges.get('price_per_night', (None, None))
+        return sorted_response(data_manager, 'Place', 'price_per_night',
+                               serialize, low, high)
+    if sort == 'price':
+        return list_response(
+            data_manager.select('Place', ranges), serialize,
+            key=lambda place: (place.price_per_night, place.id),
+            key_type=(int, float))
+    if ranges:
+        return list_response(data_manager.select('Place', ranges),
+                             serialize)
+    return collection_response(data_manager, 'Place', serialize)
+
+
+# ********************************************************************* #
+
+
+@place_bp.route('/places/search', methods=['GET'])
+def search_places():
+    """
+    * This route gets the places best matching a full-text query over
+    their name, description and address *
+
+    Methods: GET
+
+    Query Parameters:
+
+    - q (str) The query
+    - limit (int) The maximum number of places (optional, default 20)
+
+    Returns:
+
+    - list: List of place data, best match first, each with its score
+
+    """
+    data_manager = current_app.config['DATA_MANAGER_PLACES']
+    query = request.args.get('q', '').strip()
+    if not query:
+        abort(400, 'Missing q')
+    limit = limit_arg(20)
+
+    places = []
+    for score, place in data_manager.search_places(query, limit):
+        place_dict = place_details(data_manager, place)
+        place_dict['score'] = round(score, 4)
+        places.append(place_dict)
+    return jsonify(places), 200
+
+
+# ********************************************************************* #
+
+
+@place_bp.route('/places/top', methods=['GET'])
+def get_top_places():
+    """
+    * This route gets the best rated places, ranked by the Bayesian
+    average of their ratings *
+
+    Methods: GET
+
+    Query Parameters:
+
+    - limit (int) The maximum number of places (optional, default 10)
+    - city_id (str) The city of the places (optional)
+
+    Returns:
+
+    - list: List of place data, best first, each with its score
+
+    """
     data_manager = current_app.config['DATA_MANAGER_PLACES']
-    place_objects = data_manager.storage.get('Place', {}).values()
+    limit = limit_arg(10)
+    city_id = request.args.get('city_id')
+
     places = []
-    for place in place_objects:
-        place_dict = place.to_dict()
-        city = data_manager.get(place_dict['city_id'], 'City')
-        place_dict['city'] = city.to_dict() if city else None
-        amenities = [data_manager.get(amenity_id, 'Amenity').to_dict(
-        ) for amenity_id in place_dict['amenities'] if
-            data_manager.get(amenity_id, 'Amenity')]
-        place_dict['amenities'] = amenities
+    for score, place in data_manager.top_places(limit, city_id):
+        place_dict = place_details(data_manager, place)
+        place_dict['score'] = round(score, 4)
         places.append(place_dict)
     return jsonify(places), 200
 
@@ -98,6 +376,149 @@ def get_places():
 # ********************************************************************* #
 
 
+@place_bp.route('/places/trending', methods=['GET'])
+def get_trending_places():
+    """
+    * This route gets the places that received the most reviews over a
+    recent window *
+
+    Methods: GET
+
+    Query Parameters:
+
+    - window (str) The window, such as 24h, 7d or 2w (optional, default 7d)
+    - limit (int) The maximum number of places (optional, default 10)
+
+    Returns:
+
+    - list: List of place data, most reviewed first, each with its
+      review_count over the window
+
+    """
+    data_manager = current_app.config['DATA_MANAGER_PLACES']
+    window = window_arg()
+    limit = limit_arg(10)
+
+    places = []
+    for count, place in data_manager.trending_places(window, limit):
+        place_dict = place_details(data_manager, place)
+        place_dict['review_count'] = count
+        places.append(place_dict)
+    return jsonify(places), 200
+
+
+# ********************************************************************* #
+
+
+@place_bp.route('/places/nearby', methods=['GET'])
+def get_places_nearby():
+    """
+    * This route gets the places within a distance of a point, nearest
+    first *
+
+    Methods: GET
+
+    Query Parameters:
+
+    - lat (float) The latitude of the point
+    - lon (float) The longitude of the point
+    - radius_km (float) The maximum distance in kilometers
+    - limit (int) The maximum number of places (optional)
+
+    Returns:
+
+    - list: List of place data, each with its distance_km
+
+    """
+    data_manager = current_app.config['DATA_MANAGER_PLACES']
+    latitude = number_arg('lat', -90, 90)
+    longitude = number_arg('lon', -180, 180)
+    radius_km = number_arg('radius_km', 0, 20040)
+    limit = limit_arg(MAX_LIMIT)
+
+    places = []
+    for distance, place in data_manager.nearby('Place', latitude, longitude,
+                                               radius_km)[:limit]:
+        place_dict = place_details(data_manager, place)
+        place_dict['distance_km'] = round(distance, 3)
+        places.append(place_dict)
+    return jsonify(places), 200
+
+
+# ********************************************************************* #
+
+
+@place_bp.route('/places/bbox', methods=['GET'])
+def get_places_in_bbox():
+    """
+    * This route gets the places inside a bounding box *
+
+    Methods: GET
+
+    Query Parameters:
+
+    - min_lat (float) The southern latitude
+    - min_lon (float) The western longitude
+    - max_lat (float) The northern latitude
+    - max_lon (float) The eastern longitude, smaller than min_lon when the
+      box crosses the antimeridian
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
+    Returns:
+
+    - list: List of place data; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
+
+    """
+    data_manager = current_app.config['DATA_MANAGER_PLACES']
+    south = number_arg('min_lat', -90, 90)
+    west = number_arg('min_lon', -180, 180)
+    north = number_arg('max_lat', -90, 90)
+    east = number_arg('max_lon', -180, 180)
+    if south > north:
+        abort(400, 'min_lat must not be greater than max_lat')
+    return list_response(data_manager.within('Place', south, west, north,
+                                             east),
+                         lambda place: place_details(data_manager, place))
+
+
+# ********************************************************************* #
+
+
+@place_bp.route('/places/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def get_place_tile(z, x, y):
+    """
+    * This route gets the number of places and their average price in a
+    map tile, with the clusters to draw at that zoom level *
+
+    Methods: GET
+
+    Parameters:
+        z: (int) The zoom level
+        x: (int) The column of the tile
+        y: (int) The row of the tile
+
+    Returns:
+
+    - dict: The tile count, average_price and average location, with its
+      clusters: the non-empty tiles two zoom levels deeper
+
+    """
+    data_manager = current_app.config['DATA_MANAGER_PLACES']
+    try:
+        tile = data_manager.get_place_tile(z, x, y)
+    except ValueError as e:
+        abort(404, str(e))
+
+    for summary in [tile] + tile['clusters']:
+        summary['average_price'] = summary.pop('average')
+    return jsonify(tile), 200
+
+
+# ********************************************************************* #
+
+
 @place_bp.route('/places/<place_id>', methods=['GET'])
 def get_place(place_id):
     """
@@ -120,14 +541,34 @@ def get_place(place_id):
     if place is None:
         abort(404, 'Place not found')
 
-    place_dict = place.to_dict()
-    city = data_manager.get(place_dict['city_id'], 'City')
-    place_dict['city'] = city.to_dict() if city else None
-    amenities = [data_manager.get(amenity_id, 'Amenity').to_dict(
-    ) for amenity_id in place_dict['amenities'] if
-        data_manager.get(amenity_id, 'Amenity')]
-    place_dict['amenities'] = amenities
-    return jsonify(place_dict), 200
+    return jsonify(place_details(data_manager, place)), 200
+
+
+# ********************************************************************* #
+
+
+@place_bp.route('/places/<place_id>/rating', methods=['GET'])
+def get_place_rating(place_id):
+    """
+    * This route gets the rating summary of a place *
+
+    Methods: GET
+
+    Parameters:
+        place_id: (str) The place's ID
+
+    Returns:
+
+    - dict: The count, sum and average of the ratings of the place, and
+      the number of reviews giving each rating from 1 to 5
+
+    """
+    data_manager = current_app.config['DATA_MANAGER_PLACES']
+
+    if data_manager.get(place_id, 'Place') is None:
+        abort(404, 'Place not found')
+
+    return jsonify(data_manager.get_place_rating(place_id)), 200
 
 
 # ********************************************************************* #
@@ -158,6 +599,8 @@ def update_place(place_id):
     - max_guests (int) The maximum number of guests in the place
     - amenities (list) A list of amenity ids
 
+    Any other field, or a value of the wrong type, is rejected with 400.
+
     Returns:
 
     - dict: Place data
@@ -174,15 +617,18 @@ def update_place(place_id):
 
     if not data:
         abort(400, 'No input data provided')
+    if not isinstance(data, dict):
+        abort(400, 'Input data must be a JSON object')
+    error = check_place_update(data)
+    if error is not None:
+        abort(400, error)
     try:
-        for key, value in data.items():
-            if hasattr(place, key):
-                if not value:
-                    abort(400, f"Empty value provided for {key}")
+        with data_manager.transaction('Place'):
+            for key, value in data.items():
                 setattr(place, key, value)
-        place.updated_at = datetime.utcnow()
-        data_manager.save(place)
-    except ValueError as e:
+            place.updated_at = datetime.utcnow()
+            data_manager.save(place)
+    except (TypeError, ValueError) as e:
         abort(400, str(e))
     return jsonify(place.to_dict()), 200
 
@@ -213,8 +659,9 @@ def add_amenity_to_place(place_id, amenity_id):
         abort(404, 'Place not found')
     if amenity_id in place.amenities:
         abort(409, 'Amenity already added to the place')
-    place.add_amenity(amenity_id)
-    data_manager.save(place)
+    with data_manager.transaction('Place'):
+        place.add_amenity(amenity_id)
+        data_manager.save(place)
     return jsonify(place.to_dict()), 200
 
 
@@ -245,8 +692,9 @@ def remove_amenity_from_place(place_id, amenity_id):
 
     if place is None:
         abort(404, 'Place not found')
-    place.remove_amenity(amenity_id)
-    data_manager.save(place)
+    with data_manager.transaction('Place'):
+        place.remove_amenity(amenity_id)
+        data_manager.save(place)
     return jsonify(place.to_dict()), 200
 
 
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, abort, current_app
 from models.review import Review
 from datetime import datetime
+from api.pagination import collection_response, list_response
 
 review_bp = Blueprint('review', __name__)
 
@@ -43,7 +44,11 @@ def create_review(place_id):
         review = Review(place_id, user_id, rating, text, data_manager)
     except ValueError as e:
         abort(400, str(e))
-    data_manager.save(review)
+    try:
+        data_manager.save(review)
+    except ValueError as e:
+        # Another worker stored the same unique key first
+        abort(409, str(e))
     return jsonify(review.to_dict()), 201
 
 
@@ -57,16 +62,22 @@ def get_reviews_by_user(user_id):
 
     Methods: GET
 
+    Query Parameters:
+
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
     Returns:
 
-    - list: List of reviews by user
+    - list: List of reviews by user; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
 
 
     """
 
     data_manager = current_app.config['DATA_MANAGER_REVIEWS']
     reviews = data_manager.get_reviews_by_user_id(user_id)
-    return jsonify([review.to_dict() for review in reviews]), 200
+    return list_response(reviews, lambda review: review.to_dict())
 
 
 # ********************************************************************* #
@@ -79,15 +90,21 @@ def get_reviews_by_place(place_id):
 
     Methods: GET
 
+    Query Parameters:
+
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
     Returns:
 
-    - list: List of reviews by place
+    - list: List of reviews by place; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
 
 
     """
     data_manager = current_app.config['DATA_MANAGER_REVIEWS']
     reviews = data_manager.get_reviews_by_place_id(place_id)
-    return jsonify([review.to_dict() for review in reviews]), 200
+    return list_response(reviews, lambda review: review.to_dict())
 
 
 # ********************************************************************* #
@@ -151,11 +168,12 @@ def update_review(review_id):
     if not data:
         abort(400, 'No input data provided')
     try:
-        for key, value in data.items():
-            if key in ['rating', 'text']:
-                setattr(review, key, value)
-        review.updated_at = datetime.utcnow()
-        data_manager.save(review)
+        with data_manager.transaction('Review'):
+            for key, value in data.items():
+                if key in ['rating', 'text']:
+                    setattr(review, key, value)
+            review.updated_at = datetime.utcnow()
+            data_manager.save(review)
     except ValueError as e:
         abort(400, str(e))
     return jsonify(review.to_dict()), 200
@@ -198,13 +216,18 @@ def get_reviews():
 
     Methods: GET
 
+    Query Parameters:
+
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
     Returns:
 
-    - list: List of reviews
+    - list: List of reviews; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
 
     """
 
     data_manager = current_app.config['DATA_MANAGER_REVIEWS']
-    reviews = [review.to_dict()
-               for review in data_manager.storage.get('Review', {}).values()]
-    return jsonify(reviews), 200
+    return collection_response(data_manager, 'Review',
+                               lambda review: review.to_dict())
@@ -28,6 +28,26 @@ class AmenityAPITestCase(unittest.TestCase):
         amenities = json.loads(response.data)
         self.assertEqual(len(amenities), 1)
 
+    def test_get_amenities_by_page(self):
+        for name in ('WiFi', 'Pool', 'Parking'):
+            self.app.post('/amenities', json={'name': name})
+        names = []
+        cursor = ''
+        while cursor is not None:
+            response = self.app.get(f'/amenities?limit=2&cursor={cursor}')
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.data)
+            self.assertLessEqual(len(page['items']), 2)
+            names += [amenity['amenity_name'] for amenity in page['items']]
+            cursor = page['next_cursor']
+        self.assertEqual(names, ['WiFi', 'Pool', 'Parking'])
+
+    def test_get_amenities_invalid_page(self):
+        self.assertEqual(self.app.get('/amenities?limit=0').status_code, 400)
+        self.assertEqual(self.app.get('/amenities?limit=x').status_code, 400)
+        self.assertEqual(self.app.get('/amenities?cursor=abc').status_code,
+                         400)
+
     def test_get_amenity(self):
         response = self.app.post('/amenities', json={
             'name': 'WiFi'
@@ -50,6 +70,22 @@ class AmenityAPITestCase(unittest.TestCase):
         amenity = json.loads(response.data)
         self.assertEqual(amenity['amenity_name'], 'Updated WiFi')
 
+    def test_update_amenity_to_existing_name(self):
+        self.app.post('/amenities', json={
+            'name': 'WiFi'
+        })
+        response = self.app.post('/amenities', json={
+            'name': 'Pool'
+        })
+        amenity_id = json.loads(response.data)['amenity_id']
+        response = self.app.put(f'/amenities/{amenity_id}', json={
+            'name': 'WiFi'
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self.app.get(f'/amenities/{amenity_id}')
+        amenity = json.loads(response.data)
+        self.assertEqual(amenity['amenity_name'], 'Pool')
+
     def test_delete_amenity(self):
         response = self.app.post('/amenities', json={
             'name': 'WiFi'
@@ -42,6 +42,19 @@ class CountryAPITestCase(unittest.TestCase):
         country = json.loads(response.data)
         self.assertEqual(country['code'], 'TC')
 
+    def test_get_iso_countries(self):
+        response = self.app.get('/countries/iso')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertGreater(len(json.loads(response.data)), 200)
+        response = self.app.get('/countries/iso?q=fra')
+        self.assertEqual([country['alpha_2'] for country in
+                          json.loads(response.data)], ['FR'])
+        response = self.app.get('/countries/iso?q=united&limit=2')
+        self.assertEqual(len(json.loads(response.data)), 2)
+        self.assertEqual(self.app.get(
+            '/countries/iso?q=a&limit=x').status_code, 400)
+
     def test_update_country(self):
         response = self.app.post('/country', json={
             'name': 'Test Country',
@@ -3,6 +3,7 @@ import unittest
 import json
 from app import app 
 from persistence.data_manager import DataManager
+from models.review import Review
 from datetime import datetime  # Ensure datetime is imported
 
 class PlaceAPITestCase(unittest.TestCase):
@@ -51,6 +52,239 @@ class PlaceAPITestCase(unittest.TestCase):
         places = json.loads(response.data)
         self.assertEqual(len(places), 1)
 
+    def test_filter_places(self):
+        for name, price, guests, rooms in (('Studio', 50, 2, 1),
+                                           ('Loft', 120, 4, 2),
+                                           ('Villa', 400, 10, 5)):
+            self.app.post('/places', json={
+                'name': name,
+                'description': 'A nice place to stay',
+                'address': '123 Test St',
+                'city_id': 'city_123',
+                'latitude': 37.7749,
+                'longitude': -122.4194,
+                'host_id': 'host_456',
+                'num_rooms': rooms,
+                'num_bathrooms': 1,
+                'price_per_night': price,
+                'max_guests': guests,
+                'amenities': []
+            })
+        response = self.app.get('/places?min_price=60&max_price=500'
+                                '&min_guests=4&rooms=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([place['place_name'] for place in
+                          json.loads(response.data)], ['Villa'])
+        response = self.app.get('/places?max_price=150&limit=1')
+        page = json.loads(response.data)
+        self.assertEqual([place['place_name'] for place in page['items']],
+                         ['Studio'])
+        self.assertIsNotNone(page['next_cursor'])
+        response = self.app.get('/places?min_price=cheap')
+        self.assertEqual(response.status_code, 400)
+
+    def test_places_sorted_by_price(self):
+        for name, price, guests in (('Villa', 400, 10), ('Studio', 50, 2),
+                                    ('Loft', 120, 4), ('Flat', 90, 4)):
+            self.app.post('/places', json={
+                'name': name,
+                'description': 'A nice place to stay',
+                'address': '123 Test St',
+                'city_id': 'city_123',
+                'latitude': 37.7749,
+                'longitude': -122.4194,
+                'host_id': 'host_456',
+                'num_rooms': 3,
+                'num_bathrooms': 2,
+                'price_per_night': price,
+                'max_guests': guests,
+                'amenities': []
+            })
+        response = self.app.get('/places?sort=price&max_price=200')
+        self.assertEqual([place['place_name'] for place in
+                          json.loads(response.data)],
+                         ['Studio', 'Flat', 'Loft'])
+        names = []
+        cursor = ''
+        while cursor is not None:
+            page = json.loads(self.app.get(
+                f'/places?sort=price&min_price=60&limit=2&cursor={cursor}'
+            ).data)
+            names += [place['place_name'] for place in page['items']]
+            cursor = page['next_cursor']
+        self.assertEqual(names, ['Flat', 'Loft', 'Villa'])
+        page = json.loads(self.app.get(
+            '/places?sort=price&min_guests=4&limit=2').data)
+        self.assertEqual([place['place_name'] for place in page['items']],
+                         ['Flat', 'Loft'])
+        self.assertEqual(self.app.get('/places?sort=name').status_code, 400)
+        created_cursor = json.loads(self.app.get(
+            '/places?limit=1').data)['next_cursor']
+        self.assertEqual(self.app.get(
+            f'/places?sort=price&cursor={created_cursor}').status_code, 400)
+
+    def test_places_nearby_and_bbox(self):
+        for name, latitude, longitude in (('Louvre', 48.8606, 2.3376),
+                                          ('Versailles', 48.8049, 2.1204),
+                                          ('Bellecour', 45.7578, 4.8320)):
+            self.app.post('/places', json={
+                'name': name,
+                'description': 'A nice place to stay',
+                'address': '123 Test St',
+                'city_id': 'city_123',
+                'latitude': latitude,
+                'longitude': longitude,
+                'host_id': 'host_456',
+                'num_rooms': 3,
+                'num_bathrooms': 2,
+                'price_per_night': 100,
+                'max_guests': 4,
+                'amenities': []
+            })
+        response = self.app.get('/places/nearby?lat=48.8584&lon=2.2945'
+                                '&radius_km=30')
+        self.assertEqual(response.status_code, 200)
+        places = json.loads(response.data)
+        self.assertEqual([place['place_name'] for place in places],
+                         ['Louvre', 'Versailles'])
+        self.assertLess(places[0]['distance_km'], places[1]['distance_km'])
+
+        response = self.app.get('/places/bbox?min_lat=45&min_lon=4'
+                                '&max_lat=46&max_lon=5')
+        self.assertEqual([place['place_name'] for place in
+                          json.loads(response.data)], ['Bellecour'])
+
+        self.assertEqual(self.app.get('/places/nearby?lat=100&lon=0'
+                                      '&radius_km=1').status_code, 400)
+        self.assertEqual(self.app.get('/places/bbox?min_lat=1').status_code,
+                         400)
+
+    def test_place_tiles(self):
+        for name, price in (('Louvre', 100), ('Orsay', 200)):
+            self.app.post('/places', json={
+                'name': name,
+                'description': 'A nice place to stay',
+                'address': '123 Test St',
+                'city_id': 'city_123',
+                'latitude': 48.86,
+                'longitude': 2.33,
+                'host_id': 'host_456',
+                'num_rooms': 3,
+                'num_bathrooms': 2,
+                'price_per_night': price,
+                'max_guests': 4,
+                'amenities': []
+            })
+        response = self.app.get('/places/tiles/0/0/0')
+        self.assertEqual(response.status_code, 200)
+        tile = json.loads(response.data)
+        self.assertEqual(tile['count'], 2)
+        self.assertEqual(tile['average_price'], 150)
+        self.assertEqual(len(tile['clusters']), 1)
+        self.assertEqual(tile['clusters'][0]['count'], 2)
+        self.assertEqual(self.app.get('/places/tiles/1/5/0').status_code,
+                         404)
+
+    def test_search_places(self):
+        for name, description in (('Sea Loft', 'Sunny loft by the sea'),
+                                  ('Cabin', 'Quiet cabin in the woods')):
+            self.app.post('/places', json={
+                'name': name,
+                'description': description,
+                'address': '123 Test St',
+                'city_id': 'city_123',
+                'latitude': 48.86,
+                'longitude': 2.33,
+                'host_id': 'host_456',
+                'num_rooms': 3,
+                'num_bathrooms': 2,
+                'price_per_night': 100,
+                'max_guests': 4,
+                'amenities': []
+            })
+        response = self.app.get('/places/search?q=SEA')
+        self.assertEqual(response.status_code, 200)
+        places = json.loads(response.data)
+        self.assertEqual([place['place_name'] for place in places],
+                         ['Sea Loft'])
+        self.assertGreater(places[0]['score'], 0)
+        self.assertEqual(len(json.loads(self.app.get(
+            '/places/search?q=test&limit=1').data)), 1)
+        self.assertEqual(self.app.get('/places/search?q=').status_code, 400)
+        self.assertEqual(self.app.get(
+            '/places/search?q=sea&limit=0').status_code, 400)
+
+    def test_place_rating(self):
+        response = self.app.post('/places', json={
+            'name': 'Test Place',
+            'description': 'A nice place to stay',
+            'address': '123 Test St',
+            'city_id': 'city_123',
+            'latitude': 37.7749,
+            'longitude': -122.4194,
+            'host_id': 'host_456',
+            'num_rooms': 3,
+            'num_bathrooms': 2,
+            'price_per_night': 100,
+            'max_guests': 4,
+            'amenities': []
+        })
+        place_id = json.loads(response.data)['place_id']
+        for user_id, rating in (('user_1', 5), ('user_2', 4)):
+            self.data_manager.save(Review(place_id, user_id, rating, 'Nice',
+                                          self.data_manager))
+        response = self.app.get(f'/places/{place_id}/rating')
+        self.assertEqual(response.status_code, 200)
+        rating = json.loads(response.data)
+        self.assertEqual((rating['count'], rating['average']), (2, 4.5))
+        self.assertEqual(rating['histogram']['5'], 1)
+        place = json.loads(self.app.get(f'/places/{place_id}').data)
+        self.assertEqual(place['rating'], rating)
+        self.assertEqual(self.app.get('/places/unknown/rating').status_code,
+                         404)
+
+    def test_top_and_trending_places(self):
+        place_ids = {}
+        for name, city_id in (('Loft', 'city_1'), ('Cabin', 'city_2')):
+            response = self.app.post('/places', json={
+                'name': name,
+                'description': 'A nice place to stay',
+                'address': '123 Test St',
+                'city_id': city_id,
+                'latitude': 37.7749,
+                'longitude': -122.4194,
+                'host_id': 'host_456',
+                'num_rooms': 3,
+                'num_bathrooms': 2,
+                'price_per_night': 100,
+                'max_guests': 4,
+                'amenities': []
+            })
+            place_ids[name] = json.loads(response.data)['place_id']
+        for user_id in ('user_1', 'user_2'):
+            self.data_manager.save(Review(place_ids['Loft'], user_id, 5,
+                                          'Great', self.data_manager))
+        self.data_manager.save(Review(place_ids['Cabin'], 'user_1', 2,
+                                      'Meh', self.data_manager))
+
+        response = self.app.get('/places/top')
+        self.assertEqual(response.status_code, 200)
+        places = json.loads(response.data)
+        self.assertEqual([place['place_name'] for place in places],
+                         ['Loft', 'Cabin'])
+        self.assertGreater(places[0]['score'], places[1]['score'])
+        self.assertEqual([place['place_name'] for place in json.loads(
+            self.app.get('/places/top?city_id=city_2').data)], ['Cabin'])
+
+        response = self.app.get('/places/trending?window=24h&limit=1')
+        self.assertEqual(response.status_code, 200)
+        places = json.loads(response.data)
+        self.assertEqual([(place['place_name'], place['review_count'])
+                          for place in places], [('Loft', 2)])
+        for window in ('7', 'd', '0h', '1y', '365d'):
+            self.assertEqual(self.app.get(
+                f'/places/trending?window={window}').status_code, 400)
+
     def test_get_place(self):
         response = self.app.post('/places', json={
             'name': 'Test Place',
@@ -95,6 +329,31 @@ class PlaceAPITestCase(unittest.TestCase):
         place = json.loads(response.data)
         self.assertEqual(place['place_name'], 'Updated Test Place')  # Update to match 'place_name'
 
+    def test_update_place_rejects_invalid_fields(self):
+        response = self.app.post('/places', json={
+            'name': 'Test Place',
+            'description': 'A nice place to stay',
+            'address': '123 Test St',
+            'city_id': 'city_123',
+            'latitude': 37.7749,
+            'longitude': -122.4194,
+            'host_id': 'host_456',
+            'num_rooms': 3,
+            'num_bathrooms': 2,
+            'price_per_night': 100,
+            'max_guests': 4,
+            'amenities': []
+        })
+        place_id = json.loads(response.data)['place_id']
+        for body in ({'version': 'x'}, {'id': 'other'}, {'name': []},
+                     {'num_rooms': '3'}, {'latitude': True},
+                     {'amenities': [1]}, {'name': 'Renamed', 'max_guests': 500}):
+            response = self.app.put(f'/places/{place_id}', json=body)
+            self.assertEqual(response.status_code, 400, body)
+        place = json.loads(self.app.get(f'/places/{place_id}').data)
+        self.assertEqual(place['place_name'], 'Test Place')
+        self.assertEqual(place['max_guests'], 4)
+
     def test_delete_place(self):
         response = self.app.post('/places', json={
             'name': 'Test Place',
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, abort, current_app
 from datetime import datetime
 from models.user import User
+from api.pagination import collection_response
 
 users_bp = Blueprint('users', __name__)
 
@@ -71,8 +72,11 @@ def create_user():
     except ValueError as e:
         abort(400, str(e))
 
-    data_manager.save(user)
-
+    try:
+        data_manager.save(user)
+    except ValueError as e:
+        # Another worker stored the same unique key first
+        abort(409, str(e))
     return jsonify(user.to_dict()), 201
 
 
@@ -86,16 +90,21 @@ def get_users():
 
     Methods: GET
 
+    Query Parameters:
+
+    - limit (int) The maximum number of items per page (optional)
+    - cursor (str) The next_cursor of the previous page (optional)
+
     Returns:
 
-    - list: List of users
+    - list: List of users; with limit or cursor, a page as
+      {"items": [...], "next_cursor": str or null}
 
     """
     data_manager = current_app.config['DATA_MANAGER_USERS']
 
-    users = [user.to_dict()
-             for user in data_manager.storage.get('User', {}).values()]
-    return jsonify(users), 200
+    return collection_response(data_manager, 'User',
+                               lambda user: user.to_dict())
 
 
 # ********************************************************************* #
@@ -190,14 +199,14 @@ def update_user(user_id):
         abort(409, 'Email already exists')
 
     try:
-        user.email = new_email
-        user.first_name = new_first_name
-        user.last_name = new_last_name
-        user.updated_at = datetime.utcnow()
+        with data_manager.transaction('User'):
+            user.email = new_email
+            user.first_name = new_first_name
+            user.last_name = new_last_name
+            user.updated_at = datetime.utcnow()
+            data_manager.update(user)
     except ValueError as e:
         abort(400, str(e))
-
-    data_manager.update(user)
     return jsonify(user.to_dict()), 200
 
 
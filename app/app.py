@@ -7,29 +7,135 @@ from api.amenity_route import amenity_bp
 from flask import Flask, send_from_directory
 from flask_swagger_ui import get_swaggerui_blueprint
 from persistence.data_manager import DataManager
+from persistence.sqlite_data_manager import SQLiteDataManager
+from persistence.registry import Registry
+from models.email_validation import EmailValidator
+from models.base_model import BaseModel
+from models.identifiers import IdGenerator
+from models.user import User
+import atexit
 import os
 port = os.getenv('PORT')
 
+# Persistence options: HBNB_JOURNAL=1 appends each mutation to a journal
+# instead of rewriting the whole JSON file on every write
+journal = os.getenv('HBNB_JOURNAL', '').lower() in ('1', 'true', 'yes')
+checkpoint_interval = int(os.getenv('HBNB_CHECKPOINT_INTERVAL', '1000'))
+# Journal records are fsynced so that they survive an OS crash or a power
+# loss; HBNB_JOURNAL_FSYNC=0 trades that durability for faster writes
+journal_fsync = os.getenv('HBNB_JOURNAL_FSYNC', '1').lower() not in \
+    ('0', 'false', 'no')
+# HBNB_VERIFY_ON_LOAD=1 re-validates persisted records once they are loaded
+verify_on_load = os.getenv('HBNB_VERIFY_ON_LOAD', '').lower() in \
+    ('1', 'true', 'yes')
+# HBNB_SHARED=1 lets several worker processes share the same data files
+shared = os.getenv('HBNB_SHARED', '').lower() in ('1', 'true', 'yes')
+# HBNB_WRITE_BEHIND=1 writes mutations from a background thread, at most
+# HBNB_FLUSH_INTERVAL seconds or HBNB_FLUSH_MAX_PENDING mutations later
+write_behind = os.getenv('HBNB_WRITE_BEHIND', '').lower() in \
+    ('1', 'true', 'yes')
+flush_interval = float(os.getenv('HBNB_FLUSH_INTERVAL', '1.0'))
+flush_max_pending = int(os.getenv('HBNB_FLUSH_MAX_PENDING', '100'))
+# HBNB_STORAGE=sqlite stores every entity type in the HBNB_DATABASE
+# SQLite database instead of the JSON files
+storage_backend = os.getenv('HBNB_STORAGE', 'json').lower()
+database = os.getenv('HBNB_DATABASE', 'data/hbnb.db')
+# HBNB_DATA_FILE keeps every entity type in one JSON file instead of one
+# file per type
+data_file = os.getenv('HBNB_DATA_FILE')
+# HBNB_EMAIL_VALIDATION=syntax validates email addresses offline instead of
+# looking up their domain; lookups are cached for HBNB_EMAIL_CACHE_TTL
+# seconds and time out after HBNB_EMAIL_DNS_TIMEOUT seconds
+email_validation = os.getenv('HBNB_EMAIL_VALIDATION', 'deliverability')
+email_cache_ttl = float(os.getenv('HBNB_EMAIL_CACHE_TTL', '3600'))
+email_dns_timeout = int(os.getenv('HBNB_EMAIL_DNS_TIMEOUT', '5'))
+# HBNB_ID_SCHEME=uuid7 gives new entities time-ordered IDs instead of random
+# ones; existing IDs of either kind keep working
+id_scheme = os.getenv('HBNB_ID_SCHEME', 'uuid4').lower()
+
 
 # Initialize Flask app
 app = Flask(__name__)
 
+User.email_validator = EmailValidator(
+    check_deliverability=False if email_validation == 'syntax' else None,
+    ttl=email_cache_ttl, timeout=email_dns_timeout)
+BaseModel.id_generator = IdGenerator(time_ordered=id_scheme == 'uuid7')
+
+
+def create_data_manager(data_file):
+    """
+    Creates a DataManager for the given JSON file using the persistence
+    options read from the environment. With the SQLite backend, the single
+    SQLiteDataManager is returned instead.
+
+    Args:
+        data_file (str): The path to the JSON file.
+
+    Returns:
+        IPersistenceManager: The configured data manager.
+    """
+    if sqlite_data_manager is not None:
+        return sqlite_data_manager
+    return DataManager(data_file, journal=journal,
+                       journal_fsync=journal_fsync,
+                       checkpoint_interval=checkpoint_interval,
+                       verify_on_load=verify_on_load, shared=shared,
+                       write_behind=write_behind,
+                       flush_interval=flush_interval,
+                       flush_max_pending=flush_max_pending)
+
 
-# Initialize DataManagers with the appropriate JSON file paths
-data_manager_users = DataManager("data/data_users.json")
-data_manager_reviews = DataManager("data/data_reviews.json")
-data_manager_places = DataManager("data/data_places.json")
-data_manager_countries = DataManager("data/data_countries.json")
-data_manager_cities = DataManager("data/data_cities.json")
-data_manager_amenities = DataManager("data/data_amenities.json")
+sqlite_data_manager = SQLiteDataManager(database) \
+    if storage_backend == 'sqlite' else None
+
+# Each entity type is stored in its own JSON file (shard) unless a single
+# data file is configured
+DATA_FILES = {
+    'User': "data/data_users.json",
+    'Review': "data/data_reviews.json",
+    'Place': "data/data_places.json",
+    'Country': "data/data_countries.json",
+    'City': "data/data_cities.json",
+    'Amenity': "data/data_amenities.json",
+}
+if data_file:
+    single_data_manager = create_data_manager(data_file)
+    shards = {entity_type: single_data_manager for entity_type in DATA_FILES}
+else:
+    shards = {entity_type: create_data_manager(path)
+              for entity_type, path in DATA_FILES.items()}
+
+# A single registry owns every entity type, so cross-type joins resolve
+registry = Registry(shards)
+app.config['REGISTRY'] = registry
+# Write the buffered mutations and save the search indexes on shutdown
+atexit.register(registry.close)
 
 # Set the data_manager for each blueprint in the app configuration
-app.config['DATA_MANAGER_USERS'] = data_manager_users
-app.config['DATA_MANAGER_REVIEWS'] = data_manager_reviews
-app.config['DATA_MANAGER_PLACES'] = data_manager_places
-app.config['DATA_MANAGER_COUNTRIES'] = data_manager_countries
-app.config['DATA_MANAGER_CITIES'] = data_manager_cities
-app.config['DATA_MANAGER_AMENITIES'] = data_manager_amenities
+app.config['DATA_MANAGER_USERS'] = registry
+app.config['DATA_MANAGER_REVIEWS'] = registry
+app.config['DATA_MANAGER_PLACES'] = registry
+app.config['DATA_MANAGER_COUNTRIES'] = registry
+app.config['DATA_MANAGER_CITIES'] = registry
+app.config['DATA_MANAGER_AMENITIES'] = registry
+
+DATA_MANAGER_KEYS = ['DATA_MANAGER_USERS', 'DATA_MANAGER_REVIEWS',
+                     'DATA_MANAGER_PLACES', 'DATA_MANAGER_COUNTRIES',
+                     'DATA_MANAGER_CITIES', 'DATA_MANAGER_AMENITIES']
+
+
+@app.before_request
+def refresh_data_managers():
+    """
+    Applies the changes other worker processes made to the shared data
+    files before handling a request.
+    """
+    data_managers = {id(app.config[key]): app.config[key]
+                     for key in DATA_MANAGER_KEYS}
+    for data_manager in data_managers.values():
+        data_manager.refresh()
+
 
 # Register blueprints
 app.register_blueprint(amenity_bp)
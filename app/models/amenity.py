@@ -24,6 +24,12 @@ class Amenity(BaseModel):
             Creates an Amenity object from a dictionary representation of
             its data.
 
+        hydrate(data, data_manager):
+            Rebuilds a persisted Amenity object without re-validating it.
+
+        validate():
+            Checks the amenity's fields.
+
         name:
             Property that gets the name of the amenity.
 
@@ -38,6 +44,8 @@ class Amenity(BaseModel):
             the same name already exists.
     """
 
+    __slots__ = ('_name',)
+
     def __init__(self, name, data_manager):
         """
         Initializes an Amenity object with the given name and data manager.
@@ -82,6 +90,36 @@ class Amenity(BaseModel):
         amenity.updated_at = datetime.fromisoformat(data['updated_at'])
         return amenity
 
+    @staticmethod
+    def hydrate(data, data_manager):
+        """
+        Rebuilds a persisted Amenity object from a dictionary without
+        running the constructor, skipping the uniqueness check.
+
+        Args:
+            data (dict): A dictionary containing the amenity data.
+            data_manager: Additional data manager or context if needed.
+
+        Returns:
+            Amenity: The rebuilt Amenity object.
+        """
+        amenity = Amenity.new_hydrated(data['amenity_id'],
+                                       data['created_at'],
+                                       data['updated_at'])
+        amenity._name = data['amenity_name']
+        amenity.data_manager = data_manager
+        return amenity
+
+    def validate(self):
+        """
+        Checks the amenity's fields.
+
+        Raises:
+            ValueError: If the amenity name is empty.
+        """
+        if not self._name:
+            raise ValueError("Amenity name is required!")
+
     @property
     def name(self):
         """ Property that gets the name of the amenity."""
@@ -95,6 +133,7 @@ class Amenity(BaseModel):
         Args:
             value (str): The new name of the amenity.
         """
+        self.before_change()
         self._name = value
         self.save()
 
@@ -1,5 +1,5 @@
-import uuid
 from datetime import datetime
+from models.identifiers import IdGenerator
 
 
 class BaseModel:
@@ -12,27 +12,85 @@ class BaseModel:
         was created.
         updated_at (datetime): The date and time when the model instance
         was last updated.
+        version (int): A counter bumped on every change, used by the
+        persistence layer to tell which instances must be re-serialized.
+        data_manager (IPersistenceManager): The data manager notified of
+        changes, or None.
+
+        id_generator (IdGenerator): The generator of the IDs of new
+        instances, random by default; shared by every model.
+
+    Instances have no __dict__: every model declares its attributes in
+    __slots__, which keeps millions of loaded entities compact.
 
     Methods:
         __init__():
             Initializes a BaseModel instance with a unique identifier,
             creation, and update timestamps.
 
+        new_hydrated(entity_id, created_at, updated_at):
+            Creates an instance from persisted values without running the
+            subclass constructor.
+
         to_dict():
             Returns a dictionary representation of the BaseModel instance.
 
+        mark_dirty():
+            Bumps the version of the instance.
+
+        before_change():
+            Lets the data manager record the instance before it changes.
+
+        copy_state():
+            Copies the attributes of the instance.
+
+        restore_state(state):
+            Restores attributes copied by copy_state().
+
         save():
-            Updates the 'updated_at' timestamp to the current date and time.
+            Updates the 'updated_at' timestamp to the current date and time
+            and re-keys the instance in its data manager's indexes.
     """
 
+    __slots__ = ('id', 'created_at', 'updated_at', 'version',
+                 'data_manager')
+
+    id_generator = IdGenerator()
+
     def __init__(self):
         """
         Initializes a BaseModel instance with a unique identifier, creation,
         and update timestamps.
         """
-        self.id = str(uuid.uuid4())
+        self.id = self.id_generator.new()
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
+        self.version = 0
+        self.data_manager = None
+
+    @classmethod
+    def new_hydrated(cls, entity_id, created_at, updated_at):
+        """
+        Creates an instance from persisted values without running the
+        subclass constructor, so neither field validation nor uniqueness
+        checks are performed. Used to load records that were validated
+        when they were first saved.
+
+        Args:
+            entity_id (str): The persisted identifier.
+            created_at (str): The persisted creation timestamp (ISO 8601).
+            updated_at (str): The persisted update timestamp (ISO 8601).
+
+        Returns:
+            BaseModel: The new instance of cls.
+        """
+        instance = cls.__new__(cls)
+        instance.id = entity_id
+        instance.created_at = datetime.fromisoformat(created_at)
+        instance.updated_at = datetime.fromisoformat(updated_at)
+        instance.version = 0
+        instance.data_manager = None
+        return instance
 
     def to_dict(self):
         """
@@ -48,8 +106,58 @@ class BaseModel:
             "updated_at": self.updated_at.isoformat()
         }
 
+    def mark_dirty(self):
+        """
+        Bumps the version of the instance, so that its cached serialized
+        form is discarded.
+        """
+        self.version += 1
+
+    def before_change(self):
+        """
+        Called by the setters before they change an attribute, so that a
+        transaction of the data manager can record the instance and
+        restore it on rollback.
+        """
+        data_manager = self.data_manager
+
+        if data_manager is not None:
+            data_manager.before_change(self)
+
+    def copy_state(self):
+        """
+        Copies the attributes of the instance. Lists are copied as well,
+        since some are changed in place.
+
+        Returns:
+            tuple: The (name, value) pair of every attribute.
+        """
+        return tuple(
+            (name, value[:] if isinstance(value, list) else value)
+            for name, value in ((name, getattr(self, name, None))
+                                for cls in type(self).__mro__
+                                for name in getattr(cls, '__slots__', ())))
+
+    def restore_state(self, state):
+        """
+        Restores attributes copied by copy_state().
+
+        Args:
+            state (tuple): The (name, value) pairs.
+        """
+        for name, value in state:
+            setattr(self, name, value[:] if isinstance(value, list)
+                    else value)
+
     def save(self):
         """
         Updates the 'updated_at' timestamp to the current date and time.
+        Setters call this after changing an attribute, so the data manager
+        also gets to re-key the instance in its secondary indexes.
         """
         self.updated_at = datetime.now()
+        self.mark_dirty()
+        data_manager = self.data_manager
+
+        if data_manager is not None:
+            data_manager.reindex(self)
@@ -22,6 +22,12 @@ class City(BaseModel):
             Creates a City object from a dictionary representation of its
             data.
 
+        hydrate(data, data_manager):
+            Rebuilds a persisted City object without re-validating it.
+
+        validate():
+            Checks the city's fields.
+
         name:
             Property that gets the name of the city.
 
@@ -43,6 +49,8 @@ class City(BaseModel):
         within the same country, or the country ID is not provided.
     """
 
+    __slots__ = ('_name', '_country_id')
+
     def __init__(self, name, country_id, data_manager):
         """
         Initializes a City object with the given name, country ID, and data
@@ -93,6 +101,39 @@ class City(BaseModel):
         city.updated_at = datetime.fromisoformat(data['updated_at'])
         return city
 
+    @staticmethod
+    def hydrate(data, data_manager):
+        """
+        Rebuilds a persisted City object from a dictionary without running
+        the constructor, skipping field validation and the uniqueness
+        check.
+
+        Args:
+            data (dict): A dictionary containing the city data.
+            data_manager: Additional data manager or context if needed.
+
+        Returns:
+            City: The rebuilt City object.
+        """
+        city = City.new_hydrated(data['city_id'], data['created_at'],
+                                 data['updated_at'])
+        city._name = data['city_name']
+        city._country_id = data['country_id']
+        city.data_manager = data_manager
+        return city
+
+    def validate(self):
+        """
+        Checks the city's fields, as the constructor does.
+
+        Raises:
+            ValueError: If the city name or the country ID is empty.
+        """
+        if not self._name:
+            raise ValueError("City name is required!")
+        if not self._country_id:
+            raise ValueError("Country ID is required!")
+
     @property
     def name(self):
         """
@@ -108,6 +149,7 @@ class City(BaseModel):
         Args:
             value (str): The new name of the city.
         """
+        self.before_change()
         self._name = value
         self.save()
 
@@ -127,6 +169,7 @@ class City(BaseModel):
         Args:
             value (str): The new country ID of the city.
         """
+        self.before_change()
         self._country_id = value
         self.save()
 
@@ -1,6 +1,6 @@
-import pycountry
 from datetime import datetime
 from models.base_model import BaseModel
+from models.iso_countries import ISO_COUNTRIES
 
 
 class Country(BaseModel):
@@ -23,12 +23,19 @@ class Country(BaseModel):
 
         get_country_code(country_name):
             Retrieves the ISO 3166-1 alpha-2 code for the given country
-            name using pycountry.
+            name from the ISO country table.
 
         from_dict(data, data_manager):
             Creates a Country object from a dictionary representation of
             its data.
 
+        hydrate(data, data_manager):
+            Rebuilds a persisted Country object without resolving its
+            code again.
+
+        validate():
+            Checks the country's fields.
+
         name:
             Property that gets the name of the country.
 
@@ -50,6 +57,8 @@ class Country(BaseModel):
         is used in get_country_code().
     """
 
+    __slots__ = ('_name', '_code')
+
     def __init__(self, name, code=None):
         """
         Initializes a Country object with the given name and optionally the
@@ -75,8 +84,9 @@ class Country(BaseModel):
 
     def get_country_code(self, country_name):
         """
-        Retrieves the ISO 3166-1 alpha-2 code for the given country name using
-        pycountry.
+        Retrieves the ISO 3166-1 alpha-2 code for the given country name from
+        the ISO country table. The name is matched regardless of case and
+        accents, and may be a code or the prefix of a single country's name.
 
         Args:
             country_name (str): The name of the country.
@@ -87,7 +97,7 @@ class Country(BaseModel):
         Raises:
             ValueError: If an invalid country name is provided.
         """
-        country = pycountry.countries.get(name=country_name)
+        country = ISO_COUNTRIES.resolve(country_name)
 
         if country:
             return country.alpha_2
@@ -114,8 +124,42 @@ class Country(BaseModel):
         country.id = data['country_id']
         country.created_at = datetime.fromisoformat(data['created_at'])
         country.updated_at = datetime.fromisoformat(data['updated_at'])
+        country.data_manager = data_manager
         return country
 
+    @staticmethod
+    def hydrate(data, data_manager):
+        """
+        Rebuilds a persisted Country object from a dictionary without
+        running the constructor, so its code is not looked up again.
+
+        Args:
+            data (dict): A dictionary containing the country data.
+            data_manager: Additional data manager or context if needed.
+
+        Returns:
+            Country: The rebuilt Country object.
+        """
+        country = Country.new_hydrated(data['country_id'],
+                                       data['created_at'],
+                                       data['updated_at'])
+        country._name = data['name']
+        country._code = data.get('code')
+        country.data_manager = data_manager
+        return country
+
+    def validate(self):
+        """
+        Checks the country's fields.
+
+        Raises:
+            ValueError: If the name or the code is empty.
+        """
+        if not self._name:
+            raise ValueError("Name is required!")
+        if not self._code:
+            raise ValueError("Code cannot be empty")
+
     @property
     def name(self):
         """
@@ -136,6 +180,7 @@ class Country(BaseModel):
         """
         if not value:
             raise ValueError("Name cannot be empty")
+        self.before_change()
         self._name = value
         self.updated_at = datetime.now()
 
@@ -158,6 +203,7 @@ class Country(BaseModel):
         """
         if not value:
             raise ValueError("Code cannot be empty")
+        self.before_change()
         self._code = value
         self.updated_at = datetime.now()
 
@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import email_validator
+from email_validator import EmailNotValidError, validate_email
+from email_validator.deliverability import validate_email_deliverability
+
+
+class EmailValidator:
+    """
+    EmailValidator checks email addresses, either offline, on their syntax
+    only, or by also looking up the mail servers of their domain.
+
+    The outcome of each domain lookup is kept in a least recently used
+    cache for a limited time, so addresses sharing a domain cost one DNS
+    round-trip until it expires. Lookups that time out are not cached.
+
+    Attributes:
+        check_deliverability (bool): Whether domains are looked up; None
+        follows email_validator.CHECK_DELIVERABILITY.
+        cache_size (int): The maximum number of cached domains.
+        ttl (float): The number of seconds a deliverable domain is cached.
+        negative_ttl (float): The number of seconds an undeliverable
+        domain is cached.
+        timeout (int): The DNS timeout in seconds, or None for the
+        email_validator default.
+        max_workers (int): The number of domains validate_many() looks up
+        concurrently.
+        cache (OrderedDict): The cached lookups, least recently used
+        first, as {domain: (error message or None, expiry)}.
+        lock (threading.Lock): The lock guarding the cache.
+
+    Methods:
+        offline():
+            Tells if domains are not looked up.
+
+        parse(email):
+            Checks the syntax of an address.
+
+        lookup(domain, domain_i18n):
+            Checks that a domain accepts email, through the cache.
+
+        check(email):
+            Validates an address.
+
+        is_valid(email):
+            Tells if an address is valid.
+
+        validate_many(emails):
+            Validates many addresses, looking up each domain once.
+
+        clear():
+            Empties the cache.
+    """
+
+    def __init__(self, check_deliverability=None, cache_size=1024,
+                 ttl=3600.0, negative_ttl=300.0, timeout=None,
+                 max_workers=8):
+        self.check_deliverability = check_deliverability
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def offline(self):
+        """
+        Tells if domains are not looked up.
+
+        Returns:
+            bool: True in syntax-only mode, False otherwise.
+        """
+        if self.check_deliverability is None:
+            return not email_validator.CHECK_DELIVERABILITY
+        return not self.check_deliverability
+
+    @staticmethod
+    def parse(email):
+        """
+        Checks the syntax of an address, without any network access.
+
+        Args:
+            email (str): The address.
+
+        Returns:
+            ValidatedEmail: The normalized address and its domain.
+
+        Raises:
+            EmailNotValidError: If the address is malformed.
+        """
+        return validate_email(email, check_deliverability=False)
+
+    def lookup(self, domain, domain_i18n):
+        """
+        Checks that a domain accepts email, through the cache.
+
+        Args:
+            domain (str): The ASCII form of the domain.
+            domain_i18n (str): The domain as written, for error messages.
+
+        Returns:
+            str: The reason the domain does not accept email, or None if
+            it does.
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            cached = self.cache.get(domain)
+            if cached is not None and cached[1] > now:
+                self.cache.move_to_end(domain)
+                return cached[0]
+        try:
+            info = validate_email_deliverability(domain, domain_i18n,
+                                                 self.timeout)
+        except EmailNotValidError as e:
+            error, ttl = str(e), self.negative_ttl
+        else:
+            if 'unknown-deliverability' in info:
+                # The resolver timed out: accept without remembering it
+                return None
+            error, ttl = None, self.ttl
+        with self.lock:
+            self.cache[domain] = (error, now + ttl)
+            self.cache.move_to_end(domain)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return error
+
+    def check(self, email):
+        """
+        Validates an address.
+
+        Args:
+            email (str): The address.
+
+        Returns:
+            str: The reason the address is invalid, or None if it is
+            valid.
+        """
+        try:
+            parsed = self.parse(email)
+        except (EmailNotValidError, TypeError) as e:
+            return str(e)
+        if self.offline():
+            return None
+        return self.lookup(parsed.ascii_domain, parsed.domain)
+
+    def is_valid(self, email):
+        """
+        Tells if an address is valid.
+
+        Args:
+            email (str): The address.
+
+        Returns:
+            bool: True if the address is valid, False otherwise.
+        """
+        return self.check(email) is None
+
+    def validate_many(self, emails):
+        """
+        Validates many addresses. Their syntax is checked first, then each
+        distinct domain is looked up once, several at a time.
+
+        Args:
+            emails (iterable): The addresses.
+
+        Returns:
+            dict: The reason each address is invalid, or None if it is
+            valid, as {email: error}.
+        """
+        errors = {}
+        domains = {}
+
+        for email in emails:
+            try:
+                parsed = self.parse(email)
+            except (EmailNotValidError, TypeError) as e:
+                errors[email] = str(e)
+                continue
+            errors[email] = None
+            domains.setdefault((parsed.ascii_domain, parsed.domain),
+                               []).append(email)
+        if self.offline() or not domains:
+            return errors
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda domain: self.lookup(*domain),
+                                   domains)
+            for domain, error in zip(list(domains), results):
+                for email in domains[domain]:
+                    errors[email] = error
+        return errors
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self.lock:
+            self.cache.clear()
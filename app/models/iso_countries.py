@@ -0,0 +1,213 @@
+import bisect
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import namedtuple
+from types import MappingProxyType
+
+TABLE_FILE = os.path.join(os.path.dirname(__file__), 'iso_countries.json')
+WORD = re.compile(r'\w+')
+
+IsoCountry = namedtuple('IsoCountry', ['alpha_2', 'alpha_3', 'numeric',
+                                       'name', 'official_name',
+                                       'common_name'])
+
+
+def normalize(text):
+    """
+    Reduces a country name to the form it is looked up by: without
+    accents, casefolded, its words separated by single spaces.
+
+    Args:
+        text (str): The name.
+
+    Returns:
+        str: The normalized name.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(WORD.findall(text.casefold()))
+
+
+class CountryTable:
+    """
+    CountryTable is a frozen table of the ISO 3166-1 countries, resolving
+    names, official and common names, and alpha-2, alpha-3 and numeric
+    codes without querying pycountry.
+
+    The table is built once, from the pre-serialized TABLE_FILE when it
+    exists, so a process never loads the pycountry database; run this
+    module to regenerate the file from pycountry.
+
+    Attributes:
+        countries (tuple): The countries, as IsoCountry tuples sorted by
+        alpha-2 code.
+        codes (mappingproxy): The country of each code, upper-cased.
+        names (mappingproxy): The country of each normalized name.
+        prefixes (tuple): The sorted (normalized name, position) pairs
+        searched by prefix.
+        encoded (bytes): The JSON list of the countries, served as is.
+
+    Methods:
+        load(path=TABLE_FILE):
+            Builds the table from the pre-serialized file or pycountry.
+
+        from_pycountry():
+            Builds the table from the pycountry database.
+
+        by_code(code):
+            Retrieves a country by code.
+
+        normalize_code(code):
+            Converts a code to the alpha-2 code of its country.
+
+        search(prefix, limit=10):
+            Retrieves the countries with a name starting with a prefix.
+
+        resolve(text):
+            Retrieves the country designated by a code or a name.
+    """
+
+    def __init__(self, countries):
+        self.countries = tuple(sorted(
+            (IsoCountry(*country) for country in countries),
+            key=lambda country: country.alpha_2))
+        codes = {}
+        names = {}
+        prefixes = set()
+
+        for position, country in enumerate(self.countries):
+            for code in country[:3]:
+                codes[code.upper()] = country
+            for name in country[3:]:
+                if name:
+                    key = normalize(name)
+                    names.setdefault(key, country)
+                    prefixes.add((key, position))
+        self.codes = MappingProxyType(codes)
+        self.names = MappingProxyType(names)
+        self.prefixes = tuple(sorted(prefixes))
+        self.encoded = json.dumps([country._asdict()
+                                   for country in self.countries],
+                                  separators=(',', ':')).encode()
+
+    @classmethod
+    def load(cls, path=TABLE_FILE):
+        """
+        Builds the table from the pre-serialized file, or from pycountry
+        when the file is missing.
+
+        Args:
+            path (str, optional): The path to the pre-serialized file.
+            Defaults to TABLE_FILE.
+
+        Returns:
+            CountryTable: The table.
+        """
+        try:
+            with open(path, encoding='utf-8') as file:
+                return cls(json.load(file))
+        except FileNotFoundError:
+            return cls.from_pycountry()
+
+    @classmethod
+    def from_pycountry(cls):
+        """
+        Builds the table from the pycountry database.
+
+        Returns:
+            CountryTable: The table.
+        """
+        import pycountry
+
+        return cls([(country.alpha_2, country.alpha_3, country.numeric,
+                     country.name, getattr(country, 'official_name', None),
+                     getattr(country, 'common_name', None))
+                    for country in pycountry.countries])
+
+    def by_code(self, code):
+        """
+        Retrieves a country by its alpha-2, alpha-3 or numeric code, in
+        any case.
+
+        Args:
+            code (str): The code.
+
+        Returns:
+            IsoCountry: The country, or None if the code is unknown.
+        """
+        return self.codes.get(code.strip().upper())
+
+    def normalize_code(self, code):
+        """
+        Converts a code to the alpha-2 code of its country.
+
+        Args:
+            code (str): The alpha-2, alpha-3 or numeric code, in any case.
+
+        Returns:
+            str: The alpha-2 code, or the code unchanged if it is unknown.
+        """
+        country = self.by_code(code)
+        return country.alpha_2 if country is not None else code
+
+    def search(self, prefix, limit=10):
+        """
+        Retrieves the countries with a name, official name or common name
+        starting with a prefix, ignoring case and accents.
+
+        Args:
+            prefix (str): The prefix.
+            limit (int, optional): The maximum number of countries.
+            Defaults to 10.
+
+        Returns:
+            list: The countries, ordered by matching name.
+        """
+        key = normalize(prefix)
+        found = {}
+
+        if not key:
+            return []
+        start = bisect.bisect_left(self.prefixes, (key,))
+        for name, position in self.prefixes[start:]:
+            if not name.startswith(key) or len(found) == limit:
+                break
+            found.setdefault(position, self.countries[position])
+        return list(found.values())
+
+    def resolve(self, text):
+        """
+        Retrieves the country designated by a code or a name. The name
+        may differ in case and accents, or be a prefix of a single
+        country's name.
+
+        Args:
+            text (str): The code or name.
+
+        Returns:
+            IsoCountry: The country, or None if the text is unknown or
+            ambiguous.
+        """
+        country = self.by_code(text) or self.names.get(normalize(text))
+
+        if country is not None:
+            return country
+        matches = self.search(text, limit=2)
+        return matches[0] if len(matches) == 1 else None
+
+
+ISO_COUNTRIES = CountryTable.load()
+
+
+if __name__ == '__main__':
+    # Regenerates the pre-serialized table: python -m models.iso_countries
+    table = CountryTable.from_pycountry()
+    with open(TABLE_FILE, 'w', encoding='utf-8') as file:
+        json.dump([list(country) for country in table.countries], file,
+                  ensure_ascii=False, separators=(',', ':'))
+        file.write('\n')
+    print(f"Wrote {len(table.countries)} countries to {TABLE_FILE}",
+          file=sys.stderr)
@@ -24,11 +24,21 @@ class Place(BaseModel):
     Methods:
         from_dict(data, data_manager): Creates a Place instance from a
         dictionary.
+        hydrate(data, data_manager): Rebuilds a persisted Place without
+        re-validating it.
+        check_attributes(...): Checks that the place attributes are
+        present and within range.
+        validate(): Checks the place's fields.
         to_dict(): Converts the Place instance to a dictionary.
         add_amenity(amenity_id): Adds an amenity to the place.
         remove_amenity(amenity_id): Removes an amenity from the place.
     """
 
+    __slots__ = ('_name', '_description', '_address', '_city_id',
+                 '_latitude', '_longitude', '_host_id', '_num_rooms',
+                 '_num_bathrooms', '_price_per_night', '_max_guests',
+                 '_amenities')
+
     def __init__(self, name, description, address, city_id, latitude,
                  longitude, host_id, num_rooms, num_bathrooms,
                  price_per_night, max_guests, amenities=None,
@@ -58,29 +68,9 @@ class Place(BaseModel):
         """
         super().__init__()
 
-        if not all([name, description, address, city_id, latitude,
-                    longitude, host_id, num_rooms, num_bathrooms,
-                    price_per_night, max_guests]):
-            raise ValueError("All fields are required!")
-        if not -90 <= latitude <= 90:
-            raise ValueError("Latitude must be between -90 and 90 degrees")
-        if not -180 <= longitude <= 180:
-            raise ValueError("Longitude must be between -180 and 180 degrees")
-        if not 0 <= num_rooms <= 100:
-            raise ValueError(
-                "Number of rooms must be a positive integer" +
-                "between 0 and 100")
-        if not 0 <= num_bathrooms <= 100:
-            raise ValueError(
-                "Number of bathrooms must be a positive integer" +
-                "between 0 and 100")
-        if not 0 <= price_per_night <= 10000:
-            raise ValueError(
-                "Price per night must be a positive value" +
-                " between 0 and 10000")
-        if not 1 <= max_guests <= 100:
-            raise ValueError(
-                "Max guests must be a positive integer between 1 and 100")
+        self.check_attributes(name, description, address, city_id, latitude,
+                              longitude, host_id, num_rooms, num_bathrooms,
+                              price_per_night, max_guests)
         if data_manager and \
                 data_manager.place_exists_with_attributes(name, address,
                                                           city_id,
@@ -138,6 +128,84 @@ class Place(BaseModel):
         place.updated_at = datetime.fromisoformat(data['updated_at'])
         return place
 
+    @staticmethod
+    def hydrate(data, data_manager):
+        """
+        Rebuilds a persisted Place from a dictionary without running the
+        constructor, skipping field validation and the uniqueness check.
+
+        Args:
+            data (dict): The dictionary containing place data.
+            data_manager (DataManager): The data manager instance for
+            data persistence.
+
+        Returns:
+            Place: The rebuilt Place instance.
+        """
+        place = Place.new_hydrated(data['place_id'], data['created_at'],
+                                   data['updated_at'])
+        place._name = data['place_name']
+        place._description = data['description']
+        place._address = data['address']
+        place._city_id = data['city_id']
+        place._latitude = data['latitude']
+        place._longitude = data['longitude']
+        place._host_id = data['host_id']
+        place._num_rooms = data['num_rooms']
+        place._num_bathrooms = data['num_bathrooms']
+        place._price_per_night = data['price_per_night']
+        place._max_guests = data['max_guests']
+        place._amenities = data.get('amenities') or []
+        place.data_manager = data_manager
+        return place
+
+    @staticmethod
+    def check_attributes(name, description, address, city_id, latitude,
+                         longitude, host_id, num_rooms, num_bathrooms,
+                         price_per_night, max_guests):
+        """
+        Checks that the place attributes are present and within range.
+
+        Raises:
+            ValueError: If any field is missing or has invalid values.
+        """
+        if not all([name, description, address, city_id, latitude,
+                    longitude, host_id, num_rooms, num_bathrooms,
+                    price_per_night, max_guests]):
+            raise ValueError("All fields are required!")
+        if not -90 <= latitude <= 90:
+            raise ValueError("Latitude must be between -90 and 90 degrees")
+        if not -180 <= longitude <= 180:
+            raise ValueError("Longitude must be between -180 and 180 degrees")
+        if not 0 <= num_rooms <= 100:
+            raise ValueError(
+                "Number of rooms must be a positive integer" +
+                "between 0 and 100")
+        if not 0 <= num_bathrooms <= 100:
+            raise ValueError(
+                "Number of bathrooms must be a positive integer" +
+                "between 0 and 100")
+        if not 0 <= price_per_night <= 10000:
+            raise ValueError(
+                "Price per night must be a positive value" +
+                " between 0 and 10000")
+        if not 1 <= max_guests <= 100:
+            raise ValueError(
+                "Max guests must be a positive integer between 1 and 100")
+
+    def validate(self):
+        """
+        Checks the place's fields, as the constructor does.
+
+        Raises:
+            ValueError: If any field is missing or has invalid values.
+        """
+        self.check_attributes(self._name, self._description, self._address,
+                              self._city_id, self._latitude, self._longitude,
+                              self._host_id, self._num_rooms,
+                              self._num_bathrooms, self._price_per_night,
+                              self._max_guests)
+
     @property
     def name(self):
         """str: Gets the name of the place."""
@@ -151,6 +219,7 @@ class Place(BaseModel):
         Args:
             value (str): The new name of the place.
         """
+        self.before_change()
         self._name = value
         self.save()
 
@@ -167,6 +236,7 @@ class Place(BaseModel):
         Args:
             value (str): The new description of the place.
         """
+        self.before_change()
         self._description = value
         self.save()
 
@@ -183,6 +253,7 @@ class Place(BaseModel):
         Args:
             value (str): The new address of the place.
         """
+        self.before_change()
         self._address = value
         self.save()
 
@@ -199,6 +270,7 @@ class Place(BaseModel):
         Args:
             value (str): The new city ID.
         """
+        self.before_change()
         self._city_id = value
         self.save()
 
@@ -220,6 +292,7 @@ class Place(BaseModel):
         """
         if not -90 <= value <= 90:
             raise ValueError("Latitude must be between -90 and 90 degrees")
+        self.before_change()
         self._latitude = value
         self.save()
 
@@ -241,6 +314,7 @@ class Place(BaseModel):
         """
         if not -180 <= value <= 180:
             raise ValueError("Longitude must be between -180 and 180 degrees")
+        self.before_change()
         self._longitude = value
         self.save()
 
@@ -257,6 +331,7 @@ class Place(BaseModel):
         Args:
             value (str): The new host ID.
         """
+        self.before_change()
         self._host_id = value
         self.save()
 
@@ -281,6 +356,7 @@ class Place(BaseModel):
             raise ValueError(
                 "Number of rooms must be a positive integer between" +
                 "0 and 100")
+        self.before_change()
         self._num_rooms = value
         self.save()
 
@@ -305,6 +381,7 @@ class Place(BaseModel):
             raise ValueError(
                 "Number of bathrooms must be a positive integer between 0" +
                 "and 100")
+        self.before_change()
         self._num_bathrooms = value
         self.save()
 
@@ -329,6 +406,7 @@ class Place(BaseModel):
             raise ValueError(
                 "Price per night must be a positive integer between 0" +
                 "and 10000")
+        self.before_change()
         self._price_per_night = value
         self.save()
 
@@ -353,6 +431,7 @@ class Place(BaseModel):
             raise ValueError(
                 "Max guests must be a positive integer between 1" +
                 "and 100")
+        self.before_change()
         self._max_guests = value
         self.save()
 
@@ -369,6 +448,7 @@ class Place(BaseModel):
         Args:
             value (list): The list of amenities to set.
         """
+        self.before_change()
         self._amenities = value
         self.save()
 
@@ -380,6 +460,7 @@ class Place(BaseModel):
             amenity_id (int): The identifier of the amenity to add.
         """
         if amenity_id not in self._amenities:
+            self.before_change()
             self._amenities.append(amenity_id)
             self.save()
 
@@ -391,6 +472,7 @@ class Place(BaseModel):
             amenity_id (int): The identifier of the amenity to remove.
         """
         if amenity_id in self._amenities:
+            self.before_change()
             self._amenities.remove(amenity_id)
             self.save()
 
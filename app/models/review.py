@@ -16,9 +16,14 @@ class Review(BaseModel):
         Methods:
             from_dict(data, data_manager): Creates a Review instance from a
             dictionary.
+            hydrate(data, data_manager): Rebuilds a persisted Review
+            without re-validating it.
+            validate(): Checks the review's fields.
             to_dict(): Converts the Review instance to a dictionary.
     """
 
+    __slots__ = ('_place_id', '_user_id', '_rating', '_text')
+
     def __init__(self, place_id, user_id, rating, text, data_manager=None):
         """
         Initializes a new Review instance.
@@ -84,6 +89,44 @@ class Review(BaseModel):
         review.updated_at = datetime.fromisoformat(data['updated_at'])
         return review
 
+    @staticmethod
+    def hydrate(data, data_manager):
+        """
+        Rebuilds a persisted Review from a dictionary without running the
+        constructor, skipping field validation and the uniqueness check.
+
+        Args:
+            data (dict): The dictionary containing review data.
+            data_manager (DataManager): The data manager instance for data
+            persistence.
+
+        Returns:
+            Review: The rebuilt Review instance.
+        """
+        review = Review.new_hydrated(data['review_id'], data['created_at'],
+                                     data['updated_at'])
+        review._place_id = data['place_id']
+        review._user_id = data['user_id']
+        review._rating = int(data['rating'])
+        review._text = data['text']
+        review.data_manager = data_manager
+        return review
+
+    def validate(self):
+        """
+        Checks the review's fields, as the constructor does.
+
+        Raises:
+            ValueError: If any field is missing or if the rating is not an
+            integer between 1 and 5.
+        """
+        if not all([self._place_id, self._user_id, self._rating,
+                    self._text]):
+            raise ValueError("All fields are required!")
+        if not isinstance(self._rating, int) or \
+                not 1 <= self._rating <= 5:
+            raise ValueError("Rating must be between 1 and 5")
+
     @property
     def place_id(self):
         """ Gets the ID of the place being reviewed."""
@@ -113,6 +156,7 @@ class Review(BaseModel):
         value = int(value)
         if not 1 <= value <= 5:
             raise ValueError("Rating must be between 1 and 5")
+        self.before_change()
         self._rating = value
         self.updated_at = datetime.now()
         self.save()
@@ -135,6 +179,7 @@ class Review(BaseModel):
         """
         if not value:
             raise ValueError("Text cannot be empty")
+        self.before_change()
         self._text = value
         self.updated_at = datetime.now()
         self.save()
@@ -1,5 +1,5 @@
-from email_validator import validate_email, EmailNotValidError
 from models.base_model import BaseModel
+from models.email_validation import EmailValidator
 from datetime import datetime
 
 
@@ -14,14 +14,25 @@ class User(BaseModel):
             last_name (str): User's last name.
             data_manager (DataManager): Instance to manage data
             persistence.
+            email_validator (EmailValidator): The engine checking email
+            addresses, shared by every user.
 
         Methods:
             from_dict(data, data_manager): Creates a User instance
             from a dictionary.
+            hydrate(data, data_manager): Rebuilds a persisted User
+            without re-validating it.
+            validate(): Checks the user's fields.
             is_valid_email_format(email): Validates the email format.
+            validate_emails(emails): Validates many email addresses at
+            once.
             to_dict(): Converts the User instance to a dictionary.
     """
 
+    __slots__ = ('_email', '_first_name', '_last_name')
+
+    email_validator = EmailValidator()
+
     def __init__(self, email, first_name, last_name, data_manager):
         """
         Initializes a new User instance.
@@ -78,10 +89,50 @@ class User(BaseModel):
         user.updated_at = datetime.fromisoformat(data['updated_at'])
         return user
 
+    @staticmethod
+    def hydrate(data, data_manager):
+        """
+        Rebuilds a persisted User from a dictionary without running the
+        constructor, skipping email validation and the uniqueness check.
+
+        Args:
+            data (dict): The dictionary containing user data.
+            data_manager (DataManager): The data manager instance
+            for data persistence.
+
+        Returns:
+            User: The rebuilt User instance.
+        """
+        user = User.new_hydrated(data['user_id'], data['created_at'],
+                                 data['updated_at'])
+        user._email = data['email']
+        user._first_name = data['first_name']
+        user._last_name = data['last_name']
+        user.data_manager = data_manager
+        return user
+
+    def validate(self):
+        """
+        Checks the user's fields, as the constructor does.
+
+        Raises:
+            ValueError: If email is invalid or if first name or last name
+            is missing.
+        """
+        if not self._email:
+            raise ValueError("Email is required!")
+        if not self.is_valid_email_format(self._email):
+            raise ValueError("Invalid email format!")
+        if not self._first_name:
+            raise ValueError("First name is required!")
+        if not self._last_name:
+            raise ValueError("Last name is required!")
+
     @staticmethod
     def is_valid_email_format(email):
         """
-        Validates the email format.
+        Validates the email format and, unless the validator is offline,
+        that its domain accepts email.
 
         Args:
             email (str): The email address to validate.
@@ -89,11 +140,21 @@ class User(BaseModel):
         Returns:
             bool: True if the email format is valid, False otherwise.
         """
-        try:
-            validate_email(email)
-            return True
-        except EmailNotValidError:
-            return False
+        return User.email_validator.is_valid(email)
+
+    @staticmethod
+    def validate_emails(emails):
+        """
+        Validates many email addresses, looking up each domain once.
+
+        Args:
+            emails (iterable): The email addresses to validate.
+
+        Returns:
+            dict: The reason each address is invalid, or None if it is
+            valid, as {email: error}.
+        """
+        return User.email_validator.validate_many(emails)
 
     @property
     def email(self):
@@ -118,6 +179,7 @@ class User(BaseModel):
         Args:
             value (str): The new first name.
         """
+        self.before_change()
         self._first_name = value
         self.updated_at = datetime.now()
         self.save()
@@ -130,6 +192,7 @@ class User(BaseModel):
         Args:
             value (str): The new last name.
         """
+        self.before_change()
         self._last_name = value
         self.updated_at = datetime.now()
         self.save()
@@ -147,6 +210,7 @@ class User(BaseModel):
         """
         if not self.is_valid_email_format(value):
             raise ValueError("Invalid email format!")
+        self.before_change()
         self._email = value
         self.updated_at = datetime.now()
         self.save()
@@ -0,0 +1,436 @@
+import bisect
+
+PRIOR_MEAN = 3.0
+PRIOR_WEIGHT = 5
+
+
+def rating_summary(histogram):
+    """
+    Summarizes a rating histogram.
+
+    Args:
+        histogram (list): The number of ratings of each value, from 1 up.
+
+    Returns:
+        dict: The count, sum and average of the ratings, None when there
+        are none, and the histogram as {rating: count}.
+    """
+    count = sum(histogram)
+    total = sum(rating * number
+                for rating, number in enumerate(histogram, 1))
+    return {
+        'count': count,
+        'sum': total,
+        'average': total / count if count else None,
+        'histogram': {rating: number
+                      for rating, number in enumerate(histogram, 1)},
+    }
+
+
+class RatingAggregate:
+    """
+    RatingAggregate keeps a running count, sum and histogram of the ratings
+    of each group of entities, such as the reviews of a place, so that
+    they are read without visiting the entities.
+
+    Adding, re-rating, moving or removing an entity updates the histogram
+    of its group in constant time, and the count, sum and average are
+    derived from the histogram when read.
+
+    Attributes:
+        group (callable): Function returning the group of an entity.
+        rating (callable): Function returning the rating of an entity, an
+        integer between 1 and scale.
+        scale (int): The highest rating.
+        unique (bool): Always False; an aggregate enforces nothing.
+        groups (dict): The histogram of each non-empty group, as
+        {group: [number of 1 ratings, ..., number of scale ratings]}.
+        keys (dict): The group and rating each entity contributes, by ID.
+
+    Methods:
+        add(entity):
+            Adds the rating of an entity, replacing its previous one.
+
+        discard(entity_id):
+            Removes the rating of an entity.
+
+        summary(group):
+            Retrieves the count, sum, average and histogram of a group.
+
+        clear():
+            Removes every rating.
+    """
+
+    unique = False
+
+    def __init__(self, group, rating, scale=5):
+        self.group = group
+        self.rating = rating
+        self.scale = scale
+        self.groups = {}
+        self.keys = {}
+
+    def contribute(self, key, sign):
+        """
+        Adds or subtracts a rating to the histogram of its group.
+
+        Args:
+            key (tuple): The group and the rating.
+            sign (int): 1 to add the rating, -1 to remove it.
+        """
+        group, rating = key
+        histogram = self.groups.get(group)
+
+        if histogram is None:
+            histogram = self.groups[group] = [0] * self.scale
+        histogram[rating - 1] += sign
+        if not any(histogram):
+            del self.groups[group]
+
+    def add(self, entity):
+        """
+        Adds the rating of an entity, replacing its previous one.
+
+        Args:
+            entity (object): The entity.
+
+        Raises:
+            ValueError: If the rating is outside the scale.
+        """
+        key = (self.group(entity), self.rating(entity))
+        previous = self.keys.get(entity.id)
+
+        if previous == key:
+            return
+        if not 1 <= key[1] <= self.scale:
+            raise ValueError(f"Rating must be between 1 and {self.scale}")
+        if previous is not None:
+            self.contribute(previous, -1)
+        self.contribute(key, 1)
+        self.keys[entity.id] = key
+
+    def discard(self, entity_id):
+        """
+        Removes the rating of an entity. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity.
+        """
+        key = self.keys.pop(entity_id, None)
+
+        if key is not None:
+            self.contribute(key, -1)
+
+    def summary(self, group):
+        """
+        Retrieves the count, sum, average and histogram of the ratings of
+        a group.
+
+        Args:
+            group: The group.
+
+        Returns:
+            dict: The summary, as returned by rating_summary(), with a
+            count of 0 for an unknown group.
+        """
+        return rating_summary(self.groups.get(group, [0] * self.scale))
+
+    def clear(self):
+        """
+        Removes every rating.
+        """
+        self.groups.clear()
+        self.keys.clear()
+
+
+def bayesian_average(count, total, prior_mean=PRIOR_MEAN,
+                     prior_weight=PRIOR_WEIGHT):
+    """
+    Computes the average of ratings pulled towards a prior, so that a few
+    enthusiastic ratings do not outrank many good ones.
+
+    Args:
+        count (int): The number of ratings.
+        total (int): The sum of the ratings.
+        prior_mean (float, optional): The rating assumed before any is
+        given. Defaults to PRIOR_MEAN.
+        prior_weight (int, optional): The number of ratings the prior is
+        worth. Defaults to PRIOR_WEIGHT.
+
+    Returns:
+        float: The Bayesian average.
+    """
+    return (prior_weight * prior_mean + total) / (prior_weight + count)
+
+
+class Leaderboard:
+    """
+    Leaderboard ranks groups of entities, such as the reviews of each
+    place, by the Bayesian average of their ratings.
+
+    The groups are kept in a list sorted by descending score. Adding,
+    re-rating or removing an entity moves its group with two binary
+    searches, so the best groups are read from the head of the list
+    without computing any score. The prior is fixed, so that a new rating
+    never changes the score of the other groups.
+
+    Attributes:
+        group (callable): Function returning the group of an entity.
+        rating (callable): Function returning the rating of an entity.
+        prior_mean (float): The rating assumed before any is given.
+        prior_weight (int): The number of ratings the prior is worth.
+        unique (bool): Always False; a leaderboard enforces nothing.
+        groups (dict): The number and sum of the ratings of each group, as
+        {group: [count, sum]}.
+        keys (dict): The group and rating each entity contributes, by ID.
+        ranking (list): The (-score, group) pairs, best first.
+
+    Methods:
+        add(entity):
+            Adds the rating of an entity, replacing its previous one.
+
+        discard(entity_id):
+            Removes the rating of an entity.
+
+        top():
+            Iterates over the groups, best first.
+
+        clear():
+            Removes every rating.
+    """
+
+    unique = False
+
+    def __init__(self, group, rating, prior_mean=PRIOR_MEAN,
+                 prior_weight=PRIOR_WEIGHT):
+        self.group = group
+        self.rating = rating
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.groups = {}
+        self.keys = {}
+        self.ranking = []
+
+    def entry(self, group):
+        """
+        Computes the ranking entry of a group.
+
+        Args:
+            group: The group.
+
+        Returns:
+            tuple: The (-score, group) pair, or None if the group is empty.
+        """
+        aggregate = self.groups.get(group)
+
+        if aggregate is None:
+            return None
+        return (-bayesian_average(aggregate[0], aggregate[1],
+                                  self.prior_mean, self.prior_weight), group)
+
+    def contribute(self, key, sign):
+        """
+        Adds or subtracts a rating to its group and moves the group in
+        the ranking.
+
+        Args:
+            key (tuple): The group and the rating.
+            sign (int): 1 to add the rating, -1 to remove it.
+        """
+        group, rating = key
+        entry = self.entry(group)
+
+        if entry is not None:
+            del self.ranking[bisect.bisect_left(self.ranking, entry)]
+        aggregate = self.groups.setdefault(group, [0, 0])
+        aggregate[0] += sign
+        aggregate[1] += sign * rating
+        if not aggregate[0]:
+            del self.groups[group]
+            return
+        bisect.insort(self.ranking, self.entry(group))
+
+    def add(self, entity):
+        """
+        Adds the rating of an entity, replacing its previous one.
+
+        Args:
+            entity (object): The entity.
+        """
+        key = (self.group(entity), self.rating(entity))
+        previous = self.keys.get(entity.id)
+
+        if previous == key:
+            return
+        if previous is not None:
+            self.contribute(previous, -1)
+        self.contribute(key, 1)
+        self.keys[entity.id] = key
+
+    def discard(self, entity_id):
+        """
+        Removes the rating of an entity. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity.
+        """
+        key = self.keys.pop(entity_id, None)
+
+        if key is not None:
+            self.contribute(key, -1)
+
+    def top(self):
+        """
+        Iterates over the groups, best first. The ranking must not change
+        during the iteration.
+
+        Yields:
+            tuple: The score and the group.
+        """
+        for score, group in self.ranking:
+            yield -score, group
+
+    def clear(self):
+        """
+        Removes every rating.
+        """
+        self.groups.clear()
+        self.keys.clear()
+        self.ranking.clear()
+
+
+class TimeBuckets:
+    """
+    TimeBuckets counts the entities of each group, such as the reviews of
+    each place, per hour of their creation date, so that the most active
+    groups over a recent window are found by visiting the buckets of that
+    window only.
+
+    Attributes:
+        group (callable): Function returning the group of an entity.
+        time (callable): Function returning the creation date of an
+        entity.
+        unique (bool): Always False; counters enforce nothing.
+        buckets (dict): The counts of each non-empty hour, as
+        {hour: {group: count}}, hours being counted since the epoch.
+        keys (dict): The hour and group each entity is counted in, by ID.
+
+    Methods:
+        add(entity):
+            Counts an entity, moving it if it was already counted.
+
+        discard(entity_id):
+            Stops counting an entity.
+
+        counts(start, end):
+            Totals the counts of each group between two dates.
+
+        top(start, end):
+            Ranks the groups by their count between two dates.
+
+        clear():
+            Removes every count.
+    """
+
+    unique = False
+
+    def __init__(self, group, time):
+        self.group = group
+        self.time = time
+        self.buckets = {}
+        self.keys = {}
+
+    @staticmethod
+    def hour(moment):
+        """
+        Computes the bucket of a date.
+
+        Args:
+            moment (datetime): The date.
+
+        Returns:
+            int: The number of hours since the epoch.
+        """
+        return int(moment.timestamp() // 3600)
+
+    def add(self, entity):
+        """
+        Counts an entity, moving it if it was already counted.
+
+        Args:
+            entity (object): The entity.
+        """
+        key = (self.hour(self.time(entity)), self.group(entity))
+
+        if self.keys.get(entity.id) == key:
+            return
+        self.discard(entity.id)
+        hour, group = key
+        bucket = self.buckets.setdefault(hour, {})
+        bucket[group] = bucket.get(group, 0) + 1
+        self.keys[entity.id] = key
+
+    def discard(self, entity_id):
+        """
+        Stops counting an entity. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity.
+        """
+        key = self.keys.pop(entity_id, None)
+
+        if key is None:
+            return
+        hour, group = key
+        bucket = self.buckets[hour]
+        bucket[group] -= 1
+        if not bucket[group]:
+            del bucket[group]
+            if not bucket:
+                del self.buckets[hour]
+
+    def counts(self, start, end):
+        """
+        Totals the counts of each group between two dates, to the hour.
+
+        Args:
+            start (datetime): The start of the window.
+            end (datetime): The end of the window, included.
+
+        Returns:
+            dict: The number of entities of each group, as {group: count}.
+        """
+        first, last = self.hour(start), self.hour(end)
+        totals = {}
+
+        if last - first + 1 > len(self.buckets):
+            hours = [hour for hour in self.buckets if first <= hour <= last]
+        else:
+            hours = [hour for hour in range(first, last + 1)
+                     if hour in self.buckets]
+        for hour in hours:
+            for group, count in self.buckets[hour].items():
+                totals[group] = totals.get(group, 0) + count
+        return totals
+
+    def top(self, start, end):
+        """
+        Ranks the groups by their count between two dates, to the hour.
+
+        Args:
+            start (datetime): The start of the window.
+            end (datetime): The end of the window, included.
+
+        Returns:
+            list: The (count, group) pairs, highest count first.
+        """
+        return sorted(((count, group) for group, count
+                       in self.counts(start, end).items()),
+                      key=lambda item: (-item[0], item[1]))
+
+    def clear(self):
+        """
+        Removes every count.
+        """
+        self.buckets.clear()
+        self.keys.clear()
@@ -0,0 +1,181 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnStore:
+    """
+    ColumnStore keeps numeric attributes of the entities of a type in
+    contiguous float64 columns, one row per entity, so that range filters
+    are evaluated over whole columns instead of attribute by attribute.
+
+    With NumPy, a requirement of the application, the columns are NumPy
+    arrays grown by doubling and each predicate is a vectorized mask;
+    where NumPy is not installed they fall back to array('d') columns
+    scanned in a loop. Deleting an entity moves the
+    last row into its place, so the rows stay dense but are not kept in
+    insertion order.
+
+    The store is maintained like the other secondary indexes of a
+    DataManager, through add(), discard() and clear().
+
+    Attributes:
+        columns (dict): The function reading each column from an entity,
+        as {column_name: callable}.
+        unique (bool): Always False; a column store enforces nothing.
+        keys (dict): The row of each stored entity, by ID.
+        entities (list): The entity of each row.
+
+    Methods:
+        add(entity):
+            Stores the values of an entity, overwriting its row if it was
+            already stored.
+
+        discard(entity_id):
+            Removes the row of an entity.
+
+        select(ranges):
+            Retrieves the entities whose values fall within ranges.
+
+        clear():
+            Removes every row.
+    """
+
+    unique = False
+
+    def __init__(self, columns, use_numpy=None):
+        self.columns = dict(columns)
+        self.use_numpy = numpy is not None if use_numpy is None \
+            else use_numpy
+        self.keys = {}
+        self.entities = []
+        self.data = {name: self.new_column() for name in self.columns}
+
+    def __len__(self):
+        return len(self.entities)
+
+    def new_column(self, capacity=16):
+        """
+        Creates an empty column.
+
+        Args:
+            capacity (int, optional): The number of rows to allocate for
+            a NumPy column. Defaults to 16.
+
+        Returns:
+            The column.
+        """
+        if self.use_numpy:
+            return numpy.empty(capacity, dtype=numpy.float64)
+        return array('d')
+
+    def add(self, entity):
+        """
+        Stores the values of an entity, overwriting its row if it was
+        already stored.
+
+        Args:
+            entity (object): The entity to store.
+
+        Raises:
+            TypeError: If a column value is not a number.
+            ValueError: If a column value is not a number.
+        """
+        values = {name: float(read(entity))
+                  for name, read in self.columns.items()}
+        row = self.keys.get(entity.id)
+
+        if row is None:
+            row = len(self.entities)
+            self.entities.append(entity)
+            self.keys[entity.id] = row
+            if not self.use_numpy:
+                for name, value in values.items():
+                    self.data[name].append(value)
+                return
+            if row == len(next(iter(self.data.values()), ())):
+                self.grow()
+        else:
+            self.entities[row] = entity
+        for name, value in values.items():
+            self.data[name][row] = value
+
+    def grow(self):
+        """
+        Doubles the capacity of the NumPy columns.
+        """
+        for name, column in self.data.items():
+            grown = self.new_column(max(16, 2 * len(column)))
+            grown[:len(column)] = column
+            self.data[name] = grown
+
+    def discard(self, entity_id):
+        """
+        Removes the row of an entity, moving the last row into its place.
+        Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity to remove.
+        """
+        row = self.keys.pop(entity_id, None)
+
+        if row is None:
+            return
+        last = len(self.entities) - 1
+        if row != last:
+            moved = self.entities[last]
+            self.entities[row] = moved
+            self.keys[moved.id] = row
+            for column in self.data.values():
+                column[row] = column[last]
+        self.entities.pop()
+        if not self.use_numpy:
+            for column in self.data.values():
+                column.pop()
+
+    def select(self, ranges):
+        """
+        Retrieves the entities whose values fall within ranges.
+
+        Args:
+            ranges (dict): The inclusive bounds of each filtered column, as
+            {column_name: (low, high)}; either bound may be None.
+
+        Returns:
+            list: The matching entities, in row order.
+
+        Raises:
+            ValueError: If a column is not stored.
+        """
+        for name in ranges:
+            if name not in self.data:
+                raise ValueError(f"Unknown column: {name}")
+        count = len(self.entities)
+
+        if self.use_numpy:
+            mask = numpy.ones(count, dtype=bool)
+            for name, (low, high) in ranges.items():
+                column = self.data[name][:count]
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+            return [self.entities[row] for row in numpy.flatnonzero(mask)]
+        rows = range(count)
+        for name, (low, high) in ranges.items():
+            column = self.data[name]
+            rows = [row for row in rows
+                    if (low is None or column[row] >= low)
+                    and (high is None or column[row] <= high)]
+        return [self.entities[row] for row in rows]
+
+    def clear(self):
+        """
+        Removes every row.
+        """
+        self.keys.clear()
+        self.entities = []
+        self.data = {name: self.new_column() for name in self.columns}
@@ -1,6 +1,22 @@
+import gc
 import json
 import os
+import threading
+from contextlib import nullcontext
+from datetime import datetime
 from persistence.ipersistence_manager import IPersistenceManager
+from persistence.journal import Journal
+from persistence.file_lock import FileLock
+from persistence.flusher import Flusher
+from persistence.snapshot import Snapshot
+from persistence.rwlock import RWLock, read_locked, write_locked
+from persistence.indexes import HashIndex, OrderedIndex, creation_key
+from persistence.columns import ColumnStore
+from persistence.geo import GridIndex, TilePyramid
+from persistence.search import InvertedIndex
+from persistence.aggregates import Leaderboard, RatingAggregate, \
+    TimeBuckets
+from models.iso_countries import ISO_COUNTRIES
 
 
 class DataManager(IPersistenceManager):
@@ -10,24 +26,136 @@ class DataManager(IPersistenceManager):
 
     Attributes:
         storage (dict): A dictionary storing all entities by their type.
+        Assigning it rebuilds the secondary indexes.
         data_file (str): The path to the JSON file for persistence.
+        search_file (str): The path to the file saving the full-text
+        indexes, next to the JSON file.
+        indexes (dict): The secondary indexes of each entity type, as
+        {entity_type: {index_name: HashIndex}}.
+        journal (Journal): The write-ahead journal used in journaled mode,
+        or None when every mutation rewrites the JSON file. Its records
+        are fsynced unless the journal_fsync option is False.
+        checkpoint_interval (int): The number of journal records after
+        which the journal is folded into the JSON file.
+        verify_on_load (bool): Whether check_integrity() runs after the
+        persisted records are loaded.
+        lock (FileLock): The lock shared with the other processes using
+        the same data file in shared mode, or None.
+        flusher (Flusher): The background thread writing the mutations in
+        write-behind mode, or None when every mutation is written before
+        the request returns.
+        fragments (dict): The encoded JSON of each entity as of its last
+        snapshot, as {entity_type: {id: (entity, version, bytes)}}.
+        local (threading.local): The transaction state of each thread.
+        rwlock (RWLock): The lock letting threads read the storage
+        concurrently while writers get exclusive access.
+        versions (dict): A counter per entity type, bumped whenever an
+        entity of that type is stored, re-keyed or removed.
+        snapshots (dict): The last published list of each entity type, as
+        {entity_type: (version, tuple of entities)}.
 
     Methods:
+        locked(exclusive=True):
+            Returns a context manager holding the shared file lock.
+
         create_directory_if_not_exists():
             Ensures the directory for the data file exists.
 
         load_from_json():
             Loads entities from the JSON file into the storage.
 
-        dict_to_entity(entity_type, entity_data):
+        search_indexes():
+            Retrieves the full-text indexes, with their entity types.
+
+        load_search_indexes():
+            Offers the saved full-text indexes to the next indexing.
+
+        save_search_indexes():
+            Saves the full-text indexes next to the JSON file.
+
+        replay_journal():
+            Applies the journal records on top of the loaded storage.
+
+        apply_records(records):
+            Applies journal records to the storage.
+
+        refresh():
+            Applies the changes other processes made in shared mode.
+
+        catch_up():
+            Reads the journal records written by other processes.
+
+        reload():
+            Discards the storage and loads the persisted state again.
+
+        get_entity_class(entity_type):
+            Retrieves the model class of an entity type.
+
+        dict_to_entity(entity_type, entity_data, trusted=False):
             Converts a dictionary to an entity object.
 
+        check_integrity():
+            Drops invalid and duplicate entities in a single pass.
+
+        create_indexes():
+            Creates the secondary indexes used by the lookup methods.
+
+        rebuild_indexes():
+            Rebuilds every secondary index from the storage.
+
+        index(entity):
+            Adds or re-keys an entity in the indexes of its type.
+
+        index_loaded(entity):
+            Indexes a persisted entity, undoing it if an index rejects it.
+
+        unindex(entity_type, entity_id):
+            Removes an entity from the indexes of its type.
+
+        before_change(entity):
+            Records a stored entity before a setter changes it.
+
+        reindex(entity):
+            Re-keys a stored entity after its attributes changed.
+
+        touch(entity_type):
+            Marks the published snapshot of an entity type as outdated.
+
         save(entity):
             Saves an entity to the storage and updates the JSON file.
 
         get(entity_id, entity_type):
             Retrieves an entity by its ID and type from the storage.
 
+        get_all(entity_type):
+            Retrieves every entity of a type from the storage.
+
+        snapshot(entity_type):
+            Retrieves an immutable list of the entities of a type.
+
+        page(entity_type, limit, after=None):
+            Retrieves a page of entities of a type, by creation date.
+
+        sorted_page(entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+            Retrieves a page of entities of a type, sorted by an attribute.
+
+        select(entity_type, ranges):
+            Retrieves the entities of a type whose numeric attributes fall
+            within ranges.
+
+        within(entity_type, south, west, north, east):
+            Retrieves the entities of a type inside a bounding box.
+
+        nearby(entity_type, latitude, longitude, radius_km):
+            Retrieves the entities of a type within a distance of a point.
+
+        get_place_tile(z, x, y):
+            Retrieves the place count and average price of a map tile.
+
+        search_places(query, limit=10):
+            Retrieves the places best matching a full-text query.
+
         get_by_email(email):
             Retrieves a User entity by its email.
 
@@ -52,22 +180,149 @@ class DataManager(IPersistenceManager):
         get_reviews_by_user_id(user_id):
             Retrieves all Review entities for a given user.
 
+        get_place_rating(place_id):
+            Retrieves the rating summary of a place.
+
+        get_user_rating(user_id):
+            Retrieves the rating summary of the reviews of a user.
+
+        top_places(limit=10, city_id=None, places=None):
+            Retrieves the places with the best Bayesian average rating.
+
+        trending_places(window, limit=10, now=None, places=None):
+            Retrieves the places reviewed the most over a recent window.
+
         update(entity):
             Updates an existing entity in the storage and JSON file.
 
+        persist(op, entity_type, entity_id, entity=None):
+            Persists a single mutation, or buffers it in a transaction.
+
+        persist_many(operations):
+            Persists a group of mutations with a single write.
+
+        write_pending():
+            Writes the mutations buffered in write-behind mode.
+
+        flush():
+            Waits until every buffered mutation is written.
+
+        close():
+            Flushes the buffered mutations, saves the full-text indexes
+            and closes the journal.
+
+        in_transaction():
+            Tells if the calling thread is inside a transaction.
+
+        begin(entity_types=()):
+            Starts buffering the mutations of the calling thread.
+
+        remember(entity_type, entity_id):
+            Records an entity the first time the transaction touches it.
+
+        check_unique(operations):
+            Checks the unique indexes for the entities of some mutations.
+
+        prepare():
+            Checks the unique indexes touched by the transaction.
+
+        commit(end=True):
+            Persists the buffered mutations with a single write.
+
+        end():
+            Ends a transaction committed with end=False.
+
+        rollback():
+            Restores the entities touched by the transaction.
+
         delete(entity_id, entity_type):
             Deletes an entity by its ID and type from the storage
             and JSON file.
 
+        encode_storage():
+            Encodes the storage, re-encoding only the changed entities.
+
         save_to_json(file_path=None):
             Saves the current state of the storage to the JSON file.
+
+        checkpoint():
+            Folds the journal into the JSON file and truncates it.
     """
 
-    def __init__(self, data_file):
+    def __init__(self, data_file, journal=False, checkpoint_interval=1000,
+                 verify_on_load=False, shared=False, write_behind=False,
+                 flush_interval=1.0, flush_max_pending=100,
+                 journal_fsync=True):
+        if write_behind and shared:
+            raise ValueError("Write-behind is not supported in shared mode")
+        self.rwlock = RWLock()
+        self.versions = {}
+        self.snapshots = {}
+        self.indexes = self.create_indexes()
+        self.fragments = {}
         self.storage = {}
         self.data_file = data_file
+        self.search_file = data_file + '.search'
+        self.journal = Journal(data_file + '.journal', fsync=journal_fsync) \
+            if journal or shared else None
+        self.checkpoint_interval = checkpoint_interval
+        self.journal_records = 0
+        self.journal_offset = 0
+        self.journal_generation = None
+        self.journal_signature = None
+        self.verify_on_load = verify_on_load
         self.create_directory_if_not_exists()
-        self.load_from_json()
+        self.lock = FileLock(data_file + '.lock') if shared else None
+        self.pending_records = []
+        self.pending_lock = threading.Lock()
+        self.flusher = None
+        self.snapshot_stale = False
+        self.local = threading.local()
+
+        self.load_search_indexes()
+        with self.locked(exclusive=False):
+            self.load_from_json()
+            if self.journal:
+                self.replay_journal()
+        for _, _, index in self.search_indexes():
+            # Saved documents of entities that are gone are not needed
+            index.restore({})
+        if self.verify_on_load:
+            self.check_integrity()
+        if write_behind:
+            self.flusher = Flusher(self.write_pending, flush_interval,
+                                   flush_max_pending)
+
+    def locked(self, exclusive=True):
+        """
+        Returns a context manager holding the shared file lock, or doing
+        nothing when the data file is not shared between processes.
+
+        Args:
+            exclusive (bool, optional): Whether the lock is taken for
+            writing. Defaults to True.
+        """
+        if self.lock is None:
+            return nullcontext()
+        return self.lock.acquire(exclusive)
+
+    @property
+    def storage(self):
+        """dict: Gets the entities stored by type."""
+        return self._storage
+
+    @storage.setter
+    def storage(self, value):
+        """
+        Replaces the storage and rebuilds the secondary indexes.
+
+        Args:
+            value (dict): The new storage, as {entity_type: {id: entity}}.
+        """
+        self._storage = value
+        self.fragments = {}
+        self.snapshots = {}
+        self.rebuild_indexes()
 
     def create_directory_if_not_exists(self):
         """
@@ -82,39 +337,402 @@ class DataManager(IPersistenceManager):
     def load_from_json(self):
         """
         Loads entities from the JSON file into the storage.
-        Handles the conversion of dictionaries to entity objects.
+        Records were validated when they were saved, so they are hydrated
+        without running the model constructors; malformed records are
+        skipped. Set verify_on_load to re-check them in a single pass.
+
+        Raises:
+            ValueError: If the JSON file is truncated or fails its checksum.
         """
+        # The cyclic garbage collector would repeatedly walk the objects
+        # allocated by a bulk load while finding nothing to free
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
         try:
-            with open(self.data_file, 'r') as file:
-                data = json.load(file)
-                for entity_type, entities in data.items():
-                    self.storage[entity_type] = {}
-                    for entity_id, entity_data in entities.items():
-                        try:
-                            entity = self.dict_to_entity(
-                                entity_type, entity_data)
-                            self.storage[entity_type][entity_id] = entity
-                        except ValueError as e:
-                            print(f"Skipping invalid {entity_type}: {e}")
+            data = Snapshot(self.data_file).read()
+            for entity_type, entities in data.items():
+                self.storage[entity_type] = {}
+                self.touch(entity_type)
+                for index in self.indexes.get(entity_type, {}).values():
+                    index.clear()
+                hydrate = self.get_entity_class(entity_type).hydrate
+                for entity_id, entity_data in entities.items():
+                    try:
+                        entity = hydrate(entity_data, self)
+                        self.index_loaded(entity)
+                    except (KeyError, TypeError, ValueError) as e:
+                        print(f"Skipping invalid {entity_type}: {e}")
+                        continue
+                    self.storage[entity_type][entity_id] = entity
         except FileNotFoundError:
             self.storage = {}
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def search_indexes(self):
+        """
+        Retrieves the full-text indexes, with their entity types.
+
+        Returns:
+            list: The (entity_type, name, index) triples.
+        """
+        return [(entity_type, name, index)
+                for entity_type, indexes in self.indexes.items()
+                for name, index in indexes.items()
+                if isinstance(index, InvertedIndex)]
 
-    def dict_to_entity(self, entity_type, entity_data):
+    def load_search_indexes(self):
+        """
+        Offers the full-text indexes saved by save_search_indexes() to the
+        next indexing, so that loading the JSON file only tokenizes the
+        entities whose text changed since. A missing or damaged file only
+        means every entity is tokenized again.
+        """
+        try:
+            data = Snapshot(self.search_file).read()
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            print(f"Ignoring search indexes: {e}")
+            return
+        for entity_type, name, index in self.search_indexes():
+            index.restore(data.get(entity_type, {}).get(name, {}))
+
+    @read_locked
+    def save_search_indexes(self):
+        """
+        Saves the full-text indexes next to the JSON file. Nothing is
+        written while they are empty.
+        """
+        data = {}
+
+        for entity_type, name, index in self.search_indexes():
+            if index.keys:
+                data.setdefault(entity_type, {})[name] = index.dump()
+        if data or os.path.exists(self.search_file):
+            Snapshot(self.search_file).write_encoded(
+                json.dumps(data, separators=(',', ':')).encode())
+
+    def replay_journal(self):
+        """
+        Applies the journal records on top of the loaded storage, so that
+        mutations made since the last checkpoint are restored.
+        """
+        self.journal_signature = self.journal.signature()
+        self.journal_generation = self.journal.generation()
+        records, self.journal_offset = self.journal.read_from(0)
+        self.apply_records(records)
+        self.journal_records = len(records)
+
+    def apply_records(self, records):
+        """
+        Applies journal records to the storage.
+
+        Args:
+            records (list): The journal records, in the order they were
+            written.
+        """
+        for record in records:
+            entity_type, entity_id = record['type'], record['id']
+            entities = self.storage.setdefault(entity_type, {})
+            previous = entities.pop(entity_id, None)
+            self.unindex(entity_type, entity_id)
+
+            if record['op'] == 'delete':
+                continue
+            try:
+                entity = self.dict_to_entity(entity_type, record['data'],
+                                             trusted=True)
+                self.index_loaded(entity)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping invalid {entity_type}: {e}")
+                entity = previous
+                if entity is not None:
+                    self.index(entity)
+            if entity is not None:
+                entities[entity_id] = entity
+
+    def refresh(self):
+        """
+        Applies the changes other processes made to a shared data file.
+        Costs a single stat call when nothing changed; otherwise only the
+        new journal records are read, unless another process checkpointed,
+        in which case the snapshot is reloaded.
+        """
+        if self.lock is None \
+                or self.journal.signature() == self.journal_signature:
+            return
+        # The storage lock is always taken before the file lock
+        with self.rwlock.write(), self.lock.acquire(exclusive=False):
+            self.catch_up()
+
+    @write_locked
+    def catch_up(self):
+        """
+        Reads the journal records written by other processes since this
+        one last read the journal. Must be called with the lock held.
+        """
+        if self.journal.generation() != self.journal_generation:
+            self.reload()
+            return
+        records, self.journal_offset = self.journal.read_from(
+            self.journal_offset)
+        self.apply_records(records)
+        self.journal_records += len(records)
+        self.journal_signature = self.journal.signature()
+
+    @write_locked
+    def reload(self):
+        """
+        Discards the storage and loads the persisted state again, from the
+        JSON file and the journal.
+        """
+        if self.journal:
+            self.journal.close()
+        self.storage = {}
+        self.load_from_json()
+        if self.journal:
+            self.replay_journal()
+
+    @staticmethod
+    def get_entity_class(entity_type):
+        """
+        Retrieves the model class of an entity type.
+
+        Args:
+            entity_type (str): The type of the entity.
+
+        Returns:
+            type: The model class.
+        """
+        module = __import__('models.' + entity_type.lower(),
+                            fromlist=[entity_type])
+        return getattr(module, entity_type)
+
+    def dict_to_entity(self, entity_type, entity_data, trusted=False):
         """
         Converts a dictionary to an entity object.
 
         Args:
             entity_type (str): The type of the entity.
             entity_data (dict): The data of the entity.
+            trusted (bool, optional): Whether the data comes from a
+            persisted record, in which case the entity is hydrated without
+            validation or uniqueness checks. Defaults to False.
 
         Returns:
             object: The entity object.
         """
-        module = __import__('models.' + entity_type.lower(),
-                            fromlist=[entity_type])
-        entity_class = getattr(module, entity_type)
+        entity_class = self.get_entity_class(entity_type)
+
+        if trusted:
+            return entity_class.hydrate(entity_data, self)
         return entity_class.from_dict(entity_data, self)
 
+    @write_locked
+    def check_integrity(self):
+        """
+        Validates every stored entity and enforces the unique indexes in a
+        single pass, dropping invalid entities and all but the first entity
+        of each duplicate key.
+
+        Returns:
+            int: The number of entities dropped.
+        """
+        dropped = []
+
+        for entity_type, entities in self.storage.items():
+            for entity in entities.values():
+                try:
+                    entity.validate()
+                except ValueError as e:
+                    print(f"Skipping invalid {entity_type}: {e}")
+                    dropped.append((entity_type, entity.id))
+        for entity_type, indexes in self.indexes.items():
+            for name, index in indexes.items():
+                if not index.unique:
+                    continue
+                for entity in index.duplicates():
+                    print(f"Skipping duplicate {entity_type}: {name}")
+                    dropped.append((entity_type, entity.id))
+        for entity_type, entity_id in dropped:
+            if self.storage[entity_type].pop(entity_id, None) is not None:
+                self.unindex(entity_type, entity_id)
+        return len(set(dropped))
+
+    @staticmethod
+    def create_indexes():
+        """
+        Creates the secondary indexes used by the lookup methods, so that
+        uniqueness checks and lookups do not scan the storage. Every type
+        is also ordered by creation date for pagination.
+
+        Returns:
+            dict: The indexes, as {entity_type: {index_name: index}}.
+        """
+        indexes = {
+            'User': {
+                'email': HashIndex(lambda user: user._email, unique=True),
+            },
+            'Country': {
+                'code': HashIndex(lambda country: country._code),
+            },
+            'Place': {
+                'attributes': HashIndex(lambda place: (
+                    place._name, place._address, place._city_id,
+                    place._host_id, place._num_rooms, place._num_bathrooms,
+                    place._price_per_night, place._max_guests), unique=True),
+                'columns': ColumnStore({
+                    'price_per_night': lambda place: place._price_per_night,
+                    'max_guests': lambda place: place._max_guests,
+                    'num_rooms': lambda place: place._num_rooms,
+                    'num_bathrooms': lambda place: place._num_bathrooms,
+                    'latitude': lambda place: place._latitude,
+                    'longitude': lambda place: place._longitude,
+                }),
+                'price_per_night': OrderedIndex(
+                    lambda place: (place._price_per_night, place.id)),
+                'location': GridIndex(
+                    lambda place: (place._latitude, place._longitude)),
+                'tiles': TilePyramid(
+                    lambda place: (place._latitude, place._longitude),
+                    lambda place: place._price_per_night),
+                'text': InvertedIndex(lambda place: (
+                    place._name, place._description, place._address)),
+            },
+            'Review': {
+                'place_user': HashIndex(
+                    lambda review: (review._place_id, review._user_id),
+                    unique=True),
+                'place_id': HashIndex(lambda review: review._place_id),
+                'user_id': HashIndex(lambda review: review._user_id),
+                'place_rating': RatingAggregate(
+                    lambda review: review._place_id,
+                    lambda review: review._rating),
+                'user_rating': RatingAggregate(
+                    lambda review: review._user_id,
+                    lambda review: review._rating),
+                'leaderboard': Leaderboard(
+                    lambda review: review._place_id,
+                    lambda review: review._rating),
+                'trending': TimeBuckets(
+                    lambda review: review._place_id,
+                    lambda review: review.created_at),
+            },
+            'City': {
+                'name_country': HashIndex(
+                    lambda city: (city._name, city._country_id),
+                    unique=True),
+            },
+            'Amenity': {
+                'name': HashIndex(lambda amenity: amenity._name,
+                                  unique=True),
+            },
+        }
+        for type_indexes in indexes.values():
+            type_indexes['created'] = OrderedIndex(creation_key)
+        return indexes
+
+    def rebuild_indexes(self):
+        """
+        Rebuilds every secondary index from the storage.
+        """
+        for indexes in self.indexes.values():
+            for index in indexes.values():
+                index.clear()
+        for entities in self.storage.values():
+            for entity in entities.values():
+                self.index(entity)
+
+    def index(self, entity):
+        """
+        Adds or re-keys an entity in the indexes of its type.
+
+        Args:
+            entity (object): The entity to index.
+        """
+        entity_type = type(entity).__name__
+        self.touch(entity_type)
+        for index in self.indexes.get(entity_type, {}).values():
+            index.add(entity)
+
+    def index_loaded(self, entity):
+        """
+        Indexes an entity read from the persisted state, before it is
+        stored. Records are hydrated without validation, so an index may
+        reject one, e.g. a rating outside the scale; the entity is then
+        removed from the indexes it already reached.
+
+        Args:
+            entity (object): The entity to index.
+
+        Raises:
+            TypeError: If an index cannot key the entity.
+            ValueError: If an index rejects the entity.
+        """
+        try:
+            self.index(entity)
+        except (TypeError, ValueError):
+            self.unindex(type(entity).__name__, entity.id)
+            raise
+
+    def unindex(self, entity_type, entity_id):
+        """
+        Removes an entity from the indexes of its type and drops its
+        cached JSON.
+
+        Args:
+            entity_type (str): The type of the entity.
+            entity_id (str): The ID of the entity.
+        """
+        self.touch(entity_type)
+        for index in self.indexes.get(entity_type, {}).values():
+            index.discard(entity_id)
+        self.fragments.get(entity_type, {}).pop(entity_id, None)
+
+    def touch(self, entity_type):
+        """
+        Marks the published snapshot of an entity type as outdated, so the
+        next reader builds a new one.
+
+        Args:
+            entity_type (str): The type of the entity.
+        """
+        self.versions[entity_type] = self.versions.get(entity_type, 0) + 1
+
+    @write_locked
+    def reindex(self, entity):
+        """
+        Re-keys a stored entity after its attributes changed. Called by the
+        model setters; entities that are not stored are ignored.
+
+        Args:
+            entity (object): The entity whose attributes changed.
+        """
+        entity_type = type(entity).__name__
+
+        if self.storage.get(entity_type, {}).get(entity.id) is entity:
+            self.remember(entity_type, entity.id)
+            self.index(entity)
+
+    def before_change(self, entity):
+        """
+        Records a stored entity before a model setter changes it, when the
+        calling thread is inside a transaction, so that rollback() can
+        restore it. Entities that are not stored are ignored.
+
+        Args:
+            entity (object): The entity about to change.
+        """
+        entity_type = type(entity).__name__
+
+        if self.in_transaction() \
+                and self.storage.get(entity_type, {}).get(entity.id) \
+                is entity:
+            self.remember(entity_type, entity.id)
+
+    @write_locked
     def save(self, entity):
         """
         Saves an entity to the storage and updates the JSON file.
@@ -127,12 +745,16 @@ class DataManager(IPersistenceManager):
         """
         entity_type = type(entity).__name__
 
+        self.remember(entity_type, entity.id)
         if entity_type not in self.storage:
             self.storage[entity_type] = {}
         self.storage[entity_type][entity.id] = entity
-        self.save_to_json()
+        entity.mark_dirty()
+        self.index(entity)
+        self.persist('save', entity_type, entity.id, entity)
         return entity
 
+    @read_locked
     def get(self, entity_id, entity_type):
         """
         Retrieves an entity by its ID and type from the storage.
@@ -149,6 +771,204 @@ class DataManager(IPersistenceManager):
             return self.storage[entity_type][entity_id]
         return None
 
+    def get_all(self, entity_type):
+        """
+        Retrieves every entity of a type from the storage.
+
+        Args:
+            entity_type (str): The type of the entities.
+
+        Returns:
+            list: List of entities, in insertion order.
+        """
+        return list(self.snapshot(entity_type))
+
+    def snapshot(self, entity_type):
+        """
+        Retrieves an immutable list of the entities of a type, without
+        waiting for writers.
+
+        Readers share the last snapshot published for the type as long as
+        no entity of the type changed. Otherwise the first reader builds
+        and publishes a new one; if a writer holds the lock in the
+        meantime, the previous snapshot is returned rather than waiting,
+        so reads stay fast during bulk writes at the cost of briefly
+        missing the write in progress.
+
+        Args:
+            entity_type (str): The type of the entities.
+
+        Returns:
+            tuple: The entities, in insertion order.
+        """
+        published = self.snapshots.get(entity_type)
+        if published is not None \
+                and published[0] == self.versions.get(entity_type, 0):
+            return published[1]
+        if not self.rwlock.acquire_read(blocking=published is None):
+            return published[1]
+        try:
+            entities = tuple(self.storage.get(entity_type, {}).values())
+            # Snapshots must not expose uncommitted transactions
+            if not self.in_transaction():
+                self.snapshots[entity_type] = \
+                    (self.versions.get(entity_type, 0), entities)
+            return entities
+        finally:
+            self.rwlock.release_read()
+
+    @read_locked
+    def page(self, entity_type, limit, after=None):
+        """
+        Retrieves a page of entities of a type, ordered by creation date,
+        by bisecting the ordered index of the type.
+
+        Args:
+            entity_type (str): The type of the entities.
+            limit (int): The maximum number of entities.
+            after (tuple, optional): The creation key to start after, as
+            returned for the previous page. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the creation key to pass as
+            after for the next page, or None if this is the last page.
+        """
+        index = self.indexes.get(entity_type, {}).get('created')
+
+        if index is None:
+            return super().page(entity_type, limit, after)
+        return index.page(after, limit)
+
+    @read_locked
+    def sorted_page(self, entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+        """
+        Retrieves a page of entities of a type sorted by an attribute, by
+        bisecting the ordered index kept for that attribute.
+
+        Args:
+            entity_type (str): The type of the entities.
+            attribute (str): The attribute to sort by.
+            limit (int, optional): The maximum number of entities.
+            Defaults to None, returning every entity.
+            after (tuple, optional): The (value, id) key to start after, as
+            returned for the previous page. Defaults to None.
+            low (optional): The inclusive minimum value. Defaults to None.
+            high (optional): The inclusive maximum value. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key to pass as after for
+            the next page, or None if this is the last page.
+        """
+        index = self.indexes.get(entity_type, {}).get(attribute)
+
+        if not isinstance(index, OrderedIndex):
+            return super().sorted_page(entity_type, attribute, limit, after,
+                                       low, high)
+        return index.page(after, limit, low, high)
+
+    @read_locked
+    def select(self, entity_type, ranges):
+        """
+        Retrieves the entities of a type whose numeric attributes fall
+        within ranges, evaluated on the column store of the type.
+
+        Args:
+            entity_type (str): The type of the entities.
+            ranges (dict): The inclusive bounds of each attribute, as
+            {attribute: (low, high)}; either bound may be None.
+
+        Returns:
+            list: The matching entities, in no particular order.
+        """
+        store = self.indexes.get(entity_type, {}).get('columns')
+
+        if store is None or not set(ranges) <= set(store.columns):
+            return super().select(entity_type, ranges)
+        return store.select(ranges)
+
+    @read_locked
+    def within(self, entity_type, south, west, north, east):
+        """
+        Retrieves the entities of a type inside a bounding box, from the
+        spatial index of the type.
+
+        Args:
+            entity_type (str): The type of the entities.
+            south (float): The minimum latitude.
+            west (float): The western longitude.
+            north (float): The maximum latitude.
+            east (float): The eastern longitude, smaller than west when
+            the box crosses the antimeridian.
+
+        Returns:
+            list: The entities inside the box.
+        """
+        index = self.indexes.get(entity_type, {}).get('location')
+
+        if index is None:
+            return super().within(entity_type, south, west, north, east)
+        return index.within(south, west, north, east)
+
+    @read_locked
+    def nearby(self, entity_type, latitude, longitude, radius_km):
+        """
+        Retrieves the entities of a type within a distance of a point,
+        from the spatial index of the type.
+
+        Args:
+            entity_type (str): The type of the entities.
+            latitude (float): The latitude of the point.
+            longitude (float): The longitude of the point.
+            radius_km (float): The maximum distance, in kilometers.
+
+        Returns:
+            list: The (distance_km, entity) pairs, nearest first.
+        """
+        index = self.indexes.get(entity_type, {}).get('location')
+
+        if index is None:
+            return super().nearby(entity_type, latitude, longitude,
+                                  radius_km)
+        return index.nearby(latitude, longitude, radius_km)
+
+    @read_locked
+    def get_place_tile(self, z, x, y):
+        """
+        Retrieves the place count and average price of a map tile and of
+        its clusters, from the tile pyramid of the places.
+
+        Args:
+            z (int): The zoom level.
+            x (int): The column of the tile.
+            y (int): The row of the tile.
+
+        Returns:
+            dict: The tile summary, as returned by TilePyramid.tile().
+
+        Raises:
+            ValueError: If the tile does not exist.
+        """
+        return self.indexes['Place']['tiles'].tile(z, x, y)
+
+    @read_locked
+    def search_places(self, query, limit=10):
+        """
+        Retrieves the places best matching a full-text query over their
+        name, description and address, from the inverted index of the
+        places.
+
+        Args:
+            query (str): The query.
+            limit (int, optional): The maximum number of results.
+            Defaults to 10.
+
+        Returns:
+            list: The (score, place) pairs, best first.
+        """
+        return self.indexes['Place']['text'].search(query, limit)
+
+    @read_locked
     def get_by_email(self, email):
         """
         Retrieves a User entity by its email.
@@ -159,15 +979,14 @@ class DataManager(IPersistenceManager):
         Returns:
             object: The User entity or None if not found.
         """
-        users = self.storage.get('User', {}).values()
-        for user in users:
-            if user.email == email:
-                return user
-        return None
+        return self.indexes['User']['email'].first(email)
 
+    @read_locked
     def get_country_by_code(self, country_code):
         """
-        Retrieves a Country entity by its code.
+        Retrieves a Country entity by its code. A code that is not stored
+        as given, such as 'fr' or 'FRA', is converted to its ISO 3166-1
+        alpha-2 code.
 
         Args:
             country_code (str): The code of the country.
@@ -175,12 +994,16 @@ class DataManager(IPersistenceManager):
         Returns:
             object: The Country entity or None if not found.
         """
-        countries = self.storage.get('Country', {}).values()
-        for country in countries:
-            if country.code == country_code:
-                return country
-        return None
+        index = self.indexes['Country']['code']
+        country = index.first(country_code)
 
+        if country is None:
+            code = ISO_COUNTRIES.normalize_code(country_code)
+            if code != country_code:
+                country = index.first(code)
+        return country
+
+    @read_locked
     def place_exists_with_attributes(self, name, address, city_id, host_id,
                                      num_rooms, num_bathrooms,
                                      price_per_night, max_guests):
@@ -200,21 +1023,11 @@ class DataManager(IPersistenceManager):
         Returns:
             bool: True if the place exists, False otherwise.
         """
+        key = (name, address, city_id, host_id, num_rooms, num_bathrooms,
+               price_per_night, max_guests)
+        return self.indexes['Place']['attributes'].first(key) is not None
 
-        places = self.storage.get('Place', {}).values()
-
-        for place in places:
-            if (place._name == name and
-                place._address == address and
-                place._city_id == city_id and
-                place._host_id == host_id and
-                place._num_rooms == num_rooms and
-                place._num_bathrooms == num_bathrooms and
-                place._price_per_night == price_per_night and
-                    place._max_guests == max_guests):
-                return True
-        return False
-
+    @read_locked
     def review_exists_with_attributes(self, place_id, user_id):
         """
         Checks if a Review entity exists with the specified attributes.
@@ -226,13 +1039,10 @@ class DataManager(IPersistenceManager):
         Returns:
             bool: True if the review exists, False otherwise.
         """
-        reviews = self.storage.get('Review', {}).values()
-
-        for review in reviews:
-            if review._place_id == place_id and review._user_id == user_id:
-                return True
-        return False
+        key = (place_id, user_id)
+        return self.indexes['Review']['place_user'].first(key) is not None
 
+    @read_locked
     def city_exists_with_name_and_country(self, name, country_id):
         """
         Checks if a City entity exists with the specified attributes.
@@ -244,13 +1054,10 @@ class DataManager(IPersistenceManager):
         Returns:
             bool: True if the city exists, False otherwise.
         """
-        cities = self.storage.get('City', {}).values()
-
-        for city in cities:
-            if city._name == name and city._country_id == country_id:
-                return True
-        return False
+        key = (name, country_id)
+        return self.indexes['City']['name_country'].first(key) is not None
 
+    @read_locked
     def amenity_exists_with_name(self, name):
         """
         Checks if an Amenity entity exists with the specified name.
@@ -261,13 +1068,9 @@ class DataManager(IPersistenceManager):
         Returns:
             bool: True if the amenity exists, False otherwise.
         """
-        amenities = self.storage.get('Amenity', {}).values()
-
-        for amenity in amenities:
-            if amenity._name == name:
-                return True
-        return False
+        return self.indexes['Amenity']['name'].first(name) is not None
 
+    @read_locked
     def get_reviews_by_place_id(self, place_id):
         """
         Retrieves all Review entities for a given place.
@@ -278,10 +1081,9 @@ class DataManager(IPersistenceManager):
         Returns:
             list: List of Review entities.
         """
-        return [review for review in
-                self.storage.get('Review', {}).values()
-                if review.place_id == place_id]
+        return self.indexes['Review']['place_id'].get(place_id)
 
+    @read_locked
     def get_reviews_by_user_id(self, user_id):
         """
         Retrieves all Review entities for a given user.
@@ -292,10 +1094,79 @@ class DataManager(IPersistenceManager):
         Returns:
             list: List of Review entities.
         """
-        return [review for review
-                in self.storage.get('Review', {}).values()
-                if review.user_id == user_id]
+        return self.indexes['Review']['user_id'].get(user_id)
+
+    @read_locked
+    def get_place_rating(self, place_id):
+        """
+        Retrieves the number, sum, average and histogram of the ratings of
+        a place, from the running aggregates of the reviews.
+
+        Args:
+            place_id (str): The place ID.
+
+        Returns:
+            dict: The rating summary, as returned by rating_summary().
+        """
+        return self.indexes['Review']['place_rating'].summary(place_id)
+
+    @read_locked
+    def get_user_rating(self, user_id):
+        """
+        Retrieves the number, sum, average and histogram of the ratings a
+        user gave, from the running aggregates of the reviews.
+
+        Args:
+            user_id (str): The user ID.
+
+        Returns:
+            dict: The rating summary, as returned by rating_summary().
+        """
+        return self.indexes['Review']['user_rating'].summary(user_id)
 
+    @read_locked
+    def top_places(self, limit=10, city_id=None, places=None):
+        """
+        Retrieves the places with the best Bayesian average rating, read
+        from the head of the leaderboard of the reviews.
+
+        Args:
+            limit (int, optional): The maximum number of places.
+            Defaults to 10.
+            city_id (str, optional): The city of the places. Defaults to
+            None, for every city.
+            places (IPersistenceManager, optional): The manager owning the
+            places, when it does not own the reviews. Defaults to None.
+
+        Returns:
+            list: The (score, place) pairs, best first.
+        """
+        return self.resolve_places(self.indexes['Review']['leaderboard'].top(),
+                                   limit, places or self, city_id)
+
+    @read_locked
+    def trending_places(self, window, limit=10, now=None, places=None):
+        """
+        Retrieves the places that received the most reviews over a recent
+        window, from the hourly review counters.
+
+        Args:
+            window (timedelta): The length of the window.
+            limit (int, optional): The maximum number of places.
+            Defaults to 10.
+            now (datetime, optional): The end of the window. Defaults to
+            the current time.
+            places (IPersistenceManager, optional): The manager owning the
+            places, when it does not own the reviews. Defaults to None.
+
+        Returns:
+            list: The (review_count, place) pairs, highest count first.
+        """
+        now = now or datetime.now()
+        ranking = self.indexes['Review']['trending'].top(now - window, now)
+        return self.resolve_places(ranking, limit, places or self)
+
+    @write_locked
     def update(self, entity):
         """
         Updates an existing entity in the storage and JSON file.
@@ -309,11 +1180,15 @@ class DataManager(IPersistenceManager):
         entity_type = type(entity).__name__
         if entity_type in self.storage \
                 and entity.id in self.storage[entity_type]:
+            self.remember(entity_type, entity.id)
             self.storage[entity_type][entity.id] = entity
-            self.save_to_json()
+            entity.mark_dirty()
+            self.index(entity)
+            self.persist('update', entity_type, entity.id, entity)
             return entity
         return None
 
+    @write_locked
     def delete(self, entity_id, entity_type):
         """
         Deletes an entity by its ID and type from the storage and updates
@@ -329,14 +1204,307 @@ class DataManager(IPersistenceManager):
         """
         if entity_type in self.storage \
                 and entity_id in self.storage[entity_type]:
+            self.remember(entity_type, entity_id)
             del self.storage[entity_type][entity_id]
-            self.save_to_json()
+            self.unindex(entity_type, entity_id)
+            self.persist('delete', entity_type, entity_id)
             return True
         return False
 
+    def persist(self, op, entity_type, entity_id, entity=None):
+        """
+        Persists a single mutation. Inside a transaction the mutation is
+        only recorded, and persisted with the others on commit.
+
+        Args:
+            op (str): The operation ('save', 'update' or 'delete').
+            entity_type (str): The type of the entity.
+            entity_id (str): The ID of the entity.
+            entity (object, optional): The entity for 'save' and 'update'
+            operations.
+        """
+        if self.in_transaction():
+            # Only the last mutation of an entity needs to be persisted
+            self.local.operations[entity_type, entity_id] = \
+                (op, entity_type, entity_id, entity)
+            return
+        self.persist_many([(op, entity_type, entity_id, entity)])
+
+    def persist_many(self, operations):
+        """
+        Persists a group of mutations with a single write. In journaled
+        mode their records are appended together and the journal is
+        checkpointed every checkpoint_interval records; otherwise the JSON
+        file is rewritten once. In shared mode the records of other
+        processes are applied first, under the file lock, so every process
+        sees the same order, and the unique indexes are checked again since
+        another process may have written the same key in the meantime. In
+        write-behind mode the mutations are only buffered and the flusher
+        writes them in the background.
+
+        Args:
+            operations (list): The mutations, as
+            (op, entity_type, entity_id, entity) tuples; entity is None for
+            'delete' operations.
+
+        Raises:
+            ValueError: If, in shared mode, an entity shares a unique key
+            with one written by another process. Nothing is written; a
+            transaction is left for rollback() to undo, otherwise the
+            persisted state is loaded again.
+        """
+        if self.journal:
+            lines = [self.journal.encode(
+                op, entity_type, entity_id,
+                entity.to_dict() if entity is not None else None)
+                for op, entity_type, entity_id, entity in operations]
+        if self.flusher is not None:
+            if self.journal:
+                with self.pending_lock:
+                    self.pending_records.extend(lines)
+            else:
+                self.snapshot_stale = True
+            self.flusher.notify(len(operations))
+            return
+        if self.journal is None:
+            self.save_to_json()
+            return
+
+        with self.locked():
+            if self.lock is not None:
+                self.catch_up()
+                # Records of other processes may have touched these entities
+                for op, entity_type, entity_id, entity in operations:
+                    entities = self.storage.setdefault(entity_type, {})
+                    if entity is None:
+                        entities.pop(entity_id, None)
+                        self.unindex(entity_type, entity_id)
+                    else:
+                        entities[entity_id] = entity
+                        self.index(entity)
+                try:
+                    self.check_unique(operations)
+                except ValueError:
+                    if not self.in_transaction():
+                        # No undo log to drop the rejected mutation with
+                        self.reload()
+                    raise
+            self.journal_offset += self.journal.write(lines)
+            self.journal_records += len(lines)
+            if self.lock is not None:
+                self.journal_signature = self.journal.signature()
+
+            if self.journal_records >= self.checkpoint_interval:
+                self.checkpoint()
+
+    def write_pending(self):
+        """
+        Writes the mutations buffered in write-behind mode: the buffered
+        journal records are appended as one group, or the JSON file is
+        rewritten once for all of them. Records that could not be written
+        are buffered again, ahead of the ones added since, so the next
+        flush retries them.
+
+        Raises:
+            OSError: If the journal cannot be written.
+        """
+        if self.journal is None:
+            self.snapshot_stale = False
+            self.save_to_json()
+            return
+        with self.rwlock.write():
+            with self.pending_lock:
+                records, self.pending_records = self.pending_records, []
+            if records:
+                try:
+                    self.journal_offset += self.journal.write(records)
+                except Exception:
+                    with self.pending_lock:
+                        self.pending_records[:0] = records
+                    raise
+                self.journal_records += len(records)
+                if self.journal_records >= self.checkpoint_interval:
+                    self.checkpoint()
+
+    def flush(self):
+        """
+        Waits until every buffered mutation is written. Returns at once
+        when the data manager is not in write-behind mode.
+        """
+        if self.flusher is not None:
+            self.flusher.flush()
+
+    def close(self):
+        """
+        Flushes the buffered mutations, stops the flusher, saves the
+        full-text indexes and closes the journal.
+        """
+        if self.flusher is not None:
+            self.flusher.stop()
+            self.flusher = None
+        self.save_search_indexes()
+        if self.journal:
+            self.journal.close()
+
+    def in_transaction(self):
+        """
+        Tells if the calling thread is inside a transaction.
+
+        Returns:
+            bool: True inside a transaction, False otherwise.
+        """
+        return getattr(self.local, 'operations', None) is not None
+
+    def begin(self, entity_types=()):
+        """
+        Starts buffering the mutations of the calling thread. They are
+        applied to the storage as they are made, so the transaction reads
+        its own writes, but nothing is persisted until commit(). The
+        transaction holds the write lock until it ends, so other threads
+        never see its uncommitted changes. Rollback restores entities from
+        memory, so beginning never waits for the mutations buffered in
+        write-behind mode to reach the disk.
+
+        Args:
+            entity_types (tuple, optional): The types the transaction
+            mutates; the storage has a single lock, so they are ignored.
+        """
+        self.rwlock.acquire_write()
+        self.local.operations = {}
+        self.local.undo = {}
+        self.local.written = False
+
+    def remember(self, entity_type, entity_id):
+        """
+        Records an entity the first time the transaction of the calling
+        thread touches it: its attributes if it is stored, so that
+        rollback() restores it, or its absence, so that rollback() removes
+        it. Does nothing outside a transaction.
+
+        Args:
+            entity_type (str): The type of the entity.
+            entity_id (str): The ID of the entity.
+        """
+        undo = getattr(self.local, 'undo', None)
+
+        if undo is None or (entity_type, entity_id) in undo:
+            return
+        entity = self.storage.get(entity_type, {}).get(entity_id)
+        undo[entity_type, entity_id] = \
+            (entity, entity.copy_state() if entity is not None else None)
+
+    def prepare(self):
+        """
+        Checks the unique indexes once for every entity the transaction
+        saved or updated.
+
+        Raises:
+            ValueError: If an entity shares a unique key with another one.
+        """
+        self.check_unique(self.local.operations.values())
+
+    def check_unique(self, operations):
+        """
+        Checks the unique indexes for the entities saved or updated by a
+        group of mutations.
+
+        Args:
+            operations (iterable): The mutations, as
+            (op, entity_type, entity_id, entity) tuples.
+
+        Raises:
+            ValueError: If an entity shares a unique key with another one.
+        """
+        for op, entity_type, entity_id, entity in operations:
+            if entity is None:
+                continue
+            for name, index in self.indexes.get(entity_type, {}).items():
+                key = index.keys.get(entity_id)
+                if index.unique and len(index.buckets.get(key, ())) > 1:
+                    raise ValueError(
+                        f"Duplicate {entity_type} {name}: {key}")
+
+    def commit(self, end=True):
+        """
+        Persists the mutations buffered by the transaction with a single
+        write and ends it. If the write fails, the transaction must still
+        be rolled back.
+
+        Args:
+            end (bool, optional): Whether the transaction ends. When False,
+            it keeps the write lock and its undo log until end(), so that
+            rollback() can still undo the written mutations, e.g. when
+            another shard fails to commit. Defaults to True.
+        """
+        operations = list(self.local.operations.values())
+        if operations:
+            self.persist_many(operations)
+        self.local.written = True
+        if end:
+            self.end()
+
+    def end(self):
+        """
+        Ends a transaction committed with end=False, releasing its write
+        lock.
+        """
+        self.local.operations = None
+        self.local.undo = None
+        self.rwlock.release_write()
+
+    def rollback(self):
+        """
+        Discards the mutations of the transaction and ends it. Only the
+        entities it touched are restored, in place, from the attributes
+        recorded before they first changed, and re-keyed in the indexes;
+        the entities it added are removed. Nothing is read from disk.
+
+        A transaction committed with end=False has already written its
+        mutations, so the restored entities are written over them.
+        """
+        undo = self.local.undo
+        try:
+            for entity_type, entity_id in undo:
+                self.storage.get(entity_type, {}).pop(entity_id, None)
+                self.unindex(entity_type, entity_id)
+            operations = []
+            for (entity_type, entity_id), (entity, state) in undo.items():
+                if entity is None:
+                    operations.append(('delete', entity_type, entity_id,
+                                       None))
+                    continue
+                entity.restore_state(state)
+                self.storage.setdefault(entity_type, {})[entity_id] = entity
+                self.index(entity)
+                operations.append(('save', entity_type, entity_id, entity))
+            if self.local.written and operations:
+                self.persist_many(operations)
+        finally:
+            self.end()
+
+    @write_locked
+    def checkpoint(self):
+        """
+        Folds the journal into the JSON file and truncates it.
+        Replaying a record twice is harmless, so a crash between the two
+        steps does not lose or corrupt data.
+        """
+        with self.locked():
+            if self.lock is not None:
+                self.catch_up()
+            self.save_to_json()
+            self.save_search_indexes()
+            if self.journal:
+                self.journal_generation = self.journal.truncate()
+                self.journal_signature = self.journal.signature()
+                self.journal_offset = self.journal_signature[1]
+                self.journal_records = 0
+
     def save_to_json(self, file_path=None):
         """
         Saves the current state of the storage to the JSON file.
+        The file is replaced atomically and carries a checksum, so a crash
+        mid-write leaves the previous snapshot intact.
 
         Args:
             file_path (str, optional): The path to the JSON file.
@@ -346,12 +1514,38 @@ class DataManager(IPersistenceManager):
 
         if not file_path:
             file_path = self.data_file
-        serializable_storage = {}
-        for entity_type, entities in self.storage.items():
-            entity_dict = {}
-            for entity_id, entity in entities.items():
-                entity_data = entity.to_dict()
-                entity_dict[entity_id] = entity_data
-            serializable_storage[entity_type] = entity_dict
-        with open(file_path, 'w') as file:
-            json.dump(serializable_storage, file, indent=4)
+        Snapshot(file_path).write_encoded(self.encode_storage())
+
+    @read_locked
+    def encode_storage(self):
+        """
+        Encodes the storage as the JSON document of a snapshot. The
+        encoded form of each entity is cached along with its version, so
+        only the entities changed since the last snapshot are serialized
+        again.
+
+        Returns:
+            bytes: The storage as a JSON object indented by 4 spaces.
+        """
+        types = []
+        # Copies keep the iteration safe while the flusher thread writes
+        for entity_type, entities in list(self.storage.items()):
+            cache = self.fragments.setdefault(entity_type, {})
+            parts = []
+            for entity_id, entity in list(entities.items()):
+                version = entity.version
+                cached = cache.get(entity_id)
+                if cached is None or cached[0] is not entity \
+                        or cached[1] != version:
+                    fragment = json.dumps(entity.to_dict(), indent=4)
+                    cached = (entity, version, (
+                        '\n        ' + json.dumps(entity_id) + ': ' +
+                        fragment.replace('\n', '\n        ')).encode())
+                    cache[entity_id] = cached
+                parts.append(cached[2])
+            body = b'{' + b','.join(parts) + b'\n    }' if parts else b'{}'
+            types.append(b'\n    ' + json.dumps(entity_type).encode() +
+                         b': ' + body)
+        if not types:
+            return b'{}'
+        return b'{' + b','.join(types) + b'\n}'
@@ -0,0 +1,60 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """
+    FileLock is an advisory lock shared by every process working on the
+    same data file, such as the gunicorn workers of one deployment.
+
+    Writers hold it exclusively while they catch up with the journal and
+    append to it; readers hold it shared while they replay the journal.
+    Acquisitions nested in the same process reuse the outer lock.
+
+    Attributes:
+        lock_file (str): The path to the lock file.
+
+    Methods:
+        acquire(exclusive=True):
+            Context manager holding the lock for the duration of a block.
+    """
+
+    def __init__(self, lock_file):
+        if fcntl is None:
+            raise OSError("File locking is not supported on this platform")
+        self.lock_file = lock_file
+        self._mutex = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    @contextmanager
+    def acquire(self, exclusive=True):
+        """
+        Context manager holding the lock for the duration of a block.
+
+        Args:
+            exclusive (bool, optional): Whether to take the lock
+            exclusively (writers) or shared (readers). Ignored when the
+            lock is already held by this process. Defaults to True.
+        """
+        with self._mutex:
+            if self._depth == 0:
+                self._fd = os.open(self.lock_file,
+                                   os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd,
+                            fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                    os.close(self._fd)
+                    self._fd = None
@@ -0,0 +1,104 @@
+import atexit
+import threading
+
+
+class Flusher:
+    """
+    Flusher runs a write-behind callback on a background thread, so that
+    requests only mark the store dirty instead of waiting for the disk.
+
+    Once a mutation is reported, the callback runs at most interval
+    seconds later, or as soon as max_pending mutations accumulated,
+    whichever comes first. Every mutation reported before a flush() call
+    is written when it returns, and the pending mutations are flushed when
+    the flusher is stopped or the interpreter exits.
+
+    Attributes:
+        interval (float): The maximum number of seconds a mutation waits
+        before being flushed.
+        max_pending (int): The number of pending mutations that triggers
+        an early flush.
+
+    Methods:
+        notify(count=1):
+            Reports mutations waiting to be flushed.
+
+        flush():
+            Runs the callback for every pending mutation and waits for it.
+
+        stop():
+            Flushes the pending mutations and stops the background thread.
+    """
+
+    def __init__(self, callback, interval=1.0, max_pending=100):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._callback = callback
+        self._condition = threading.Condition()
+        self._flush_mutex = threading.Lock()
+        self._pending = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='hbnb-flusher')
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def notify(self, count=1):
+        """
+        Reports mutations waiting to be flushed.
+
+        Args:
+            count (int, optional): The number of mutations. Defaults to 1.
+        """
+        with self._condition:
+            was_idle = not self._pending
+            self._pending += count
+            if was_idle or self._pending >= self.max_pending:
+                self._condition.notify()
+
+    def flush(self):
+        """
+        Runs the callback for every pending mutation and waits for it.
+        If the callback fails, the mutations stay pending and the next
+        flush retries them.
+        """
+        with self._flush_mutex:
+            with self._condition:
+                pending, self._pending = self._pending, 0
+            if not pending:
+                return
+            try:
+                self._callback()
+            except Exception as e:
+                with self._condition:
+                    self._pending += pending
+                print(f"Write-behind flush failed: {e}")
+
+    def _run(self):
+        """
+        Waits for mutations and flushes them once the interval elapsed or
+        enough of them accumulated.
+        """
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._stopped:
+                    self._condition.wait_for(
+                        lambda: self._stopped or
+                        self._pending >= self.max_pending,
+                        timeout=self.interval)
+                stopped = self._stopped
+            self.flush()
+            if stopped:
+                return
+
+    def stop(self):
+        """
+        Flushes the pending mutations and stops the background thread.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+        atexit.unregister(self.stop)
@@ -0,0 +1,413 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    """
+    Computes the great-circle distance between two points.
+
+    Args:
+        latitude1 (float): The latitude of the first point, in degrees.
+        longitude1 (float): The longitude of the first point, in degrees.
+        latitude2 (float): The latitude of the second point, in degrees.
+        longitude2 (float): The longitude of the second point, in degrees.
+
+    Returns:
+        float: The distance in kilometers.
+    """
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(longitude2 - longitude1) / 2
+    a = math.sin(half_dphi) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    GridIndex is a spatial index filing entities in the cells of a fixed
+    latitude/longitude grid, so that a bounding box or radius search only
+    looks at the entities of the cells it overlaps.
+
+    Bounding boxes crossing the antimeridian are given with a west
+    longitude greater than the east one.
+
+    Attributes:
+        location (callable): Function returning the (latitude, longitude)
+        of an entity, in degrees.
+        cell_size (float): The side of a cell, in degrees.
+        unique (bool): Always False; a spatial index enforces nothing.
+        cells (dict): The entities of each non-empty cell, as
+        {(row, column): {id: entity}}.
+        keys (dict): The cell each indexed entity is filed under, by ID.
+
+    Methods:
+        add(entity):
+            Indexes an entity, moving it if it was already indexed.
+
+        discard(entity_id):
+            Removes an entity from the index.
+
+        within(south, west, north, east):
+            Retrieves the entities inside a bounding box.
+
+        nearby(latitude, longitude, radius_km):
+            Retrieves the entities within a distance, nearest first.
+
+        clear():
+            Removes every entity from the index.
+    """
+
+    unique = False
+
+    def __init__(self, location, cell_size=0.25):
+        self.location = location
+        self.cell_size = cell_size
+        self.cells = {}
+        self.keys = {}
+
+    def cell(self, latitude, longitude):
+        """
+        Computes the cell of a point.
+
+        Args:
+            latitude (float): The latitude, in degrees.
+            longitude (float): The longitude, in degrees.
+
+        Returns:
+            tuple: The (row, column) of the cell.
+        """
+        return (math.floor(latitude / self.cell_size),
+                math.floor(longitude / self.cell_size))
+
+    def add(self, entity):
+        """
+        Indexes an entity, moving it if it was already indexed.
+
+        Args:
+            entity (object): The entity to index.
+        """
+        entity_id = entity.id
+        key = self.cell(*self.location(entity))
+
+        if self.keys.get(entity_id) == key:
+            self.cells[key][entity_id] = entity
+            return
+        self.discard(entity_id)
+        self.cells.setdefault(key, {})[entity_id] = entity
+        self.keys[entity_id] = key
+
+    def discard(self, entity_id):
+        """
+        Removes an entity from the index. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity to remove.
+        """
+        key = self.keys.pop(entity_id, None)
+
+        if key is None:
+            return
+        cell = self.cells[key]
+        del cell[entity_id]
+        if not cell:
+            del self.cells[key]
+
+    def candidates(self, south, west, north, east):
+        """
+        Retrieves the entities of the cells overlapping a bounding box
+        that does not cross the antimeridian.
+
+        Args:
+            south (float): The minimum latitude.
+            west (float): The minimum longitude.
+            north (float): The maximum latitude.
+            east (float): The maximum longitude.
+
+        Returns:
+            generator: The entities, some of them outside the box.
+        """
+        first_row, first_column = self.cell(south, west)
+        last_row, last_column = self.cell(north, east)
+        rows = range(first_row, last_row + 1)
+        columns = range(first_column, last_column + 1)
+
+        if len(rows) * len(columns) > len(self.cells):
+            # Sparse grid: scanning the populated cells is cheaper
+            keys = [key for key in self.cells
+                    if key[0] in rows and key[1] in columns]
+        else:
+            keys = [(row, column) for row in rows for column in columns
+                    if (row, column) in self.cells]
+        for key in keys:
+            yield from self.cells[key].values()
+
+    def within(self, south, west, north, east):
+        """
+        Retrieves the entities inside a bounding box, bounds included.
+
+        Args:
+            south (float): The minimum latitude.
+            west (float): The western longitude.
+            north (float): The maximum latitude.
+            east (float): The eastern longitude, smaller than west when
+            the box crosses the antimeridian.
+
+        Returns:
+            list: The entities inside the box.
+        """
+        if west <= east:
+            boxes = [(west, east)]
+        else:
+            boxes = [(west, 180.0), (-180.0, east)]
+        entities = []
+
+        for box_west, box_east in boxes:
+            for entity in self.candidates(south, box_west, north, box_east):
+                latitude, longitude = self.location(entity)
+                if south <= latitude <= north and \
+                        box_west <= longitude <= box_east:
+                    entities.append(entity)
+        return entities
+
+    def nearby(self, latitude, longitude, radius_km):
+        """
+        Retrieves the entities within a distance of a point, nearest
+        first.
+
+        Args:
+            latitude (float): The latitude of the point, in degrees.
+            longitude (float): The longitude of the point, in degrees.
+            radius_km (float): The maximum distance, in kilometers.
+
+        Returns:
+            list: The (distance_km, entity) pairs, sorted by distance.
+        """
+        delta_latitude = radius_km / KM_PER_DEGREE
+        south = max(-90.0, latitude - delta_latitude)
+        north = min(90.0, latitude + delta_latitude)
+        widest = math.cos(math.radians(max(abs(south), abs(north))))
+
+        if north == 90.0 or south == -90.0 or \
+                radius_km >= KM_PER_DEGREE * 180 * widest:
+            west, east = -180.0, 180.0
+        else:
+            delta_longitude = delta_latitude / widest
+            west = (longitude - delta_longitude + 180) % 360 - 180
+            east = (longitude + delta_longitude + 180) % 360 - 180
+        results = []
+
+        for entity in self.within(south, west, north, east):
+            distance = haversine_km(latitude, longitude,
+                                    *self.location(entity))
+            if distance <= radius_km:
+                results.append((distance, entity))
+        results.sort(key=lambda result: result[0])
+        return results
+
+    def clear(self):
+        """
+        Removes every entity from the index.
+        """
+        self.cells.clear()
+        self.keys.clear()
+
+
+class TilePyramid:
+    """
+    TilePyramid keeps, for every zoom level of the web map tile grid, the
+    number of entities in each tile along with the sum of a value (such
+    as a price) and of their coordinates. Adding, moving or removing an
+    entity updates one tile per level, so that the aggregates of any tile
+    are read without visiting the entities.
+
+    Tiles follow the slippy map convention: at zoom z the Web Mercator
+    world is split into 2**z by 2**z tiles, x growing eastwards and y
+    southwards. Latitudes beyond the Mercator limit are clamped to it.
+
+    Attributes:
+        location (callable): Function returning the (latitude, longitude)
+        of an entity, in degrees.
+        value (callable): Function returning the aggregated value of an
+        entity.
+        max_zoom (int): The deepest zoom level kept.
+        unique (bool): Always False; a pyramid enforces nothing.
+        levels (list): The aggregates of the non-empty tiles of each zoom
+        level, as {(x, y): [count, value_sum, latitude_sum,
+        longitude_sum]}.
+        keys (dict): The deepest tile, value and location each entity
+        contributes, by ID.
+
+    Methods:
+        add(entity):
+            Adds the contribution of an entity, replacing its previous one.
+
+        discard(entity_id):
+            Removes the contribution of an entity.
+
+        tile(z, x, y, depth=2):
+            Retrieves the aggregates of a tile and of its sub-tiles.
+
+        clear():
+            Removes every contribution.
+    """
+
+    MAX_LATITUDE = 85.0511287798066
+
+    unique = False
+
+    def __init__(self, location, value, max_zoom=12):
+        self.location = location
+        self.value = value
+        self.max_zoom = max_zoom
+        self.levels = [{} for _ in range(max_zoom + 1)]
+        self.keys = {}
+
+    def tile_of(self, latitude, longitude):
+        """
+        Computes the tile of a point at the deepest zoom level.
+
+        Args:
+            latitude (float): The latitude, in degrees.
+            longitude (float): The longitude, in degrees.
+
+        Returns:
+            tuple: The (x, y) of the tile.
+        """
+        size = 1 << self.max_zoom
+        latitude = max(-self.MAX_LATITUDE, min(self.MAX_LATITUDE, latitude))
+        phi = math.radians(latitude)
+        x = int((longitude + 180.0) / 360.0 * size)
+        y = int((1.0 - math.asinh(math.tan(phi)) / math.pi) / 2.0 * size)
+        return min(max(x, 0), size - 1), min(max(y, 0), size - 1)
+
+    def contribute(self, contribution, sign):
+        """
+        Adds or subtracts a contribution to its tile at every level.
+
+        Args:
+            contribution (tuple): The deepest (x, y) tile, the value, the
+            latitude and the longitude.
+            sign (int): 1 to add the contribution, -1 to remove it.
+        """
+        (x, y), value, latitude, longitude = contribution
+
+        for zoom, tiles in enumerate(self.levels):
+            shift = self.max_zoom - zoom
+            key = (x >> shift, y >> shift)
+            aggregate = tiles.get(key)
+            if aggregate is None:
+                aggregate = tiles[key] = [0, 0.0, 0.0, 0.0]
+            aggregate[0] += sign
+            if not aggregate[0]:
+                del tiles[key]
+                continue
+            aggregate[1] += sign * value
+            aggregate[2] += sign * latitude
+            aggregate[3] += sign * longitude
+
+    def add(self, entity):
+        """
+        Adds the contribution of an entity, replacing its previous one.
+
+        Args:
+            entity (object): The entity.
+        """
+        latitude, longitude = self.location(entity)
+        contribution = (self.tile_of(latitude, longitude),
+                        float(self.value(entity)), latitude, longitude)
+        previous = self.keys.get(entity.id)
+
+        if previous == contribution:
+            return
+        if previous is not None:
+            self.contribute(previous, -1)
+        self.contribute(contribution, 1)
+        self.keys[entity.id] = contribution
+
+    def discard(self, entity_id):
+        """
+        Removes the contribution of an entity. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity.
+        """
+        contribution = self.keys.pop(entity_id, None)
+
+        if contribution is not None:
+            self.contribute(contribution, -1)
+
+    def summary(self, zoom, x, y):
+        """
+        Retrieves the aggregates of one tile.
+
+        Args:
+            zoom (int): The zoom level.
+            x (int): The column of the tile.
+            y (int): The row of the tile.
+
+        Returns:
+            dict: The tile coordinates, the number of entities and their
+            average value and location, or None if the tile is empty.
+        """
+        aggregate = self.levels[zoom].get((x, y))
+
+        if aggregate is None:
+            return None
+        count, value_sum, latitude_sum, longitude_sum = aggregate
+        return {
+            'z': zoom, 'x': x, 'y': y, 'count': count,
+            'average': value_sum / count,
+            'latitude': latitude_sum / count,
+            'longitude': longitude_sum / count,
+        }
+
+    def tile(self, z, x, y, depth=2):
+        """
+        Retrieves the aggregates of a tile and of its non-empty sub-tiles
+        depth levels deeper, which a map renders as clusters.
+
+        Args:
+            z (int): The zoom level, up to max_zoom.
+            x (int): The column of the tile.
+            y (int): The row of the tile.
+            depth (int, optional): The number of levels between the tile
+            and its clusters, limited by max_zoom. Defaults to 2.
+
+        Returns:
+            dict: The summary of the tile, with a count of 0 if it is
+            empty, and its clusters.
+
+        Raises:
+            ValueError: If the tile does not exist.
+        """
+        if not 0 <= z <= self.max_zoom or not 0 <= x < 1 << z \
+                or not 0 <= y < 1 << z:
+            raise ValueError(f"Invalid tile: {z}/{x}/{y}")
+        summary = self.summary(z, x, y) or {
+            'z': z, 'x': x, 'y': y, 'count': 0, 'average': None,
+            'latitude': None, 'longitude': None,
+        }
+        depth = min(depth, self.max_zoom - z)
+        side = 1 << depth
+        clusters = []
+
+        if summary['count']:
+            for column in range(x * side, (x + 1) * side):
+                for row in range(y * side, (y + 1) * side):
+                    cluster = self.summary(z + depth, column, row)
+                    if cluster is not None:
+                        clusters.append(cluster)
+        summary['clusters'] = clusters
+        return summary
+
+    def clear(self):
+        """
+        Removes every contribution.
+        """
+        for tiles in self.levels:
+            tiles.clear()
+        self.keys.clear()
@@ -0,0 +1,274 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from operator import itemgetter
+
+
+def creation_key(entity):
+    """
+    Computes the key ordering entities by creation date, the ID breaking
+    ties so that every entity has a distinct key.
+
+    Args:
+        entity (object): The entity.
+
+    Returns:
+        tuple: The creation timestamp (ISO 8601) and the ID.
+    """
+    created_at = entity.created_at
+
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return (str(created_at), entity.id)
+
+
+class HashIndex:
+    """
+    HashIndex is a secondary index mapping a key computed from an entity
+    to the entities sharing that key.
+
+    The index remembers the key each entity was filed under, so an entity
+    can be re-keyed after its attributes changed without scanning the
+    index.
+
+    Attributes:
+        key (callable): Function computing the index key of an entity.
+        unique (bool): Whether the key is expected to identify a single
+        entity; checked by DataManager.check_integrity().
+        buckets (dict): The entities grouped by key, as {key: {id: entity}}.
+        keys (dict): The key each indexed entity is filed under, by ID.
+
+    Methods:
+        add(entity):
+            Indexes an entity, re-keying it if it was already indexed.
+
+        discard(entity_id):
+            Removes an entity from the index.
+
+        get(key):
+            Retrieves all entities filed under a key.
+
+        first(key):
+            Retrieves the first entity filed under a key.
+
+        clear():
+            Removes every entity from the index.
+
+        duplicates():
+            Retrieves the entities sharing a key with an earlier one.
+    """
+
+    def __init__(self, key, unique=False):
+        self.key = key
+        self.unique = unique
+        self.buckets = {}
+        self.keys = {}
+
+    def add(self, entity):
+        """
+        Indexes an entity, re-keying it if it was already indexed.
+
+        Args:
+            entity (object): The entity to index.
+        """
+        entity_id = entity.id
+
+        if entity_id in self.keys:
+            self.discard(entity_id)
+        key = self.key(entity)
+        bucket = self.buckets.get(key)
+
+        if bucket is None:
+            self.buckets[key] = {entity_id: entity}
+        else:
+            bucket[entity_id] = entity
+        self.keys[entity_id] = key
+
+    def discard(self, entity_id):
+        """
+        Removes an entity from the index. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity to remove.
+        """
+        if entity_id not in self.keys:
+            return
+        key = self.keys.pop(entity_id)
+        bucket = self.buckets[key]
+        del bucket[entity_id]
+
+        if not bucket:
+            del self.buckets[key]
+
+    def get(self, key):
+        """
+        Retrieves all entities filed under a key.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            list: List of entities, empty if none match.
+        """
+        try:
+            return list(self.buckets.get(key, {}).values())
+        except TypeError:
+            return []
+
+    def first(self, key):
+        """
+        Retrieves the first entity filed under a key.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            object: The entity or None if none match.
+        """
+        try:
+            bucket = self.buckets.get(key)
+        except TypeError:
+            return None
+        return next(iter(bucket.values())) if bucket else None
+
+    def duplicates(self):
+        """
+        Retrieves the entities sharing a key with an earlier one, i.e. every
+        entity of each bucket but the first.
+
+        Returns:
+            list: List of duplicate entities.
+        """
+        return [entity for bucket in self.buckets.values() if len(bucket) > 1
+                for entity in list(bucket.values())[1:]]
+
+    def clear(self):
+        """
+        Removes every entity from the index.
+        """
+        self.buckets.clear()
+        self.keys.clear()
+
+
+class OrderedIndex:
+    """
+    OrderedIndex keeps the entities of a type sorted by a key, so that a
+    page of entities following a given key is found by bisection instead
+    of sorting the whole collection.
+
+    Keys must be distinct, e.g. by ending with the entity ID. The keys are
+    kept sorted as entities are added and removed, so lookups only read
+    the index; entities are usually indexed in key order, which appends
+    to the sorted keys.
+
+    Attributes:
+        key (callable): Function computing the index key of an entity.
+        unique (bool): Always False; an ordered index enforces nothing.
+        keys (dict): The key each indexed entity is filed under, by ID.
+        entities (dict): The indexed entities, by key.
+
+    Methods:
+        add(entity):
+            Indexes an entity, re-keying it if it was already indexed.
+
+        discard(entity_id):
+            Removes an entity from the index.
+
+        order():
+            Retrieves the sorted keys.
+
+        page(after=None, limit=None, low=None, high=None):
+            Retrieves the entities following a key, in key order.
+
+        clear():
+            Removes every entity from the index.
+    """
+
+    unique = False
+
+    def __init__(self, key):
+        self.key = key
+        self.keys = {}
+        self.entities = {}
+        self._order = []
+
+    def add(self, entity):
+        """
+        Indexes an entity, re-keying it if it was already indexed.
+
+        Args:
+            entity (object): The entity to index.
+        """
+        entity_id = entity.id
+        key = self.key(entity)
+
+        if self.keys.get(entity_id) == key:
+            self.entities[key] = entity
+            return
+        if entity_id in self.keys:
+            self.discard(entity_id)
+        self.keys[entity_id] = key
+        self.entities[key] = entity
+        insort(self._order, key)
+
+    def discard(self, entity_id):
+        """
+        Removes an entity from the index. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity to remove.
+        """
+        if entity_id not in self.keys:
+            return
+        key = self.keys.pop(entity_id)
+        del self.entities[key]
+        del self._order[bisect_left(self._order, key)]
+
+    def order(self):
+        """
+        Retrieves the sorted keys.
+
+        Returns:
+            list: The keys, in ascending order.
+        """
+        return self._order
+
+    def page(self, after=None, limit=None, low=None, high=None):
+        """
+        Retrieves the entities following a key, in key order, optionally
+        within bounds on the first component of the keys, e.g. the price
+        of (price, id) keys. Finding the page costs O(log n + limit).
+
+        Args:
+            after (tuple, optional): The key to start after, usually the
+            key of the last entity of the previous page. Defaults to None,
+            starting from the first entity.
+            limit (int, optional): The maximum number of entities.
+            Defaults to None, returning every following entity.
+            low (optional): The inclusive lower bound of the first key
+            component. Defaults to None.
+            high (optional): The inclusive upper bound of the first key
+            component. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key of the last one, or
+            None as the key when no entity follows the page.
+        """
+        order = self.order()
+        start = 0 if after is None else bisect_right(order, after)
+        if low is not None:
+            start = max(start, bisect_left(order, low, key=itemgetter(0)))
+        stop = len(order) if high is None else \
+            bisect_right(order, high, lo=start, key=itemgetter(0))
+        end = stop if limit is None else min(stop, start + limit)
+        keys = order[start:end]
+        entities = [self.entities[key] for key in keys]
+        last = keys[-1] if keys and end < stop else None
+        return entities, last
+
+    def clear(self):
+        """
+        Removes every entity from the index.
+        """
+        self.keys.clear()
+        self.entities.clear()
+        self._order = []
@@ -1,4 +1,11 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from persistence.indexes import creation_key
+from persistence.geo import GridIndex, TilePyramid
+from persistence.search import InvertedIndex
+from persistence.aggregates import Leaderboard, TimeBuckets, \
+    rating_summary
 
 
 class IPersistenceManager(ABC):
@@ -22,6 +29,89 @@ class IPersistenceManager(ABC):
 
         delete(entity_id, entity_type):
             Delete an entity from the persistence layer by its ID and type.
+
+        get_all(entity_type):
+            Retrieve every entity of a type from the persistence layer.
+
+        page(entity_type, limit, after=None):
+            Retrieve a page of entities of a type, by creation date.
+
+        sorted_page(entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+            Retrieve a page of entities of a type, sorted by an attribute.
+
+        select(entity_type, ranges):
+            Retrieve the entities of a type whose numeric attributes fall
+            within ranges.
+
+        spatial_index(entity_type):
+            Build a throwaway spatial index of the entities of a type.
+
+        within(entity_type, south, west, north, east):
+            Retrieve the entities of a type inside a bounding box.
+
+        nearby(entity_type, latitude, longitude, radius_km):
+            Retrieve the entities of a type within a distance of a point.
+
+        get_place_tile(z, x, y):
+            Retrieve the place count and average price of a map tile.
+
+        search_places(query, limit=10):
+            Retrieve the places best matching a full-text query.
+
+        rating_histogram(attribute, value):
+            Count the ratings of the reviews matching an attribute.
+
+        get_place_rating(place_id):
+            Retrieve the rating summary of a place.
+
+        get_user_rating(user_id):
+            Retrieve the rating summary of the reviews of a user.
+
+        resolve_places(ranking, limit, places, city_id=None):
+            Look up the places of a ranking of place IDs.
+
+        top_places(limit=10, city_id=None, places=None):
+            Retrieve the places with the best Bayesian average rating.
+
+        trending_places(window, limit=10, now=None, places=None):
+            Retrieve the places reviewed the most over a recent window.
+
+        before_change(entity):
+            Hook called by the model setters before an attribute changes.
+
+        reindex(entity):
+            Hook called by the model setters after an attribute changed.
+
+        refresh():
+            Hook called before each request to pick up external changes.
+
+        flush():
+            Hook writing the mutations that are still buffered.
+
+        close():
+            Hook releasing the resources held by the implementation.
+
+        transaction(*entity_types):
+            Context manager grouping mutations into one unit of work.
+
+        in_transaction():
+            Hook telling if the calling thread is inside a transaction.
+
+        begin(entity_types=()):
+            Hook starting a transaction.
+
+        prepare():
+            Hook validating the mutations of a transaction.
+
+        commit(end=True):
+            Hook persisting the mutations of a transaction.
+
+        end():
+            Hook ending a transaction committed with end=False.
+
+        rollback():
+            Hook discarding the mutations of a transaction.
     """
     @abstractmethod
     def save(self, entity):
@@ -84,3 +174,465 @@ class IPersistenceManager(ABC):
             subclass.
         """
         pass
+
+    @abstractmethod
+    def get_all(self, entity_type):
+        """
+        Retrieve every entity of a type from the persistence layer.
+
+        Args:
+            entity_type (str): The type of the entities.
+
+        Returns:
+            list: The entities.
+
+        Raises:
+            NotImplementedError: If the method is not implemented by a
+            subclass.
+        """
+        pass
+
+    def page(self, entity_type, limit, after=None):
+        """
+        Retrieve a page of entities of a type, ordered by creation date
+        and then by ID. This default sorts the whole collection;
+        implementations keeping an ordered index should override it.
+
+        Args:
+            entity_type (str): The type of the entities.
+            limit (int): The maximum number of entities.
+            after (tuple, optional): The (created_at, id) key to start
+            after, as returned for the previous page. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key to pass as after for
+            the next page, or None if this is the last page.
+        """
+        entities = sorted(self.get_all(entity_type), key=creation_key)
+
+        if after is not None:
+            entities = [entity for entity in entities
+                        if creation_key(entity) > after]
+        if len(entities) <= limit:
+            return entities, None
+        entities = entities[:limit]
+        return entities, creation_key(entities[-1])
+
+    def sorted_page(self, entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+        """
+        Retrieve a page of entities of a type sorted by an attribute, then
+        by ID, optionally within bounds on the attribute. This default
+        sorts the whole collection; implementations keeping an ordered
+        index on the attribute should override it.
+
+        Args:
+            entity_type (str): The type of the entities.
+            attribute (str): The attribute to sort by.
+            limit (int, optional): The maximum number of entities.
+            Defaults to None, returning every entity.
+            after (tuple, optional): The (value, id) key to start after, as
+            returned for the previous page. Defaults to None.
+            low (optional): The inclusive minimum value. Defaults to None.
+            high (optional): The inclusive maximum value. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key to pass as after for
+            the next page, or None if this is the last page.
+        """
+        keyed = []
+
+        for entity in self.get_all(entity_type):
+            key = (getattr(entity, attribute), entity.id)
+            if (low is None or key[0] >= low) and \
+                    (high is None or key[0] <= high) and \
+                    (after is None or key > after):
+                keyed.append((key, entity))
+        keyed.sort(key=lambda item: item[0])
+        if limit is None or len(keyed) <= limit:
+            return [entity for _, entity in keyed], None
+        return [entity for _, entity in keyed[:limit]], keyed[limit - 1][0]
+
+    def select(self, entity_type, ranges):
+        """
+        Retrieve the entities of a type whose numeric attributes fall
+        within ranges. This default compares the attributes of every
+        entity; implementations keeping a column store should override it.
+
+        Args:
+            entity_type (str): The type of the entities.
+            ranges (dict): The inclusive bounds of each attribute, as
+            {attribute: (low, high)}; either bound may be None.
+
+        Returns:
+            list: The matching entities.
+        """
+        def matches(entity):
+            for name, (low, high) in ranges.items():
+                value = getattr(entity, name)
+                if low is not None and value < low or \
+                        high is not None and value > high:
+                    return False
+            return True
+
+        return [entity for entity in self.get_all(entity_type)
+                if matches(entity)]
+
+    def spatial_index(self, entity_type):
+        """
+        Builds a throwaway spatial index of the entities of a type, for the
+        default within() and nearby().
+
+        Args:
+            entity_type (str): The type of the entities, which must have
+            latitude and longitude attributes.
+
+        Returns:
+            GridIndex: The index.
+        """
+        index = GridIndex(lambda entity: (entity.latitude, entity.longitude))
+
+        for entity in self.get_all(entity_type):
+            index.add(entity)
+        return index
+
+    def within(self, entity_type, south, west, north, east):
+        """
+        Retrieve the entities of a type inside a bounding box. This default
+        indexes the whole collection on every call; implementations keeping
+        a spatial index should override it.
+
+        Args:
+            entity_type (str): The type of the entities.
+            south (float): The minimum latitude.
+            west (float): The western longitude.
+            north (float): The maximum latitude.
+            east (float): The eastern longitude, smaller than west when
+            the box crosses the antimeridian.
+
+        Returns:
+            list: The entities inside the box.
+        """
+        return self.spatial_index(entity_type).within(south, west, north,
+                                                      east)
+
+    def nearby(self, entity_type, latitude, longitude, radius_km):
+        """
+        Retrieve the entities of a type within a distance of a point,
+        nearest first. This default indexes the whole collection on every
+        call; implementations keeping a spatial index should override it.
+
+        Args:
+            entity_type (str): The type of the entities.
+            latitude (float): The latitude of the point.
+            longitude (float): The longitude of the point.
+            radius_km (float): The maximum distance, in kilometers.
+
+        Returns:
+            list: The (distance_km, entity) pairs, nearest first.
+        """
+        return self.spatial_index(entity_type).nearby(latitude, longitude,
+                                                      radius_km)
+
+    def get_place_tile(self, z, x, y):
+        """
+        Retrieve the place count and average price of a map tile and of
+        its clusters. This default aggregates every place on every call;
+        implementations keeping a tile pyramid should override it.
+
+        Args:
+            z (int): The zoom level.
+            x (int): The column of the tile.
+            y (int): The row of the tile.
+
+        Returns:
+            dict: The tile summary, as returned by TilePyramid.tile().
+
+        Raises:
+            ValueError: If the tile does not exist.
+        """
+        pyramid = TilePyramid(
+            lambda place: (place.latitude, place.longitude),
+            lambda place: place.price_per_night)
+
+        for place in self.get_all('Place'):
+            pyramid.add(place)
+        return pyramid.tile(z, x, y)
+
+    def search_places(self, query, limit=10):
+        """
+        Retrieve the places best matching a full-text query over their
+        name, description and address, ranked with BM25. This default
+        tokenizes every place on every call; implementations keeping an
+        inverted index should override it.
+
+        Args:
+            query (str): The query.
+            limit (int, optional): The maximum number of results.
+            Defaults to 10.
+
+        Returns:
+            list: The (score, place) pairs, best first.
+        """
+        index = InvertedIndex(lambda place: (
+            place.name, place.description, place.address))
+
+        for place in self.get_all('Place'):
+            index.add(place)
+        return index.search(query, limit)
+
+    def rating_histogram(self, attribute, value):
+        """
+        Count the ratings of the reviews whose attribute has a value. This
+        default scans every review; implementations keeping running
+        aggregates should override get_place_rating() and
+        get_user_rating().
+
+        Args:
+            attribute (str): The review attribute, such as 'place_id'.
+            value: The value to match.
+
+        Returns:
+            list: The number of ratings of each value, from 1 to 5.
+        """
+        histogram = [0] * 5
+
+        for review in self.get_all('Review'):
+            if getattr(review, attribute) == value:
+                histogram[review.rating - 1] += 1
+        return histogram
+
+    def get_place_rating(self, place_id):
+        """
+        Retrieve the number, sum, average and histogram of the ratings of
+        a place.
+
+        Args:
+            place_id (str): The place ID.
+
+        Returns:
+            dict: The rating summary, as returned by rating_summary().
+        """
+        return rating_summary(self.rating_histogram('place_id', place_id))
+
+    def get_user_rating(self, user_id):
+        """
+        Retrieve the number, sum, average and histogram of the ratings a
+        user gave.
+
+        Args:
+            user_id (str): The user ID.
+
+        Returns:
+            dict: The rating summary, as returned by rating_summary().
+        """
+        return rating_summary(self.rating_histogram('user_id', user_id))
+
+    @staticmethod
+    def resolve_places(ranking, limit, places, city_id=None):
+        """
+        Look up the places of a ranking of place IDs, in order, skipping
+        the places that do not exist or are in another city.
+
+        Args:
+            ranking (iterable): The (score, place_id) pairs, best first.
+            limit (int): The maximum number of places.
+            places (IPersistenceManager): The manager owning the places.
+            city_id (str, optional): The city of the places. Defaults to
+            None, for every city.
+
+        Returns:
+            list: The (score, place) pairs, best first.
+        """
+        results = []
+
+        for score, place_id in ranking:
+            if len(results) == limit:
+                break
+            place = places.get(place_id, 'Place')
+            if place is not None and \
+                    (city_id is None or place.city_id == city_id):
+                results.append((score, place))
+        return results
+
+    def top_places(self, limit=10, city_id=None, places=None):
+        """
+        Retrieve the places with the best Bayesian average rating, which
+        pulls the average of each place towards a prior so that a few
+        ratings do not outrank many. This default aggregates every review
+        on every call; implementations keeping a leaderboard should
+        override it.
+
+        Args:
+            limit (int, optional): The maximum number of places.
+            Defaults to 10.
+            city_id (str, optional): The city of the places. Defaults to
+            None, for every city.
+            places (IPersistenceManager, optional): The manager owning the
+            places, when it does not own the reviews. Defaults to None.
+
+        Returns:
+            list: The (score, place) pairs, best first.
+        """
+        leaderboard = Leaderboard(lambda review: review.place_id,
+                                  lambda review: review.rating)
+
+        for review in self.get_all('Review'):
+            leaderboard.add(review)
+        return self.resolve_places(leaderboard.top(), limit,
+                                   places or self, city_id)
+
+    def trending_places(self, window, limit=10, now=None, places=None):
+        """
+        Retrieve the places that received the most reviews over a recent
+        window. This default counts every review on every call;
+        implementations keeping time-bucketed counters should override
+        it.
+
+        Args:
+            window (timedelta): The length of the window.
+            limit (int, optional): The maximum number of places.
+            Defaults to 10.
+            now (datetime, optional): The end of the window. Defaults to
+            the current time.
+            places (IPersistenceManager, optional): The manager owning the
+            places, when it does not own the reviews. Defaults to None.
+
+        Returns:
+            list: The (review_count, place) pairs, highest count first.
+        """
+        now = now or datetime.now()
+        buckets = TimeBuckets(lambda review: review.place_id,
+                              lambda review: review.created_at)
+
+        for review in self.get_all('Review'):
+            buckets.add(review)
+        return self.resolve_places(buckets.top(now - window, now), limit,
+                                   places or self)
+
+    def before_change(self, entity):
+        """
+        Hook called by the model setters before an attribute of an entity
+        changes. Does nothing unless the implementation restores entities
+        in memory when a transaction is rolled back.
+
+        Args:
+            entity (object): The entity about to change.
+        """
+        pass
+
+    def reindex(self, entity):
+        """
+        Hook called by the model setters after an attribute of an entity
+        changed. Does nothing unless the implementation keeps in-memory
+        indexes.
+
+        Args:
+            entity (object): The entity whose attributes changed.
+        """
+        pass
+
+    def refresh(self):
+        """
+        Hook called before each request to pick up changes made outside
+        this process. Does nothing by default.
+        """
+        pass
+
+    def flush(self):
+        """
+        Hook writing the mutations that are still buffered, for
+        implementations that persist them in the background. Does nothing
+        by default.
+        """
+        pass
+
+    def close(self):
+        """
+        Hook releasing the resources held by the implementation, once every
+        buffered mutation was written. Does nothing by default.
+        """
+        pass
+
+    @contextmanager
+    def transaction(self, *entity_types):
+        """
+        Context manager grouping the mutations made in its block into one
+        unit of work: they are validated and persisted together when the
+        block exits, or rolled back if it raises. Nested transactions join
+        the outermost one.
+
+        Implementations opt in by overriding the begin(), prepare(),
+        commit() and rollback() hooks; by default mutations are persisted
+        as they are made.
+
+        Args:
+            *entity_types (str): The types the block mutates, so that only
+            their storage is locked. Defaults to every type.
+        """
+        if self.in_transaction():
+            yield self
+            return
+        self.begin(entity_types)
+        try:
+            yield self
+            self.prepare()
+            self.commit()
+        except BaseException:
+            self.rollback()
+            raise
+
+    def in_transaction(self):
+        """
+        Hook telling if the calling thread is inside a transaction.
+
+        Returns:
+            bool: False by default.
+        """
+        return False
+
+    def begin(self, entity_types=()):
+        """
+        Hook starting a transaction. Does nothing by default.
+
+        Args:
+            entity_types (tuple, optional): The types the transaction
+            mutates. Defaults to every type.
+        """
+        pass
+
+    def prepare(self):
+        """
+        Hook validating the mutations of a transaction before they are
+        committed. Does nothing by default.
+
+        Raises:
+            ValueError: If the mutations break a constraint.
+        """
+        pass
+
+    def commit(self, end=True):
+        """
+        Hook persisting the mutations of a transaction. Does nothing by
+        default.
+
+        Args:
+            end (bool, optional): Whether the transaction ends. When False,
+            it stays open until end(), and rollback() must still be able
+            to undo it. Defaults to True.
+        """
+        pass
+
+    def end(self):
+        """
+        Hook ending a transaction committed with end=False. Does nothing
+        by default.
+        """
+        pass
+
+    def rollback(self):
+        """
+        Hook discarding the mutations of a transaction. Does nothing by
+        default.
+        """
+        pass
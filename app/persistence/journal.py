@@ -0,0 +1,267 @@
+import json
+import os
+import uuid
+
+
+class Journal:
+    """
+    Journal is an append-only write-ahead log of entity mutations.
+
+    Each mutation is written as one compact JSON record on its own line,
+    so the cost of a write does not depend on the size of the dataset.
+    The DataManager periodically folds the journal into its JSON snapshot
+    (checkpoint) and truncates it. A truncated journal starts with a
+    'begin' record carrying a new generation ID, so processes sharing the
+    journal can tell that the snapshot changed.
+
+    Attributes:
+        journal_file (str): The path to the journal file.
+        fsync (bool): Whether each record is fsynced to disk after being
+        written. On by default, so that an acknowledged mutation survives
+        a power loss or an OS crash; without it only a crash of the
+        process is survived.
+
+    Methods:
+        append(op, entity_type, entity_id, payload=None):
+            Appends one mutation record to the journal.
+
+        write(lines):
+            Appends a batch of encoded records with a single flush.
+
+        replay():
+            Returns the records currently stored in the journal.
+
+        read_from(offset):
+            Returns the records written after a byte offset.
+
+        signature():
+            Returns a cheap fingerprint of the journal file state.
+
+        generation():
+            Returns the generation ID of the journal.
+
+        truncate():
+            Replaces the journal with an empty one once its records have
+            been checkpointed.
+
+        close():
+            Closes the underlying file handle.
+    """
+
+    def __init__(self, journal_file, fsync=True):
+        self.journal_file = journal_file
+        self.fsync = fsync
+        self._file = None
+
+    def _handle(self):
+        """
+        Returns the journal file handle, opening it in append mode
+        if needed.
+        """
+        if self._file is None or self._file.closed:
+            self._file = open(self.journal_file, 'a+b')
+        return self._file
+
+    @staticmethod
+    def discard_torn_tail(file):
+        """
+        Truncates a record left incomplete by a crash mid-append, so that
+        the next record starts on its own line instead of extending the
+        torn one into an undecodable line.
+
+        Args:
+            file (io.BufferedRandom): The journal file handle.
+        """
+        size = end = file.seek(0, os.SEEK_END)
+        if not size:
+            return
+        file.seek(size - 1)
+        if file.read(1) == b'\n':
+            return
+        while end > 0:
+            start = max(0, end - 4096)
+            file.seek(start)
+            newline = file.read(end - start).rfind(b'\n')
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        print("Discarding incomplete journal record")
+        file.truncate(end)
+
+    @staticmethod
+    def encode(op, entity_type, entity_id, payload=None):
+        """
+        Encodes a mutation as a single compact journal line.
+
+        Args:
+            op (str): The operation ('save', 'update' or 'delete').
+            entity_type (str): The type of the entity.
+            entity_id (str): The ID of the entity.
+            payload (dict, optional): The serialized entity for
+            'save' and 'update' operations.
+
+        Returns:
+            str: The encoded record, terminated by a newline.
+        """
+        record = {"op": op, "type": entity_type, "id": entity_id}
+        if payload is not None:
+            record["data"] = payload
+        return json.dumps(record, separators=(',', ':')) + '\n'
+
+    def append(self, op, entity_type, entity_id, payload=None):
+        """
+        Appends one mutation record to the journal.
+
+        Args:
+            op (str): The operation ('save', 'update' or 'delete').
+            entity_type (str): The type of the entity.
+            entity_id (str): The ID of the entity.
+            payload (dict, optional): The serialized entity for
+            'save' and 'update' operations.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        return self.write([self.encode(op, entity_type, entity_id, payload)])
+
+    def write(self, lines):
+        """
+        Appends a batch of encoded records with a single flush (and fsync),
+        so that a group of mutations costs one disk round trip. A torn
+        record left at the end of the journal, by this process or another
+        one sharing it, is discarded first.
+
+        Args:
+            lines (list): The records, as returned by encode().
+
+        Returns:
+            int: The number of bytes written.
+        """
+        file = self._handle()
+        self.discard_torn_tail(file)
+        data = ''.join(lines).encode()
+        file.write(data)
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+        return len(data)
+
+    def replay(self):
+        """
+        Returns the records currently stored in the journal, in the order
+        they were written. A torn last line left by a crash mid-append is
+        ignored.
+
+        Returns:
+            list: List of record dictionaries.
+        """
+        return self.read_from(0)[0]
+
+    def read_from(self, offset):
+        """
+        Returns the complete records written after a byte offset, so that
+        a process can apply only what other processes appended since it
+        last read the journal. 'begin' records are skipped, and so is a
+        torn last line, whether or not it ends with a newline.
+
+        Args:
+            offset (int): The byte offset to start reading at.
+
+        Returns:
+            tuple: The list of record dictionaries and the byte offset
+            following the last complete record.
+        """
+        records = []
+        try:
+            with open(self.journal_file, 'rb') as file:
+                file.seek(offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        print("Skipping incomplete journal record")
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        if file.read(1):
+                            raise
+                        print("Skipping incomplete journal record")
+                        break
+                    if record['op'] != 'begin':
+                        records.append(record)
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return records, offset
+
+    def signature(self):
+        """
+        Returns a cheap fingerprint of the journal file state, used to
+        skip reading the journal when nothing was written to it.
+
+        Returns:
+            tuple: The inode, size and modification time of the file, or
+            None if the journal does not exist.
+        """
+        try:
+            stat = os.stat(self.journal_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def generation(self):
+        """
+        Returns the generation ID of the journal, which changes every time
+        the journal is truncated.
+
+        Returns:
+            str: The generation ID, or None for a journal that was never
+            truncated.
+        """
+        try:
+            with open(self.journal_file, 'rb') as file:
+                line = file.readline()
+        except FileNotFoundError:
+            return None
+        if not line.endswith(b'\n'):
+            return None
+        record = json.loads(line)
+        return record['id'] if record['op'] == 'begin' else None
+
+    def truncate(self):
+        """
+        Replaces the journal with one holding only a 'begin' record with a
+        new generation ID, once its records have been checkpointed. The new
+        journal is renamed over the old one, so processes still holding
+        the old file never see it half written; with fsync, it is synced
+        before the rename and the rename is synced too.
+
+        Returns:
+            str: The new generation ID.
+        """
+        self.close()
+        generation = str(uuid.uuid4())
+        temp_file = self.journal_file + '.tmp'
+        with open(temp_file, 'w') as file:
+            file.write(self.encode('begin', None, generation))
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        os.replace(temp_file, self.journal_file)
+        if self.fsync:
+            # Persist the rename itself
+            directory = os.path.dirname(self.journal_file) or '.'
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        return generation
+
+    def close(self):
+        """
+        Closes the underlying file handle.
+        """
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        self._file = None
@@ -0,0 +1,737 @@
+import threading
+from persistence.ipersistence_manager import IPersistenceManager
+from persistence.repository import Repository
+
+
+class Registry(IPersistenceManager):
+    """
+    Registry is the single entry point to every entity type. Each type is
+    owned by one shard, such as a DataManager on its own JSON file, and
+    every call is routed to the shard of its entity type. Because a shard
+    keeps one instance per entity, joins across types (place -> city ->
+    country, place -> amenities) are plain dictionary lookups.
+
+    Attributes:
+        shards (dict): The persistence manager owning each entity type, as
+        {entity_type: IPersistenceManager}. A manager may own several
+        types.
+        local (threading.local): The managers taking part in the
+        transaction of each thread.
+
+    Methods:
+        shard(entity_type):
+            Retrieves the persistence manager owning an entity type.
+
+        repository(entity_type):
+            Returns a typed repository for an entity type.
+
+        managers():
+            Returns each distinct persistence manager once.
+
+        writer(entity_type):
+            Retrieves the shard to mutate an entity type in.
+
+        lock_metrics():
+            Returns the storage lock metrics of each entity type.
+
+        save(entity):
+            Saves an entity in the shard of its type.
+
+        get(entity_id, entity_type):
+            Retrieves an entity by its ID and type.
+
+        get_all(entity_type):
+            Retrieves every entity of a type.
+
+        page(entity_type, limit, after=None):
+            Retrieves a page of entities of a type, by creation date.
+
+        sorted_page(entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+            Retrieves a page of entities of a type, sorted by an attribute.
+
+        select(entity_type, ranges):
+            Retrieves the entities of a type within numeric ranges.
+
+        within(entity_type, south, west, north, east):
+            Retrieves the entities of a type inside a bounding box.
+
+        nearby(entity_type, latitude, longitude, radius_km):
+            Retrieves the entities of a type within a distance of a point.
+
+        update(entity):
+            Updates an existing entity in the shard of its type.
+
+        delete(entity_id, entity_type):
+            Deletes an entity by its ID and type.
+
+        get_by_email(email):
+            Retrieves a User entity by its email.
+
+        get_country_by_code(country_code):
+            Retrieves a Country entity by its code.
+
+        place_exists_with_attributes(...):
+            Checks if a Place entity exists with the specified attributes.
+
+        review_exists_with_attributes(place_id, user_id):
+            Checks if a Review entity exists with the specified attributes.
+
+        city_exists_with_name_and_country(name, country_id):
+            Checks if a City entity exists with the specified attributes.
+
+        amenity_exists_with_name(name):
+            Checks if an Amenity entity exists with the specified name.
+
+        get_place_tile(z, x, y):
+            Retrieves the place count and average price of a map tile.
+
+        search_places(query, limit=10):
+            Retrieves the places best matching a full-text query.
+
+        get_reviews_by_place_id(place_id):
+            Retrieves all Review entities for a given place.
+
+        get_reviews_by_user_id(user_id):
+            Retrieves all Review entities for a given user.
+
+        get_place_rating(place_id):
+            Retrieves the rating summary of a place.
+
+        get_user_rating(user_id):
+            Retrieves the rating summary of the reviews of a user.
+
+        top_places(limit=10, city_id=None, places=None):
+            Retrieves the places with the best Bayesian average rating.
+
+        trending_places(window, limit=10, now=None, places=None):
+            Retrieves the places reviewed the most over a recent window.
+
+        before_change(entity):
+            Forwards an imminent attribute change to the shard.
+
+        reindex(entity):
+            Forwards an attribute change to the shard of the entity.
+
+        refresh():
+            Refreshes every shard.
+
+        flush():
+            Flushes every shard.
+
+        close():
+            Closes every shard.
+
+        in_transaction():
+            Tells if the calling thread is inside a transaction.
+
+        begin(entity_types=()):
+            Starts a transaction on the shards of some entity types.
+
+        prepare():
+            Validates the transaction of every shard taking part.
+
+        commit(end=True):
+            Commits the transaction of every shard taking part, or none.
+
+        end():
+            Ends the transactions of the shards once all are committed.
+
+        rollback():
+            Rolls back the transaction of every shard taking part.
+    """
+
+    def __init__(self, shards):
+        self.shards = dict(shards)
+        self.local = threading.local()
+        self._repositories = {}
+
+    def shard(self, entity_type):
+        """
+        Retrieves the persistence manager owning an entity type.
+
+        Args:
+            entity_type (str): The type of the entity.
+
+        Returns:
+            IPersistenceManager: The owning manager.
+
+        Raises:
+            ValueError: If no shard owns the entity type.
+        """
+        try:
+            return self.shards[entity_type]
+        except KeyError:
+            raise ValueError(f"Unknown entity type: {entity_type}")
+
+    def repository(self, entity_type):
+        """
+        Returns a typed repository for an entity type.
+
+        Args:
+            entity_type (str): The type of the entities.
+
+        Returns:
+            Repository: The repository, created on first use.
+        """
+        if entity_type not in self._repositories:
+            self.shard(entity_type)
+            self._repositories[entity_type] = Repository(self, entity_type)
+        return self._repositories[entity_type]
+
+    def managers(self):
+        """
+        Returns each distinct persistence manager once, even when it owns
+        several entity types.
+
+        Returns:
+            list: The managers.
+        """
+        managers = {}
+        for manager in self.shards.values():
+            managers.setdefault(id(manager), manager)
+        return list(managers.values())
+
+    def writer(self, entity_type):
+        """
+        Retrieves the shard to mutate an entity type in. Inside a
+        transaction, the shard must have been locked when it began.
+
+        Args:
+            entity_type (str): The type of the entity.
+
+        Returns:
+            IPersistenceManager: The owning manager.
+
+        Raises:
+            ValueError: If no shard owns the entity type.
+            RuntimeError: If the transaction of the calling thread does not
+            include the entity type.
+        """
+        manager = self.shard(entity_type)
+        managers = getattr(self.local, 'managers', None)
+
+        if managers is not None and manager not in managers:
+            raise RuntimeError(
+                f"{entity_type} is not part of the transaction")
+        return manager
+
+    def lock_metrics(self):
+        """
+        Returns the storage lock metrics of each entity type, for the
+        shards that have a reader-writer lock.
+
+        Returns:
+            dict: The metrics by entity type, as returned by
+            RWLock.metrics().
+        """
+        return {entity_type: manager.rwlock.metrics()
+                for entity_type, manager in self.shards.items()
+                if getattr(manager, 'rwlock', None) is not None}
+
+    def save(self, entity):
+        """
+        Saves an entity in the shard of its type.
+
+        Args:
+            entity (object): The entity to save.
+
+        Returns:
+            object: The saved entity.
+        """
+        return self.writer(type(entity).__name__).save(entity)
+
+    def get(self, entity_id, entity_type):
+        """
+        Retrieves an entity by its ID and type.
+
+        Args:
+            entity_id (str): The ID of the entity.
+            entity_type (str): The type of the entity.
+
+        Returns:
+            object: The entity, or None if not found.
+        """
+        if entity_type not in self.shards:
+            return None
+        return self.shards[entity_type].get(entity_id, entity_type)
+
+    def get_all(self, entity_type):
+        """
+        Retrieves every entity of a type.
+
+        Args:
+            entity_type (str): The type of the entities.
+
+        Returns:
+            list: The entities.
+        """
+        if entity_type not in self.shards:
+            return []
+        return self.shards[entity_type].get_all(entity_type)
+
+    def page(self, entity_type, limit, after=None):
+        """
+        Retrieves a page of entities of a type, ordered by creation date.
+
+        Args:
+            entity_type (str): The type of the entities.
+            limit (int): The maximum number of entities.
+            after (tuple, optional): The key to start after, as returned
+            for the previous page. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key of the next page, or
+            None if this is the last page.
+        """
+        if entity_type not in self.shards:
+            return [], None
+        return self.shards[entity_type].page(entity_type, limit, after)
+
+    def sorted_page(self, entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+        """
+        Retrieves a page of entities of a type, sorted by an attribute.
+
+        Args:
+            entity_type (str): The type of the entities.
+            attribute (str): The attribute to sort by.
+            limit (int, optional): The maximum number of entities.
+            after (tuple, optional): The key to start after.
+            low (optional): The inclusive minimum value.
+            high (optional): The inclusive maximum value.
+
+        Returns:
+            tuple: The list of entities and the key of the next page, or
+            None if this is the last page.
+        """
+        if entity_type not in self.shards:
+            return [], None
+        return self.shards[entity_type].sorted_page(
+            entity_type, attribute, limit, after, low, high)
+
+    def select(self, entity_type, ranges):
+        """
+        Retrieves the entities of a type whose numeric attributes fall
+        within ranges.
+
+        Args:
+            entity_type (str): The type of the entities.
+            ranges (dict): The inclusive bounds of each attribute, as
+            {attribute: (low, high)}.
+
+        Returns:
+            list: The matching entities.
+        """
+        if entity_type not in self.shards:
+            return []
+        return self.shards[entity_type].select(entity_type, ranges)
+
+    def within(self, entity_type, south, west, north, east):
+        """
+        Retrieves the entities of a type inside a bounding box.
+
+        Args:
+            entity_type (str): The type of the entities.
+            south (float): The minimum latitude.
+            west (float): The western longitude.
+            north (float): The maximum latitude.
+            east (float): The eastern longitude.
+
+        Returns:
+            list: The entities inside the box.
+        """
+        if entity_type not in self.shards:
+            return []
+        return self.shards[entity_type].within(entity_type, south, west,
+                                               north, east)
+
+    def nearby(self, entity_type, latitude, longitude, radius_km):
+        """
+        Retrieves the entities of a type within a distance of a point.
+
+        Args:
+            entity_type (str): The type of the entities.
+            latitude (float): The latitude of the point.
+            longitude (float): The longitude of the point.
+            radius_km (float): The maximum distance, in kilometers.
+
+        Returns:
+            list: The (distance_km, entity) pairs, nearest first.
+        """
+        if entity_type not in self.shards:
+            return []
+        return self.shards[entity_type].nearby(entity_type, latitude,
+                                               longitude, radius_km)
+
+    def update(self, entity):
+        """
+        Updates an existing entity in the shard of its type.
+
+        Args:
+            entity (object): The entity with updated data.
+
+        Returns:
+            object: The updated entity or None if not found.
+        """
+        return self.writer(type(entity).__name__).update(entity)
+
+    def delete(self, entity_id, entity_type):
+        """
+        Deletes an entity by its ID and type.
+
+        Args:
+            entity_id (str): The ID of the entity.
+            entity_type (str): The type of the entity.
+
+        Returns:
+            bool: True if the entity was deleted, False otherwise.
+        """
+        if entity_type not in self.shards:
+            return False
+        return self.writer(entity_type).delete(entity_id, entity_type)
+
+    def get_by_email(self, email):
+        """
+        Retrieves a User entity by its email.
+
+        Args:
+            email (str): The email of the user.
+
+        Returns:
+            User: The user, or None if not found.
+        """
+        return self.shard('User').get_by_email(email)
+
+    def get_country_by_code(self, country_code):
+        """
+        Retrieves a Country entity by its code.
+
+        Args:
+            country_code (str): The code of the country.
+
+        Returns:
+            Country: The country, or None if not found.
+        """
+        return self.shard('Country').get_country_by_code(country_code)
+
+    def place_exists_with_attributes(self, name, address, city_id, host_id,
+                                     num_rooms, num_bathrooms,
+                                     price_per_night, max_guests):
+        """
+        Checks if a Place entity exists with the specified attributes.
+
+        Args:
+            name (str): The name of the place.
+            address (str): The address of the place.
+            city_id (str): The city ID.
+            host_id (str): The host ID.
+            num_rooms (int): The number of rooms.
+            num_bathrooms (int): The number of bathrooms.
+            price_per_night (float): The price per night.
+            max_guests (int): The maximum number of guests.
+
+        Returns:
+            bool: True if a matching place exists, False otherwise.
+        """
+        return self.shard('Place').place_exists_with_attributes(
+            name, address, city_id, host_id, num_rooms, num_bathrooms,
+            price_per_night, max_guests)
+
+    def review_exists_with_attributes(self, place_id, user_id):
+        """
+        Checks if a Review entity exists with the specified attributes.
+
+        Args:
+            place_id (str): The ID of the place.
+            user_id (str): The ID of the user.
+
+        Returns:
+            bool: True if a matching review exists, False otherwise.
+        """
+        return self.shard('Review').review_exists_with_attributes(
+            place_id, user_id)
+
+    def city_exists_with_name_and_country(self, name, country_id):
+        """
+        Checks if a City entity exists with the specified attributes.
+
+        Args:
+            name (str): The name of the city.
+            country_id (str): The ID of the country.
+
+        Returns:
+            bool: True if a matching city exists, False otherwise.
+        """
+        return self.shard('City').city_exists_with_name_and_country(
+            name, country_id)
+
+    def amenity_exists_with_name(self, name):
+        """
+        Checks if an Amenity entity exists with the specified name.
+
+        Args:
+            name (str): The name of the amenity.
+
+        Returns:
+            bool: True if a matching amenity exists, False otherwise.
+        """
+        return self.shard('Amenity').amenity_exists_with_name(name)
+
+    def get_place_tile(self, z, x, y):
+        """
+        Retrieves the place count and average price of a map tile and of
+        its clusters.
+
+        Args:
+            z (int): The zoom level.
+            x (int): The column of the tile.
+            y (int): The row of the tile.
+
+        Returns:
+            dict: The tile summary.
+        """
+        return self.shard('Place').get_place_tile(z, x, y)
+
+    def search_places(self, query, limit=10):
+        """
+        Retrieves the places best matching a full-text query.
+
+        Args:
+            query (str): The query.
+            limit (int, optional): The maximum number of results.
+            Defaults to 10.
+
+        Returns:
+            list: The (score, place) pairs, best first.
+        """
+        return self.shard('Place').search_places(query, limit)
+
+    def get_reviews_by_place_id(self, place_id):
+        """
+        Retrieves all Review entities for a given place.
+
+        Args:
+            place_id (str): The ID of the place.
+
+        Returns:
+            list: The reviews of the place.
+        """
+        return self.shard('Review').get_reviews_by_place_id(place_id)
+
+    def get_reviews_by_user_id(self, user_id):
+        """
+        Retrieves all Review entities for a given user.
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            list: The reviews of the user.
+        """
+        return self.shard('Review').get_reviews_by_user_id(user_id)
+
+    def get_place_rating(self, place_id):
+        """
+        Retrieves the rating summary of a place.
+
+        Args:
+            place_id (str): The ID of the place.
+
+        Returns:
+            dict: The count, sum, average and histogram of its ratings,
+            empty when no shard owns the reviews.
+        """
+        if 'Review' not in self.shards:
+            return super().get_place_rating(place_id)
+        return self.shards['Review'].get_place_rating(place_id)
+
+    def get_user_rating(self, user_id):
+        """
+        Retrieves the rating summary of the reviews of a user.
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            dict: The count, sum, average and histogram of its ratings,
+            empty when no shard owns the reviews.
+        """
+        if 'Review' not in self.shards:
+            return super().get_user_rating(user_id)
+        return self.shards['Review'].get_user_rating(user_id)
+
+    def top_places(self, limit=10, city_id=None, places=None):
+        """
+        Retrieves the places with the best Bayesian average rating, ranked
+        by the shard of the reviews and looked up in the shard of the
+        places.
+
+        Args:
+            limit (int, optional): The maximum number of places.
+            Defaults to 10.
+            city_id (str, optional): The city of the places. Defaults to
+            None, for every city.
+            places (IPersistenceManager, optional): The manager owning the
+            places. Defaults to None, for the registry.
+
+        Returns:
+            list: The (score, place) pairs, best first.
+        """
+        if 'Review' not in self.shards:
+            return []
+        return self.shards['Review'].top_places(limit, city_id,
+                                                places or self)
+
+    def trending_places(self, window, limit=10, now=None, places=None):
+        """
+        Retrieves the places that received the most reviews over a recent
+        window.
+
+        Args:
+            window (timedelta): The length of the window.
+            limit (int, optional): The maximum number of places.
+            Defaults to 10.
+            now (datetime, optional): The end of the window. Defaults to
+            the current time.
+            places (IPersistenceManager, optional): The manager owning the
+            places. Defaults to None, for the registry.
+
+        Returns:
+            list: The (review_count, place) pairs, highest count first.
+        """
+        if 'Review' not in self.shards:
+            return []
+        return self.shards['Review'].trending_places(window, limit, now,
+                                                     places or self)
+
+    def before_change(self, entity):
+        """
+        Forwards an imminent attribute change to the shard of the entity.
+
+        Args:
+            entity (object): The entity about to change.
+        """
+        manager = self.shards.get(type(entity).__name__)
+        if manager is not None:
+            manager.before_change(entity)
+
+    def reindex(self, entity):
+        """
+        Forwards an attribute change to the shard of the entity.
+
+        Args:
+            entity (object): The entity whose attributes changed.
+        """
+        manager = self.shards.get(type(entity).__name__)
+        if manager is not None:
+            manager.reindex(entity)
+
+    def refresh(self):
+        """
+        Refreshes every shard.
+        """
+        for manager in self.managers():
+            manager.refresh()
+
+    def flush(self):
+        """
+        Flushes every shard.
+        """
+        for manager in self.managers():
+            manager.flush()
+
+    def close(self):
+        """
+        Closes every shard.
+        """
+        for manager in self.managers():
+            manager.close()
+
+    def in_transaction(self):
+        """
+        Tells if the calling thread is inside a transaction.
+
+        Returns:
+            bool: True inside a transaction, False otherwise.
+        """
+        return getattr(self.local, 'managers', None) is not None
+
+    def begin(self, entity_types=()):
+        """
+        Starts a transaction on the shards of some entity types, so that
+        mutations spanning them are grouped. Only these shards are locked,
+        always in the same order, so concurrent transactions cannot
+        deadlock. If a shard fails to begin, the ones already begun are
+        rolled back.
+
+        Args:
+            entity_types (tuple, optional): The types the transaction
+            mutates. Defaults to every type.
+        """
+        if entity_types:
+            wanted = [self.shard(entity_type) for entity_type in entity_types]
+            managers = [manager for manager in self.managers()
+                        if manager in wanted]
+        else:
+            managers = self.managers()
+        begun = []
+        try:
+            for manager in managers:
+                manager.begin(entity_types)
+                begun.append(manager)
+        except BaseException:
+            for manager in reversed(begun):
+                manager.rollback()
+            raise
+        self.local.managers = begun
+
+    def prepare(self):
+        """
+        Validates the transaction of every shard taking part before any of
+        them is committed.
+        """
+        for manager in self.local.managers:
+            manager.prepare()
+
+    def commit(self, end=True):
+        """
+        Commits the transaction of every shard taking part, or none of
+        them. Each shard writes its mutations but keeps its lock and undo
+        log; only once every shard has written are the transactions
+        ended. If a shard fails to write, the transaction must be rolled
+        back, which also undoes the shards that already wrote.
+
+        Args:
+            end (bool, optional): Whether the transaction ends. When False,
+            it stays open until end(). Defaults to True.
+        """
+        for manager in self.local.managers:
+            manager.commit(end=False)
+        if end:
+            self.end()
+
+    def end(self):
+        """
+        Ends the transactions of the shards taking part, once all of them
+        are committed.
+        """
+        managers, self.local.managers = self.local.managers, None
+        for manager in managers:
+            manager.end()
+
+    def rollback(self):
+        """
+        Rolls back the transaction of every shard taking part, including
+        the shards that already committed with end=False. Every shard is
+        rolled back, and thus unlocked, even if another one fails to.
+        """
+        managers, self.local.managers = self.local.managers, None
+        error = None
+        for manager in reversed(managers):
+            try:
+                manager.rollback()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
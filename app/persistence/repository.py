@@ -0,0 +1,121 @@
+class Repository:
+    """
+    Repository gives typed access to the entities of a single type held by
+    a Registry, so callers do not repeat the entity type on every call.
+
+    Attributes:
+        registry (Registry): The registry owning the entities.
+        entity_type (str): The type of the entities.
+
+    Methods:
+        get(entity_id):
+            Retrieves an entity by its ID.
+
+        get_many(entity_ids):
+            Retrieves the entities matching a list of IDs.
+
+        all():
+            Retrieves every entity of the type.
+
+        page(limit, after=None):
+            Retrieves a page of entities, by creation date.
+
+        save(entity):
+            Saves an entity.
+
+        update(entity):
+            Updates an existing entity.
+
+        delete(entity_id):
+            Deletes an entity by its ID.
+    """
+
+    def __init__(self, registry, entity_type):
+        self.registry = registry
+        self.entity_type = entity_type
+
+    def get(self, entity_id):
+        """
+        Retrieves an entity by its ID.
+
+        Args:
+            entity_id (str): The ID of the entity.
+
+        Returns:
+            object: The entity, or None if not found.
+        """
+        return self.registry.get(entity_id, self.entity_type)
+
+    def get_many(self, entity_ids):
+        """
+        Retrieves the entities matching a list of IDs, in the same order,
+        skipping the IDs that are not found.
+
+        Args:
+            entity_ids (list): The IDs of the entities.
+
+        Returns:
+            list: The entities found.
+        """
+        entities = (self.get(entity_id) for entity_id in entity_ids)
+        return [entity for entity in entities if entity is not None]
+
+    def all(self):
+        """
+        Retrieves every entity of the type.
+
+        Returns:
+            list: The entities.
+        """
+        return self.registry.get_all(self.entity_type)
+
+    def page(self, limit, after=None):
+        """
+        Retrieves a page of entities, ordered by creation date.
+
+        Args:
+            limit (int): The maximum number of entities.
+            after (tuple, optional): The key to start after, as returned
+            for the previous page. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key of the next page, or
+            None if this is the last page.
+        """
+        return self.registry.page(self.entity_type, limit, after)
+
+    def save(self, entity):
+        """
+        Saves an entity.
+
+        Args:
+            entity (object): The entity to save.
+
+        Returns:
+            object: The saved entity.
+        """
+        return self.registry.save(entity)
+
+    def update(self, entity):
+        """
+        Updates an existing entity.
+
+        Args:
+            entity (object): The entity with updated data.
+
+        Returns:
+            object: The updated entity or None if not found.
+        """
+        return self.registry.update(entity)
+
+    def delete(self, entity_id):
+        """
+        Deletes an entity by its ID.
+
+        Args:
+            entity_id (str): The ID of the entity.
+
+        Returns:
+            bool: True if the entity was deleted, False otherwise.
+        """
+        return self.registry.delete(entity_id, self.entity_type)
@@ -0,0 +1,242 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    RWLock is a reader-writer lock: any number of threads may read at the
+    same time, while a writer gets exclusive access.
+
+    Writers are preferred: once a writer waits, new readers queue behind
+    it, so a steady stream of reads cannot starve writes. In turn, the
+    readers waiting when a writer releases the lock go before the next
+    writer, so back-to-back writes cannot starve reads. Both sides are
+    re-entrant, and a thread holding the write lock may also read; a
+    reader cannot upgrade to writing, since two upgrading readers would
+    wait for each other forever.
+
+    The time spent waiting for the lock is recorded for each side, to
+    tell whether threads are contending for the storage.
+
+    Methods:
+        acquire_read(blocking=True):
+            Acquires the lock for reading.
+
+        release_read():
+            Releases a read acquisition.
+
+        acquire_write():
+            Acquires the lock for writing.
+
+        release_write():
+            Releases a write acquisition.
+
+        read():
+            Context manager holding the lock for reading.
+
+        write():
+            Context manager holding the lock for writing.
+
+        metrics():
+            Returns the lock acquisition and wait-time counters.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._local = threading.local()
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._readers_waiting = 0
+        self._read_turn = False
+        self._metrics = {
+            side: {'acquisitions': 0, 'contended': 0,
+                   'wait_total': 0.0, 'wait_max': 0.0}
+            for side in ('read', 'write')
+        }
+
+    def _record(self, side, waited):
+        """
+        Records one acquisition. Must be called with the condition held.
+
+        Args:
+            side (str): 'read' or 'write'.
+            waited (float): The seconds spent waiting for the lock.
+        """
+        metrics = self._metrics[side]
+        metrics['acquisitions'] += 1
+        if waited:
+            metrics['contended'] += 1
+            metrics['wait_total'] += waited
+            metrics['wait_max'] = max(metrics['wait_max'], waited)
+
+    def acquire_read(self, blocking=True):
+        """
+        Acquires the lock for reading, waiting while a writer holds the
+        lock or waits for it.
+
+        Args:
+            blocking (bool, optional): Whether to wait for the lock.
+            Defaults to True.
+
+        Returns:
+            bool: True if the lock was acquired, False if blocking is False
+            and a writer holds the lock or waits for it.
+        """
+        reads = getattr(self._local, 'reads', 0)
+        if reads:
+            self._local.reads = reads + 1
+            return True
+        if self._writer == threading.get_ident():
+            # Reading under our own write lock does not count as a reader
+            self._local.reads = 1
+            self._local.counted = False
+            return True
+        with self._condition:
+            waited = 0.0
+            if self._must_wait_to_read():
+                if not blocking:
+                    return False
+                start = time.perf_counter()
+                self._readers_waiting += 1
+                while self._must_wait_to_read():
+                    self._condition.wait()
+                self._readers_waiting -= 1
+                if not self._readers_waiting:
+                    self._read_turn = False
+                waited = time.perf_counter() - start
+            self._readers += 1
+            self._record('read', waited)
+        self._local.reads = 1
+        self._local.counted = True
+        return True
+
+    def _must_wait_to_read(self):
+        """
+        Tells if a new reader must wait. Must be called with the condition
+        held.
+        """
+        return self._writer is not None or \
+            (self._writers_waiting and not self._read_turn)
+
+    def _must_wait_to_write(self):
+        """
+        Tells if a new writer must wait. Must be called with the condition
+        held.
+        """
+        return self._writer is not None or self._readers or self._read_turn
+
+    def release_read(self):
+        """
+        Releases a read acquisition.
+        """
+        self._local.reads -= 1
+        if self._local.reads or not self._local.counted:
+            return
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Acquires the lock for writing, waiting until no other thread reads
+        or writes.
+
+        Raises:
+            RuntimeError: If the calling thread holds the lock for reading
+            only.
+        """
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, 'reads', 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+        with self._condition:
+            waited = 0.0
+            if self._must_wait_to_write():
+                start = time.perf_counter()
+                self._writers_waiting += 1
+                while self._must_wait_to_write():
+                    self._condition.wait()
+                self._writers_waiting -= 1
+                waited = time.perf_counter() - start
+            self._writer = me
+            self._write_depth = 1
+            self._record('write', waited)
+
+    def release_write(self):
+        """
+        Releases a write acquisition.
+        """
+        self._write_depth -= 1
+        if self._write_depth:
+            return
+        with self._condition:
+            self._writer = None
+            if self._readers_waiting:
+                self._read_turn = True
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        """
+        Context manager holding the lock for reading.
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """
+        Context manager holding the lock for writing.
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def metrics(self):
+        """
+        Returns the lock acquisition and wait-time counters.
+
+        Returns:
+            dict: For 'read' and 'write', the number of acquisitions, how
+            many of them had to wait, and the total and longest wait in
+            seconds.
+        """
+        with self._condition:
+            return {side: dict(metrics)
+                    for side, metrics in self._metrics.items()}
+
+
+def read_locked(method):
+    """
+    Decorator running a method with the read side of the instance's
+    rwlock held.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.rwlock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def write_locked(method):
+    """
+    Decorator running a method with the write side of the instance's
+    rwlock held.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.rwlock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,197 @@
+import heapq
+import math
+import re
+import unicodedata
+import zlib
+
+TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """
+    Splits a text into lowercase terms, without accents.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list: The terms, in order.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return TOKEN.findall(text.casefold())
+
+
+class InvertedIndex:
+    """
+    InvertedIndex is a full-text index mapping each term to the entities
+    containing it, ranked with BM25.
+
+    Each entity is indexed as one document made of its text fields. The
+    term counts of every document can be saved and restored, so that a
+    restart does not tokenize every entity again: a restored document is
+    reused when the checksum of its text still matches.
+
+    Attributes:
+        fields (callable): Function returning the texts of an entity.
+        k1 (float): The BM25 term frequency saturation.
+        b (float): The BM25 document length normalization.
+        unique (bool): Always False; a full-text index enforces nothing.
+        postings (dict): The term frequency of each term in each document,
+        as {term: {id: count}}.
+        keys (dict): The checksum and term counts of each document, by ID.
+        lengths (dict): The number of terms of each document, by ID.
+        entities (dict): The indexed entities, by ID.
+
+    Methods:
+        add(entity):
+            Indexes an entity, replacing its previous document.
+
+        discard(entity_id):
+            Removes an entity from the index.
+
+        search(query, limit=10):
+            Retrieves the best matching entities.
+
+        dump():
+            Returns the documents, to be saved.
+
+        restore(documents):
+            Offers saved documents to the next add() calls.
+
+        clear():
+            Removes every entity from the index.
+    """
+
+    unique = False
+
+    def __init__(self, fields, k1=1.2, b=0.75):
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.keys = {}
+        self.lengths = {}
+        self.entities = {}
+        self.restored = {}
+        self.total_length = 0
+
+    def add(self, entity):
+        """
+        Indexes an entity, replacing its previous document.
+
+        Args:
+            entity (object): The entity to index.
+        """
+        entity_id = entity.id
+        text = '\n'.join(field or '' for field in self.fields(entity))
+        checksum = zlib.crc32(text.encode())
+        document = self.keys.get(entity_id)
+
+        if document is not None and document[0] == checksum:
+            self.entities[entity_id] = entity
+            return
+        self.discard(entity_id)
+        restored = self.restored.pop(entity_id, None)
+        if restored is not None and restored[0] == checksum:
+            counts = restored[1]
+        else:
+            counts = {}
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[entity_id] = count
+        self.keys[entity_id] = (checksum, counts)
+        self.lengths[entity_id] = sum(counts.values())
+        self.entities[entity_id] = entity
+        self.total_length += self.lengths[entity_id]
+
+    def discard(self, entity_id):
+        """
+        Removes an entity from the index. Unknown IDs are ignored.
+
+        Args:
+            entity_id (str): The ID of the entity to remove.
+        """
+        document = self.keys.pop(entity_id, None)
+
+        if document is None:
+            return
+        del self.entities[entity_id]
+        counts = document[1]
+        for term in counts:
+            posting = self.postings[term]
+            del posting[entity_id]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(entity_id)
+
+    def search(self, query, limit=10):
+        """
+        Retrieves the entities best matching a query, ranked with BM25.
+        Only the documents containing a query term are scored, and the
+        best ones are picked with a heap.
+
+        Args:
+            query (str): The query.
+            limit (int, optional): The maximum number of results.
+            Defaults to 10.
+
+        Returns:
+            list: The (score, entity) pairs, best first.
+        """
+        count = len(self.keys)
+
+        if not count:
+            return []
+        average_length = self.total_length / count
+        scores = {}
+
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (count - len(posting) + 0.5) /
+                           (len(posting) + 0.5))
+            for entity_id, frequency in posting.items():
+                norm = self.k1 * (1 - self.b + self.b *
+                                  self.lengths[entity_id] / average_length)
+                scores[entity_id] = scores.get(entity_id, 0.0) + \
+                    idf * frequency * (self.k1 + 1) / (frequency + norm)
+        best = heapq.nlargest(limit, scores.items(),
+                              key=lambda item: (item[1], item[0]))
+        return [(score, self.entities[entity_id])
+                for entity_id, score in best]
+
+    def dump(self):
+        """
+        Returns the documents, to be saved and later restored.
+
+        Returns:
+            dict: The checksum and term counts of each document, by ID.
+        """
+        return {entity_id: [checksum, counts]
+                for entity_id, (checksum, counts) in self.keys.items()}
+
+    def restore(self, documents):
+        """
+        Offers saved documents to the next add() calls, which reuse them
+        instead of tokenizing entities whose text did not change.
+
+        Args:
+            documents (dict): The documents, as returned by dump().
+        """
+        self.restored = {entity_id: (checksum, counts)
+                         for entity_id, (checksum, counts)
+                         in documents.items()}
+
+    def clear(self):
+        """
+        Removes every entity from the index. Restored documents are kept
+        until they are used.
+        """
+        self.postings.clear()
+        self.keys.clear()
+        self.lengths.clear()
+        self.entities.clear()
+        self.total_length = 0
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import tempfile
+
+
+class Snapshot:
+    """
+    Snapshot reads and writes the JSON file holding the full state of a
+    DataManager.
+
+    A snapshot is written to a temporary file in the same directory,
+    fsynced and renamed over the previous one, so a crash or a concurrent
+    reader only ever sees a complete file. Its last key is a checksum of
+    the bytes preceding it, so the file stays valid JSON and a damaged one
+    is detected when it is loaded. Files written without a checksum are
+    still accepted.
+
+    Attributes:
+        file_path (str): The path to the snapshot file.
+
+    Methods:
+        read():
+            Reads and verifies the snapshot.
+
+        write(data):
+            Atomically replaces the snapshot with new data.
+
+        write_encoded(content):
+            Atomically replaces the snapshot with already encoded JSON.
+    """
+
+    CHECKSUM_KEY = '__checksum__'
+    FOOTER = b'"' + CHECKSUM_KEY.encode() + b'": "'
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    @staticmethod
+    def checksum(content):
+        """
+        Computes the checksum of the serialized data.
+
+        Args:
+            content (bytes): The snapshot bytes preceding the checksum.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest.
+        """
+        return hashlib.sha256(content).hexdigest()
+
+    def read(self):
+        """
+        Reads the snapshot and verifies its checksum.
+
+        Returns:
+            dict: The stored data, without the checksum.
+
+        Raises:
+            FileNotFoundError: If the snapshot does not exist.
+            ValueError: If the file is truncated or its checksum does not
+            match its content.
+        """
+        with open(self.file_path, 'rb') as file:
+            content = file.read()
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise ValueError(f"Corrupted snapshot {self.file_path}: {e}")
+        expected = data.pop(self.CHECKSUM_KEY, None)
+        if expected is not None:
+            prefix = content[:content.rfind(self.FOOTER)].rstrip()
+            if prefix.endswith(b','):
+                prefix = prefix[:-1]
+            if self.checksum(prefix) != expected:
+                raise ValueError(
+                    f"Checksum mismatch in snapshot {self.file_path}")
+        return data
+
+    def write(self, data):
+        """
+        Atomically replaces the snapshot with new data.
+
+        Args:
+            data (dict): The data to store.
+        """
+        self.write_encoded(json.dumps(data, indent=4).encode())
+
+    def write_encoded(self, content):
+        """
+        Atomically replaces the snapshot with already encoded JSON.
+
+        Args:
+            content (bytes): A JSON object, indented by 4 spaces.
+        """
+        body = content[:-1].rstrip()
+        footer = b'%s\n    %s%s"\n}\n' % (
+            b'' if body == b'{' else b',', self.FOOTER,
+            self.checksum(body).encode())
+        directory = os.path.dirname(self.file_path) or '.'
+        fd, temp_file = tempfile.mkstemp(
+            dir=directory, prefix=os.path.basename(self.file_path),
+            suffix='.tmp')
+        try:
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, 'wb') as file:
+                file.write(body)
+                file.write(footer)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_file, self.file_path)
+        except BaseException:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,724 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import nullcontext
+from models.iso_countries import ISO_COUNTRIES
+from persistence.ipersistence_manager import IPersistenceManager
+from persistence.snapshot import Snapshot
+from persistence.indexes import creation_key
+
+
+class SQLiteDataManager(IPersistenceManager):
+    """
+    SQLiteDataManager implements the IPersistenceManager interface on top
+    of a SQLite database, for datasets that do not fit comfortably in
+    memory.
+
+    Each entity type has its own table holding the serialized entity plus
+    the columns used by the lookup methods, which are backed by real
+    indexes. The database runs in WAL mode so readers do not block the
+    writer, and each thread uses its own connection.
+
+    Attributes:
+        database (str): The path to the SQLite database file.
+        TABLES (dict): The indexed columns of each entity type, as
+        {entity_type: {column: function computing it from an entity}}.
+        INDEXES (dict): The indexes of each entity type, as
+        {entity_type: [tuple of columns]}.
+
+    Methods:
+        connection():
+            Returns the connection of the calling thread.
+
+        writing():
+            Returns a context manager committing the writes of a block.
+
+        create_schema():
+            Creates the tables and indexes if they do not exist.
+
+        import_json(data_file):
+            Imports the entities of a DataManager JSON file.
+
+        get_entity_class(entity_type):
+            Retrieves the model class of an entity type.
+
+        row_to_entity(entity_type, row):
+            Rebuilds an entity from the serialized data of a row.
+
+        query(entity_type, where, params):
+            Retrieves the entities of a type matching a WHERE clause.
+
+        exists(entity_type, where, params):
+            Checks if an entity of a type matches a WHERE clause.
+
+        write(entity):
+            Inserts or replaces the row of an entity, without committing.
+
+        save(entity):
+            Saves an entity, replacing any entity with the same ID.
+
+        get(entity_id, entity_type):
+            Retrieves an entity by its ID and type.
+
+        get_all(entity_type):
+            Retrieves every entity of a type.
+
+        page(entity_type, limit, after=None):
+            Retrieves a page of entities of a type, by creation date.
+
+        sorted_page(entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+            Retrieves a page of entities of a type, sorted by a column.
+
+        select(entity_type, ranges):
+            Retrieves the entities of a type within numeric ranges.
+
+        get_by_email(email):
+            Retrieves a User entity by its email.
+
+        get_country_by_code(country_code):
+            Retrieves a Country entity by its code.
+
+        place_exists_with_attributes(...):
+            Checks if a Place entity exists with the specified attributes.
+
+        review_exists_with_attributes(place_id, user_id):
+            Checks if a Review entity exists with the specified attributes.
+
+        city_exists_with_name_and_country(name, country_id):
+            Checks if a City entity exists with the specified attributes.
+
+        amenity_exists_with_name(name):
+            Checks if an Amenity entity exists with the specified name.
+
+        get_reviews_by_place_id(place_id):
+            Retrieves all Review entities for a given place.
+
+        get_reviews_by_user_id(user_id):
+            Retrieves all Review entities for a given user.
+
+        rating_histogram(attribute, value):
+            Counts the ratings of the reviews matching an attribute.
+
+        update(entity):
+            Updates an existing entity.
+
+        delete(entity_id, entity_type):
+            Deletes an entity by its ID and type.
+
+        close():
+            Closes the connection of the calling thread.
+
+        in_transaction():
+            Tells if the calling thread is inside a transaction.
+
+        begin(entity_types=()):
+            Starts a database transaction on the calling thread.
+
+        commit(end=True):
+            Commits the transaction of the calling thread.
+
+        end():
+            Commits a transaction left open by commit(end=False).
+
+        rollback():
+            Rolls back the transaction of the calling thread.
+    """
+
+    TABLES = {
+        'User': {
+            'email': lambda user: user.email,
+        },
+        'Country': {
+            'code': lambda country: country.code,
+        },
+        'Place': {
+            'name': lambda place: place.name,
+            'address': lambda place: place.address,
+            'city_id': lambda place: place.city_id,
+            'host_id': lambda place: place.host_id,
+            'num_rooms': lambda place: place.num_rooms,
+            'num_bathrooms': lambda place: place.num_bathrooms,
+            'price_per_night': lambda place: place.price_per_night,
+            'max_guests': lambda place: place.max_guests,
+        },
+        'Review': {
+            'place_id': lambda review: review.place_id,
+            'user_id': lambda review: review.user_id,
+        },
+        'City': {
+            'name': lambda city: city.name,
+            'country_id': lambda city: city.country_id,
+        },
+        'Amenity': {
+            'name': lambda amenity: amenity.name,
+        },
+    }
+
+    INDEXES = {
+        'User': [('email',)],
+        'Country': [('code',)],
+        'Place': [('name', 'address', 'city_id', 'host_id'),
+                  ('price_per_night',)],
+        'Review': [('place_id', 'user_id'), ('user_id',)],
+        'City': [('name', 'country_id'), ('country_id',)],
+        'Amenity': [('name',)],
+    }
+
+    CREATED_AT = "json_extract(data, '$.created_at')"
+
+    def __init__(self, database):
+        self.database = database
+        self._local = threading.local()
+        directory = os.path.dirname(database)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.create_schema()
+
+    def connection(self):
+        """
+        Returns the connection of the calling thread, opening it on first
+        use. sqlite3 connections must not be shared between threads.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.database)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def writing(self):
+        """
+        Returns a context manager committing the writes made in its block,
+        or rolling them back if it raises. Inside a transaction the writes
+        are left for the transaction to commit.
+
+        Returns:
+            The context manager, yielding the connection.
+        """
+        if self.in_transaction():
+            return nullcontext(self.connection())
+        return self.connection()
+
+    def create_schema(self):
+        """
+        Creates the tables and indexes if they do not exist.
+        """
+        connection = self.connection()
+
+        with connection:
+            for entity_type, columns in self.TABLES.items():
+                column_list = ''.join(f', "{column}"' for column in columns)
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{entity_type}" '
+                    f'(id TEXT PRIMARY KEY, data TEXT NOT NULL'
+                    f'{column_list})')
+                for index_columns in self.INDEXES[entity_type]:
+                    name = f'idx_{entity_type}_' + '_'.join(index_columns)
+                    column_names = ', '.join(f'"{column}"'
+                                             for column in index_columns)
+                    connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{name}" '
+                        f'ON "{entity_type}" ({column_names})')
+                connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{entity_type}_created" '
+                    f'ON "{entity_type}" ({self.CREATED_AT}, id)')
+
+    def import_json(self, data_file):
+        """
+        Imports the entities of a DataManager JSON file in one transaction.
+
+        Args:
+            data_file (str): The path to the JSON file.
+
+        Returns:
+            int: The number of entities imported.
+        """
+        data = Snapshot(data_file).read()
+        count = 0
+
+        with self.writing():
+            for entity_type, entities in data.items():
+                entity_class = self.get_entity_class(entity_type)
+                for entity_data in entities.values():
+                    self.write(entity_class.hydrate(entity_data, self))
+                    count += 1
+        return count
+
+    @staticmethod
+    def get_entity_class(entity_type):
+        """
+        Retrieves the model class of an entity type.
+
+        Args:
+            entity_type (str): The type of the entity.
+
+        Returns:
+            type: The model class.
+        """
+        module = __import__('models.' + entity_type.lower(),
+                            fromlist=[entity_type])
+        return getattr(module, entity_type)
+
+    def row_to_entity(self, entity_type, row):
+        """
+        Rebuilds an entity from the serialized data of a row.
+
+        Args:
+            entity_type (str): The type of the entity.
+            row (tuple): A row whose first column is the entity data.
+
+        Returns:
+            object: The entity, or None if there is no row.
+        """
+        if row is None:
+            return None
+        return self.get_entity_class(entity_type).hydrate(
+            json.loads(row[0]), self)
+
+    def query(self, entity_type, where, params):
+        """
+        Retrieves the entities of a type matching a WHERE clause.
+
+        Args:
+            entity_type (str): The type of the entities.
+            where (str): The WHERE clause, with '?' placeholders.
+            params (tuple): The values of the placeholders.
+
+        Returns:
+            list: List of entities.
+        """
+        rows = self.connection().execute(
+            f'SELECT data FROM "{entity_type}" WHERE {where} ORDER BY rowid',
+            params)
+        return [self.row_to_entity(entity_type, row) for row in rows]
+
+    def exists(self, entity_type, where, params):
+        """
+        Checks if an entity of a type matches a WHERE clause.
+
+        Args:
+            entity_type (str): The type of the entities.
+            where (str): The WHERE clause, with '?' placeholders.
+            params (tuple): The values of the placeholders.
+
+        Returns:
+            bool: True if an entity matches, False otherwise.
+        """
+        row = self.connection().execute(
+            f'SELECT 1 FROM "{entity_type}" WHERE {where} LIMIT 1',
+            params).fetchone()
+        return row is not None
+
+    def write(self, entity):
+        """
+        Inserts or replaces the row of an entity, without committing.
+
+        Args:
+            entity (object): The entity to write.
+        """
+        entity_type = type(entity).__name__
+        columns = self.TABLES[entity_type]
+        names = ''.join(f', "{column}"' for column in columns)
+        placeholders = ', ?' * len(columns)
+        values = [entity.id, json.dumps(entity.to_dict())]
+        values += [column(entity) for column in columns.values()]
+        self.connection().execute(
+            f'INSERT OR REPLACE INTO "{entity_type}" (id, data{names}) '
+            f'VALUES (?, ?{placeholders})', values)
+
+    def save(self, entity):
+        """
+        Saves an entity, replacing any entity with the same ID.
+
+        Args:
+            entity (object): The entity to save.
+
+        Returns:
+            object: The saved entity.
+        """
+        with self.writing():
+            self.write(entity)
+        return entity
+
+    def get(self, entity_id, entity_type):
+        """
+        Retrieves an entity by its ID and type.
+
+        Args:
+            entity_id (str): The ID of the entity.
+            entity_type (str): The type of the entity.
+
+        Returns:
+            object: The retrieved entity or None if not found.
+        """
+        if entity_type not in self.TABLES:
+            return None
+        row = self.connection().execute(
+            f'SELECT data FROM "{entity_type}" WHERE id = ?',
+            (entity_id,)).fetchone()
+        return self.row_to_entity(entity_type, row)
+
+    def get_all(self, entity_type):
+        """
+        Retrieves every entity of a type.
+
+        Args:
+            entity_type (str): The type of the entities.
+
+        Returns:
+            list: List of entities, in insertion order.
+        """
+        return self.query(entity_type, '1', ())
+
+    def page(self, entity_type, limit, after=None):
+        """
+        Retrieves a page of entities of a type, ordered by creation date,
+        with a keyset query on the creation index.
+
+        Args:
+            entity_type (str): The type of the entities.
+            limit (int): The maximum number of entities.
+            after (tuple, optional): The (created_at, id) key to start
+            after, as returned for the previous page. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key to pass as after for
+            the next page, or None if this is the last page.
+        """
+        if entity_type not in self.TABLES:
+            return [], None
+        where, params = '', [limit + 1]
+
+        if after is not None:
+            where = f'WHERE ({self.CREATED_AT}, id) > (?, ?) '
+            params = [after[0], after[1], limit + 1]
+        rows = self.connection().execute(
+            f'SELECT data FROM "{entity_type}" {where}'
+            f'ORDER BY {self.CREATED_AT}, id LIMIT ?', params).fetchall()
+        entities = [self.row_to_entity(entity_type, row)
+                    for row in rows[:limit]]
+        if len(rows) <= limit:
+            return entities, None
+        return entities, creation_key(entities[-1])
+
+    def sorted_page(self, entity_type, attribute, limit=None, after=None,
+                    low=None, high=None):
+        """
+        Retrieves a page of entities of a type sorted by a column, then by
+        ID, with a keyset query. Attributes without a column are sorted in
+        Python.
+
+        Args:
+            entity_type (str): The type of the entities.
+            attribute (str): The attribute to sort by.
+            limit (int, optional): The maximum number of entities.
+            Defaults to None, returning every entity.
+            after (tuple, optional): The (value, id) key to start after, as
+            returned for the previous page. Defaults to None.
+            low (optional): The inclusive minimum value. Defaults to None.
+            high (optional): The inclusive maximum value. Defaults to None.
+
+        Returns:
+            tuple: The list of entities and the key to pass as after for
+            the next page, or None if this is the last page.
+        """
+        if attribute not in self.TABLES.get(entity_type, {}):
+            return super().sorted_page(entity_type, attribute, limit, after,
+                                       low, high)
+        conditions, params = ['1'], []
+        if after is not None:
+            conditions.append(f'("{attribute}", id) > (?, ?)')
+            params += list(after)
+        if low is not None:
+            conditions.append(f'"{attribute}" >= ?')
+            params.append(low)
+        if high is not None:
+            conditions.append(f'"{attribute}" <= ?')
+            params.append(high)
+        params.append(-1 if limit is None else limit + 1)
+        rows = self.connection().execute(
+            f'SELECT data FROM "{entity_type}" '
+            f'WHERE {" AND ".join(conditions)} '
+            f'ORDER BY "{attribute}", id LIMIT ?', params).fetchall()
+        entities = [self.row_to_entity(entity_type, row)
+                    for row in rows[:limit]]
+        if limit is None or len(rows) <= limit:
+            return entities, None
+        return entities, (getattr(entities[-1], attribute), entities[-1].id)
+
+    def select(self, entity_type, ranges):
+        """
+        Retrieves the entities of a type whose numeric attributes fall
+        within ranges, filtering on the indexed columns in SQL. Attributes
+        without a column are compared in Python.
+
+        Args:
+            entity_type (str): The type of the entities.
+            ranges (dict): The inclusive bounds of each attribute, as
+            {attribute: (low, high)}; either bound may be None.
+
+        Returns:
+            list: The matching entities.
+        """
+        columns = self.TABLES.get(entity_type, {})
+
+        if not set(ranges) <= set(columns):
+            return super().select(entity_type, ranges)
+        conditions, params = ['1'], []
+        for name, (low, high) in ranges.items():
+            if low is not None:
+                conditions.append(f'"{name}" >= ?')
+                params.append(low)
+            if high is not None:
+                conditions.append(f'"{name}" <= ?')
+                params.append(high)
+        return self.query(entity_type, ' AND '.join(conditions), params)
+
+    def get_by_email(self, email):
+        """
+        Retrieves a User entity by its email.
+
+        Args:
+            email (str): The email of the user.
+
+        Returns:
+            object: The User entity or None if not found.
+        """
+        users = self.query('User', 'email = ?', (email,))
+        return users[0] if users else None
+
+    def get_country_by_code(self, country_code):
+        """
+        Retrieves a Country entity by its code. A code that is not stored
+        as given, such as 'fr' or 'FRA', is converted to its ISO 3166-1
+        alpha-2 code.
+
+        Args:
+            country_code (str): The code of the country.
+
+        Returns:
+            object: The Country entity or None if not found.
+        """
+        countries = self.query('Country', 'code = ?', (country_code,))
+
+        if not countries:
+            code = ISO_COUNTRIES.normalize_code(country_code)
+            if code != country_code:
+                countries = self.query('Country', 'code = ?', (code,))
+        return countries[0] if countries else None
+
+    def place_exists_with_attributes(self, name, address, city_id, host_id,
+                                     num_rooms, num_bathrooms,
+                                     price_per_night, max_guests):
+        """
+        Checks if a Place entity exists with the specified attributes.
+
+        Args:
+            name (str): The name of the place.
+            address (str): The address of the place.
+            city_id (str): The city ID.
+            host_id (str): The host ID.
+            num_rooms (int): The number of rooms.
+            num_bathrooms (int): The number of bathrooms.
+            price_per_night (float): The price per night.
+            max_guests (int): The maximum number of guests.
+
+        Returns:
+            bool: True if the place exists, False otherwise.
+        """
+        return self.exists(
+            'Place',
+            'name = ? AND address = ? AND city_id = ? AND host_id = ? AND '
+            'num_rooms = ? AND num_bathrooms = ? AND price_per_night = ? AND '
+            'max_guests = ?',
+            (name, address, city_id, host_id, num_rooms, num_bathrooms,
+             price_per_night, max_guests))
+
+    def review_exists_with_attributes(self, place_id, user_id):
+        """
+        Checks if a Review entity exists with the specified attributes.
+
+        Args:
+            place_id (str): The place ID.
+            user_id (str): The user ID.
+
+        Returns:
+            bool: True if the review exists, False otherwise.
+        """
+        return self.exists('Review', 'place_id = ? AND user_id = ?',
+                           (place_id, user_id))
+
+    def city_exists_with_name_and_country(self, name, country_id):
+        """
+        Checks if a City entity exists with the specified attributes.
+
+        Args:
+            name (str): The name of the city.
+            country_id (str): The country ID.
+
+        Returns:
+            bool: True if the city exists, False otherwise.
+        """
+        return self.exists('City', 'name = ? AND country_id = ?',
+                           (name, country_id))
+
+    def amenity_exists_with_name(self, name):
+        """
+        Checks if an Amenity entity exists with the specified name.
+
+        Args:
+            name (str): The name of the amenity.
+
+        Returns:
+            bool: True if the amenity exists, False otherwise.
+        """
+        return self.exists('Amenity', 'name = ?', (name,))
+
+    def get_reviews_by_place_id(self, place_id):
+        """
+        Retrieves all Review entities for a given place.
+
+        Args:
+            place_id (str): The place ID.
+
+        Returns:
+            list: List of Review entities.
+        """
+        return self.query('Review', 'place_id = ?', (place_id,))
+
+    def get_reviews_by_user_id(self, user_id):
+        """
+        Retrieves all Review entities for a given user.
+
+        Args:
+            user_id (str): The user ID.
+
+        Returns:
+            list: List of Review entities.
+        """
+        return self.query('Review', 'user_id = ?', (user_id,))
+
+    def rating_histogram(self, attribute, value):
+        """
+        Counts the ratings of the reviews whose attribute has a value,
+        grouped in SQL over the index of the attribute.
+
+        Args:
+            attribute (str): The indexed review column, such as 'place_id'.
+            value: The value to match.
+
+        Returns:
+            list: The number of ratings of each value, from 1 to 5.
+
+        Raises:
+            ValueError: If the attribute is not an indexed column.
+        """
+        if attribute not in self.TABLES['Review']:
+            raise ValueError(f"Unknown column: {attribute}")
+        histogram = [0] * 5
+        rows = self.connection().execute(
+            f"SELECT json_extract(data, '$.rating'), COUNT(*) "
+            f'FROM "Review" WHERE "{attribute}" = ? GROUP BY 1', (value,))
+
+        for rating, count in rows:
+            histogram[int(rating) - 1] = count
+        return histogram
+
+    def update(self, entity):
+        """
+        Updates an existing entity.
+
+        Args:
+            entity (object): The entity with updated data.
+
+        Returns:
+            object: The updated entity or None if not found.
+        """
+        entity_type = type(entity).__name__
+
+        if not self.exists(entity_type, 'id = ?', (entity.id,)):
+            return None
+        return self.save(entity)
+
+    def delete(self, entity_id, entity_type):
+        """
+        Deletes an entity by its ID and type.
+
+        Args:
+            entity_id (str): The ID of the entity to delete.
+            entity_type (str): The type of the entity to delete.
+
+        Returns:
+            bool: True if the entity was successfully deleted, False
+            otherwise.
+        """
+        if entity_type not in self.TABLES:
+            return False
+        with self.writing() as connection:
+            cursor = connection.execute(
+                f'DELETE FROM "{entity_type}" WHERE id = ?', (entity_id,))
+        return cursor.rowcount > 0
+
+    def close(self):
+        """
+        Closes the connection of the calling thread.
+        """
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def in_transaction(self):
+        """
+        Tells if the calling thread is inside a transaction.
+
+        Returns:
+            bool: True inside a transaction, False otherwise.
+        """
+        return getattr(self._local, 'transaction', False)
+
+    def begin(self, entity_types=()):
+        """
+        Starts a database transaction on the calling thread. The writes of
+        the thread are committed together by commit().
+
+        Args:
+            entity_types (tuple, optional): The types the transaction
+            mutates; ignored, SQLite locks the whole database.
+        """
+        self._local.transaction = True
+
+    def commit(self, end=True):
+        """
+        Commits the transaction of the calling thread.
+
+        Args:
+            end (bool, optional): Whether to commit now. When False, the
+            database transaction stays open until end(), so rollback() can
+            still discard it. Defaults to True.
+        """
+        if end:
+            self.end()
+
+    def end(self):
+        """
+        Commits a transaction left open by commit(end=False).
+        """
+        self._local.transaction = False
+        self.connection().commit()
+
+    def rollback(self):
+        """
+        Rolls back the transaction of the calling thread.
+        """
+        self._local.transaction = False
+        self.connection().rollback()
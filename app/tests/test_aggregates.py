@@ -0,0 +1,213 @@
+import unittest
+import os
+from datetime import datetime, timedelta
+from persistence.aggregates import Leaderboard, RatingAggregate, \
+    TimeBuckets, bayesian_average, rating_summary
+from persistence.data_manager import DataManager
+from persistence.registry import Registry
+from models.place import Place
+from models.review import Review
+
+
+class TestRatingAggregate(unittest.TestCase):
+
+    def setUp(self):
+        self.aggregate = RatingAggregate(lambda entity: entity.group,
+                                         lambda entity: entity.rating)
+
+    def make_entity(self, entity_id, group, rating):
+        entity = type('Entity', (), {'id': entity_id, 'group': group,
+                                     'rating': rating})()
+        self.aggregate.add(entity)
+        return entity
+
+    def test_rating_summary(self):
+        self.assertEqual(rating_summary([1, 0, 0, 0, 2]), {
+            'count': 3, 'sum': 11, 'average': 11 / 3,
+            'histogram': {1: 1, 2: 0, 3: 0, 4: 0, 5: 2}})
+        self.assertIsNone(rating_summary([0] * 5)['average'])
+
+    def test_add_update_discard(self):
+        first = self.make_entity('r1', 'loft', 4)
+        self.make_entity('r2', 'loft', 2)
+        self.make_entity('r3', 'cabin', 5)
+        self.assertEqual(self.aggregate.summary('loft')['average'], 3)
+        first.rating = 5
+        self.aggregate.add(first)
+        first.group = 'cabin'
+        self.aggregate.add(first)
+        self.assertEqual(self.aggregate.summary('loft')['count'], 1)
+        self.assertEqual(self.aggregate.summary('cabin')['histogram'][5], 2)
+        self.aggregate.discard('r2')
+        self.aggregate.discard('unknown')
+        self.assertEqual(self.aggregate.summary('loft')['count'], 0)
+        self.assertNotIn('loft', self.aggregate.groups)
+
+    def test_rating_out_of_scale(self):
+        with self.assertRaises(ValueError):
+            self.make_entity('r1', 'loft', 6)
+        self.assertEqual(self.aggregate.keys, {})
+
+
+class TestLeaderboard(unittest.TestCase):
+
+    def setUp(self):
+        self.leaderboard = Leaderboard(lambda entity: entity.group,
+                                       lambda entity: entity.rating)
+        self.count = 0
+
+    def rate(self, group, *ratings):
+        entities = []
+        for rating in ratings:
+            self.count += 1
+            entity = type('Entity', (), {'id': f'r{self.count}',
+                                         'group': group, 'rating': rating})()
+            self.leaderboard.add(entity)
+            entities.append(entity)
+        return entities
+
+    def groups(self):
+        return [group for _, group in self.leaderboard.top()]
+
+    def test_bayesian_average(self):
+        self.assertEqual(bayesian_average(0, 0), 3.0)
+        self.assertEqual(bayesian_average(5, 25), 4.0)
+
+    def test_many_good_ratings_beat_a_few_perfect_ones(self):
+        self.rate('newcomer', 5)
+        self.rate('classic', *[4] * 20)
+        self.rate('average', 3, 3)
+        self.assertEqual(self.groups(), ['classic', 'newcomer', 'average'])
+        self.assertEqual(next(self.leaderboard.top())[0],
+                         bayesian_average(20, 80))
+
+    def test_ranking_follows_updates_and_discards(self):
+        first, = self.rate('loft', 5)
+        self.rate('cabin', 4)
+        self.assertEqual(self.groups(), ['loft', 'cabin'])
+        first.rating = 1
+        self.leaderboard.add(first)
+        self.assertEqual(self.groups(), ['cabin', 'loft'])
+        self.leaderboard.discard(first.id)
+        self.assertEqual(self.groups(), ['cabin'])
+        self.assertEqual(len(self.leaderboard.ranking), 1)
+
+
+class TestTimeBuckets(unittest.TestCase):
+
+    def setUp(self):
+        self.buckets = TimeBuckets(lambda entity: entity.group,
+                                   lambda entity: entity.created_at)
+        self.now = datetime(2024, 6, 30, 12)
+
+    def make_entity(self, entity_id, group, hours_ago):
+        entity = type('Entity', (), {
+            'id': entity_id, 'group': group,
+            'created_at': self.now - timedelta(hours=hours_ago)})()
+        self.buckets.add(entity)
+        return entity
+
+    def test_top_counts_the_window_only(self):
+        self.make_entity('r1', 'loft', 1)
+        self.make_entity('r2', 'loft', 30)
+        self.make_entity('r3', 'cabin', 2)
+        self.make_entity('r4', 'cabin', 3)
+        self.make_entity('r5', 'villa', 24 * 10)
+        week = self.now - timedelta(days=7)
+        self.assertEqual(self.buckets.top(week, self.now),
+                         [(2, 'cabin'), (2, 'loft')])
+        self.assertEqual(self.buckets.top(self.now - timedelta(hours=24),
+                                          self.now),
+                         [(2, 'cabin'), (1, 'loft')])
+        self.assertEqual(len(self.buckets.top(datetime(1970, 1, 2),
+                                              self.now)), 3)
+
+    def test_discard(self):
+        self.make_entity('r1', 'loft', 1)
+        self.buckets.discard('r1')
+        self.buckets.discard('unknown')
+        self.assertEqual(self.buckets.buckets, {})
+
+
+class TestDataManagerRatings(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_aggregates.json'
+        self.data_manager = DataManager(self.data_file)
+
+    def tearDown(self):
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+    def make_review(self, place_id, user_id, rating):
+        return self.data_manager.save(Review(place_id, user_id, rating,
+                                             "Nice", self.data_manager))
+
+    def test_ratings_follow_creates_setters_and_deletes(self):
+        first = self.make_review("place_1", "user_1", 4)
+        self.make_review("place_1", "user_2", 2)
+        self.make_review("place_2", "user_1", 5)
+        self.assertEqual(self.data_manager.get_place_rating("place_1")[
+            'average'], 3)
+        first.rating = 1
+        summary = self.data_manager.get_place_rating("place_1")
+        self.assertEqual((summary['count'], summary['sum']), (2, 3))
+        self.assertEqual(self.data_manager.get_user_rating("user_1")['sum'],
+                         6)
+        self.data_manager.delete(first.id, 'Review')
+        self.assertEqual(self.data_manager.get_user_rating("user_1")[
+            'histogram'], {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+
+        registry = Registry({'Review': self.data_manager})
+        for place_id in ("place_1", "place_2", "place_3"):
+            scanned = super(DataManager, self.data_manager).get_place_rating(
+                place_id)
+            self.assertEqual(registry.get_place_rating(place_id), scanned)
+
+    def make_place(self, name, city_id):
+        return self.data_manager.save(Place(
+            name, "Nice", f"{name} St", city_id, 1.0, 1.0, "host_1", 1, 1,
+            100, 2, [], self.data_manager))
+
+    def test_top_and_trending_places(self):
+        loft = self.make_place("Loft", "city_1")
+        cabin = self.make_place("Cabin", "city_2")
+        for user_id in ("user_1", "user_2", "user_3"):
+            self.make_review(loft.id, user_id, 5)
+        recent = self.make_review(cabin.id, "user_1", 5)
+        old = self.make_review(cabin.id, "user_2", 5)
+        old.created_at = datetime.now() - timedelta(days=30)
+        self.data_manager.reindex(old)
+        self.make_review("deleted_place", "user_1", 5)
+
+        top = self.data_manager.top_places()
+        self.assertEqual([place.name for _, place in top], ["Loft", "Cabin"])
+        self.assertEqual(top[0][0], bayesian_average(3, 15))
+        self.assertEqual(
+            [place.name for _, place in self.data_manager.top_places(
+                city_id="city_2")], ["Cabin"])
+        self.assertEqual(len(self.data_manager.top_places(limit=1)), 1)
+        trending = self.data_manager.trending_places(timedelta(days=7))
+        self.assertEqual([(count, place.name) for count, place in trending],
+                         [(3, "Loft"), (1, "Cabin")])
+
+        recent.rating = 1
+        registry = Registry({'Review': self.data_manager,
+                             'Place': self.data_manager})
+        self.assertEqual(registry.top_places()[0][1], loft)
+        scanned = super(DataManager, self.data_manager)
+        self.assertEqual(scanned.top_places(), self.data_manager.top_places())
+        self.assertEqual(scanned.trending_places(timedelta(days=7)),
+                         trending)
+        self.assertEqual(Registry({}).top_places(), [])
+
+    def test_ratings_survive_reload(self):
+        self.make_review("place_1", "user_1", 4)
+        self.make_review("place_1", "user_2", 5)
+        reloaded = DataManager(self.data_file)
+        self.assertEqual(reloaded.get_place_rating("place_1")['average'],
+                         4.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
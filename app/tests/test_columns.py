@@ -0,0 +1,105 @@
+import unittest
+import os
+from persistence import columns
+from persistence.columns import ColumnStore
+from persistence.data_manager import DataManager
+from models.place import Place
+
+
+class TestColumnStore(unittest.TestCase):
+
+    use_numpy = False
+
+    def setUp(self):
+        self.store = ColumnStore({
+            'price': lambda entity: entity.price,
+            'guests': lambda entity: entity.guests,
+        }, use_numpy=self.use_numpy)
+
+    def make_entity(self, entity_id, price, guests):
+        return type('Entity', (), {'id': entity_id, 'price': price,
+                                   'guests': guests})()
+
+    def ids(self, entities):
+        return sorted(entity.id for entity in entities)
+
+    def test_select(self):
+        for i in range(40):
+            self.store.add(self.make_entity(str(i), i * 10, i % 4))
+        self.assertEqual(len(self.store), 40)
+        self.assertEqual(self.ids(self.store.select({
+            'price': (100, 200), 'guests': (3, None)})), ['11', '15', '19'])
+        self.assertEqual(len(self.store.select({})), 40)
+        with self.assertRaises(ValueError):
+            self.store.select({'rooms': (1, None)})
+
+    def test_update_and_discard(self):
+        first = self.make_entity('1', 50, 2)
+        self.store.add(first)
+        self.store.add(self.make_entity('2', 60, 2))
+        self.store.add(self.make_entity('3', 70, 2))
+        first.price = 80
+        self.store.add(first)
+        self.assertEqual(self.ids(self.store.select({'price': (75, None)})),
+                         ['1'])
+        self.store.discard('1')
+        self.store.discard('unknown')
+        self.assertEqual(self.ids(self.store.select({})), ['2', '3'])
+        self.assertEqual(self.ids(self.store.select({'price': (None, 65)})),
+                         ['2'])
+        self.store.clear()
+        self.assertEqual(self.store.select({}), [])
+
+    def test_invalid_value(self):
+        with self.assertRaises(ValueError):
+            self.store.add(self.make_entity('1', 'cheap', 2))
+        self.assertEqual(len(self.store), 0)
+
+
+@unittest.skipIf(columns.numpy is None, 'NumPy is not installed')
+class TestNumpyColumnStore(TestColumnStore):
+
+    use_numpy = True
+
+
+class TestDataManagerColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.data_manager = DataManager('data/test_columns.json')
+
+    def tearDown(self):
+        if os.path.exists('data/test_columns.json'):
+            os.remove('data/test_columns.json')
+
+    def make_place(self, name, price, guests, rooms):
+        return Place(name, "Nice", f"{name} St", "city_1", 48.85, 2.35,
+                     "host_1", rooms, 1, price, guests, [],
+                     self.data_manager)
+
+    def test_select_follows_saves_updates_and_deletes(self):
+        cheap = self.data_manager.save(self.make_place("Cheap", 40, 2, 1))
+        large = self.data_manager.save(self.make_place("Large", 120, 8, 4))
+        self.assertEqual(self.data_manager.select(
+            'Place', {'price_per_night': (None, 100)}), [cheap])
+
+        large.price_per_night = 90
+        self.assertEqual(
+            sorted(place.name for place in self.data_manager.select(
+                'Place', {'price_per_night': (None, 100)})),
+            ["Cheap", "Large"])
+        self.assertEqual(self.data_manager.select(
+            'Place', {'max_guests': (4, None), 'num_rooms': (2, None)}),
+            [large])
+
+        self.data_manager.delete(large.id, 'Place')
+        self.assertEqual(self.data_manager.select(
+            'Place', {'max_guests': (4, None)}), [])
+
+    def test_select_without_column_store(self):
+        cheap = self.data_manager.save(self.make_place("Cheap", 40, 2, 1))
+        self.assertEqual(self.data_manager.select(
+            'Place', {'max_guests': (2, 2), 'name': (None, None)}), [cheap])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch
+from email_validator import EmailUndeliverableError
+from models.email_validation import EmailValidator
+from models.user import User
+
+LOOKUP = 'models.email_validation.validate_email_deliverability'
+
+
+def deliverable(domain, domain_i18n, timeout=None):
+    if domain.startswith('nomail'):
+        raise EmailUndeliverableError(
+            f"The domain name {domain_i18n} does not accept email.")
+    if domain.startswith('slow'):
+        return {'unknown-deliverability': 'timeout'}
+    return {'mx': [(10, 'mx.' + domain)]}
+
+
+class TestEmailValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = EmailValidator(check_deliverability=True)
+        patcher = patch(LOOKUP, side_effect=deliverable)
+        self.lookup = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_offline_mode_checks_syntax_only(self):
+        validator = EmailValidator(check_deliverability=False)
+        self.assertTrue(validator.is_valid("john@nomail.com"))
+        self.assertFalse(validator.is_valid("john@"))
+        self.assertFalse(validator.is_valid(None))
+        self.lookup.assert_not_called()
+
+    def test_lookups_are_cached_per_domain(self):
+        self.assertTrue(self.validator.is_valid("john@example.com"))
+        self.assertTrue(self.validator.is_valid("jane@Example.com"))
+        self.assertFalse(self.validator.is_valid("john@nomail.com"))
+        self.assertIn("does not accept email",
+                      self.validator.check("jane@nomail.com"))
+        self.assertEqual(self.lookup.call_count, 2)
+
+    def test_cache_expires_and_evicts(self):
+        validator = EmailValidator(check_deliverability=True, cache_size=2,
+                                   ttl=60)
+        with patch('models.email_validation.time.monotonic',
+                   return_value=1000.0) as clock:
+            validator.is_valid("a@one.com")
+            validator.is_valid("a@two.com")
+            validator.is_valid("a@one.com")
+            validator.is_valid("a@three.com")
+            self.assertEqual(list(validator.cache), ['one.com', 'three.com'])
+            clock.return_value = 1061.0
+            validator.is_valid("a@one.com")
+        self.assertEqual(self.lookup.call_count, 4)
+
+    def test_timeouts_are_not_cached(self):
+        self.assertTrue(self.validator.is_valid("john@slow.com"))
+        self.assertTrue(self.validator.is_valid("john@slow.com"))
+        self.assertEqual(self.lookup.call_count, 2)
+        self.assertEqual(self.validator.cache, {})
+
+    def test_validate_many_looks_up_each_domain_once(self):
+        errors = self.validator.validate_many([
+            "a@example.com", "b@example.com", "c@nomail.com", "d@nomail.com",
+            "not-an-email"])
+        self.assertEqual(self.lookup.call_count, 2)
+        self.assertIsNone(errors["a@example.com"])
+        self.assertIsNone(errors["b@example.com"])
+        self.assertIsNotNone(errors["c@nomail.com"])
+        self.assertIsNotNone(errors["d@nomail.com"])
+        self.assertIsNotNone(errors["not-an-email"])
+
+    def test_user_uses_the_shared_validator(self):
+        with patch.object(User, 'email_validator', self.validator):
+            self.assertFalse(User.is_valid_email_format("john@nomail.com"))
+            self.assertEqual(
+                User.validate_emails(["a@example.com"]),
+                {"a@example.com": None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+import os
+from persistence.data_manager import DataManager
+from persistence.geo import GridIndex, TilePyramid, haversine_km
+from persistence.registry import Registry
+from models.place import Place
+
+
+class TestGridIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = GridIndex(lambda entity: (entity.lat, entity.lon))
+
+    def make_entity(self, entity_id, lat, lon):
+        entity = type('Entity', (), {'id': entity_id, 'lat': lat,
+                                     'lon': lon})()
+        self.index.add(entity)
+        return entity
+
+    def ids(self, entities):
+        return sorted(entity.id for entity in entities)
+
+    def test_haversine(self):
+        # Paris to London
+        self.assertAlmostEqual(haversine_km(48.8566, 2.3522,
+                                            51.5074, -0.1278), 343.5,
+                               delta=1)
+        self.assertEqual(haversine_km(10, 20, 10, 20), 0)
+
+    def test_within(self):
+        self.make_entity('paris', 48.8566, 2.3522)
+        self.make_entity('lyon', 45.7640, 4.8357)
+        self.make_entity('london', 51.5074, -0.1278)
+        self.assertEqual(self.ids(self.index.within(45, 0, 50, 5)),
+                         ['lyon', 'paris'])
+        self.assertEqual(self.ids(self.index.within(-90, -180, 90, 180)),
+                         ['london', 'lyon', 'paris'])
+
+    def test_within_across_antimeridian(self):
+        self.make_entity('fiji', -17.7, 178.0)
+        self.make_entity('samoa', -13.8, -172.1)
+        self.make_entity('sydney', -33.9, 151.2)
+        self.assertEqual(self.ids(self.index.within(-20, 170, -10, -170)),
+                         ['fiji', 'samoa'])
+
+    def test_nearby(self):
+        self.make_entity('paris', 48.8566, 2.3522)
+        self.make_entity('versailles', 48.8049, 2.1204)
+        self.make_entity('lyon', 45.7640, 4.8357)
+        results = self.index.nearby(48.8584, 2.2945, 50)
+        self.assertEqual([entity.id for _, entity in results],
+                         ['paris', 'versailles'])
+        self.assertLess(results[0][0], results[1][0])
+        self.assertEqual(len(self.index.nearby(48.8584, 2.2945, 20000)), 3)
+
+    def test_nearby_across_antimeridian(self):
+        self.make_entity('east', 0.0, 179.9)
+        self.make_entity('west', 0.0, -179.9)
+        results = self.index.nearby(0.0, 180.0, 20)
+        self.assertEqual(self.ids(entity for _, entity in results),
+                         ['east', 'west'])
+
+    def test_move_and_discard(self):
+        entity = self.make_entity('1', 10, 10)
+        entity.lat = -10
+        self.index.add(entity)
+        self.assertEqual(self.index.within(0, 0, 20, 20), [])
+        self.assertEqual(self.index.within(-20, 0, 0, 20), [entity])
+        self.index.discard('1')
+        self.index.discard('unknown')
+        self.assertEqual(self.index.cells, {})
+
+
+class TestTilePyramid(unittest.TestCase):
+
+    def setUp(self):
+        self.pyramid = TilePyramid(lambda entity: (entity.lat, entity.lon),
+                                   lambda entity: entity.price, max_zoom=8)
+
+    def make_entity(self, entity_id, lat, lon, price):
+        entity = type('Entity', (), {'id': entity_id, 'lat': lat,
+                                     'lon': lon, 'price': price})()
+        self.pyramid.add(entity)
+        return entity
+
+    def test_world_tile(self):
+        self.make_entity('paris', 48.8566, 2.3522, 100)
+        self.make_entity('sydney', -33.8688, 151.2093, 300)
+        world = self.pyramid.tile(0, 0, 0)
+        self.assertEqual(world['count'], 2)
+        self.assertEqual(world['average'], 200)
+        # Paris is in the north-east quarter, Sydney in the south-east one
+        self.assertEqual([(cluster['x'], cluster['y'], cluster['count'])
+                          for cluster in self.pyramid.tile(0, 0, 0, 1)[
+                              'clusters']], [(1, 0, 1), (1, 1, 1)])
+
+    def test_updates_are_incremental(self):
+        paris = self.make_entity('paris', 48.8566, 2.3522, 100)
+        self.make_entity('lyon', 45.7640, 4.8357, 50)
+        x, y = self.pyramid.tile_of(48.8566, 2.3522)
+        self.assertEqual(self.pyramid.tile(8, x, y)['count'], 1)
+
+        paris.lat, paris.lon, paris.price = 45.7640, 4.8357, 150
+        self.pyramid.add(paris)
+        self.assertEqual(self.pyramid.tile(8, x, y)['count'], 0)
+        x, y = self.pyramid.tile_of(45.7640, 4.8357)
+        lyon = self.pyramid.tile(8, x, y)
+        self.assertEqual((lyon['count'], lyon['average']), (2, 100))
+        # At the deepest level a tile is its own cluster
+        self.assertEqual(len(lyon['clusters']), 1)
+
+        self.pyramid.discard('paris')
+        self.pyramid.discard('lyon')
+        self.assertEqual(self.pyramid.levels, [{}] * 9)
+
+    def test_invalid_tile(self):
+        for z, x, y in ((9, 0, 0), (1, 2, 0), (1, 0, -1)):
+            with self.assertRaises(ValueError):
+                self.pyramid.tile(z, x, y)
+
+
+class TestDataManagerGeo(unittest.TestCase):
+
+    def setUp(self):
+        self.data_manager = DataManager('data/test_geo.json')
+
+    def tearDown(self):
+        if os.path.exists('data/test_geo.json'):
+            os.remove('data/test_geo.json')
+
+    def make_place(self, name, latitude, longitude):
+        return self.data_manager.save(Place(
+            name, "Nice", f"{name} St", "city_1", latitude, longitude,
+            "host_1", 1, 1, 100, 2, [], self.data_manager))
+
+    def test_nearby_follows_updates(self):
+        louvre = self.make_place("Louvre", 48.8606, 2.3376)
+        self.make_place("Bellecour", 45.7578, 4.8320)
+        louvre.latitude = 45.76
+        louvre.longitude = 4.83
+        near_lyon = self.data_manager.nearby('Place', 45.76, 4.83, 5)
+        self.assertEqual(len(near_lyon), 2)
+        self.assertIs(near_lyon[0][1], louvre)
+        self.assertEqual(self.data_manager.nearby('Place', 48.86, 2.34, 5),
+                         [])
+
+    def test_place_tile_follows_setters(self):
+        louvre = self.make_place("Louvre", 48.8606, 2.3376)
+        self.make_place("Bellecour", 45.7578, 4.8320)
+        louvre.price_per_night = 300
+        world = self.data_manager.get_place_tile(0, 0, 0)
+        self.assertEqual((world['count'], world['average']), (2, 200))
+        self.data_manager.delete(louvre.id, 'Place')
+        self.assertEqual(self.data_manager.get_place_tile(0, 0, 0)['count'],
+                         1)
+        scanned = super(DataManager, self.data_manager).get_place_tile(
+            0, 0, 0)
+        self.assertEqual(scanned['count'], 1)
+        self.assertAlmostEqual(scanned['latitude'], 45.7578)
+        self.assertEqual(len(scanned['clusters']), 1)
+
+    def test_default_implementation_matches_index(self):
+        self.make_place("Louvre", 48.8606, 2.3376)
+        self.make_place("Bellecour", 45.7578, 4.8320)
+        registry = Registry({'Place': self.data_manager})
+        expected = self.data_manager.within('Place', 45, 2, 49, 5)
+        scanned = super(DataManager, self.data_manager).within(
+            'Place', 45, 2, 49, 5)
+        self.assertEqual(sorted(place.id for place in scanned),
+                         sorted(place.id for place in expected))
+        self.assertEqual(registry.nearby('Place', 48.86, 2.34, 1)[0][1].name,
+                         "Louvre")
+
+
+if __name__ == '__main__':
+    unittest.main()
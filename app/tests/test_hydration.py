@@ -0,0 +1,119 @@
+import unittest
+import json
+import os
+from unittest.mock import patch
+from persistence.data_manager import DataManager
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+
+class TestHydration(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_hydration.json'
+        self.amenity = {
+            "amenity_id": "amenity_1",
+            "amenity_name": "WiFi",
+            "created_at": "2024-06-01T12:00:00",
+            "updated_at": "2024-06-02T12:00:00"
+        }
+        self.review = {
+            "review_id": "review_1",
+            "place_id": "place_1",
+            "user_id": "user_1",
+            "rating": 5,
+            "text": "Great place!",
+            "created_at": "2024-06-01T12:00:00",
+            "updated_at": "2024-06-02T12:00:00"
+        }
+
+    def tearDown(self):
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+    def write_data(self, data):
+        with open(self.data_file, 'w') as file:
+            json.dump(data, file)
+
+    def test_hydrate_matches_from_dict(self):
+        review = Review.hydrate(self.review, None)
+        self.assertEqual(review.to_dict(), self.review)
+        self.assertEqual(Review.from_dict(self.review, None).to_dict(),
+                         self.review)
+
+    def test_hydrate_skips_constructor(self):
+        place = {
+            "place_id": "place_1", "place_name": "Loft",
+            "description": "Nice", "address": "1 Main St",
+            "city_id": "city_1", "latitude": 10, "longitude": 20,
+            "host_id": "host_1", "num_rooms": 2, "num_bathrooms": 1,
+            "price_per_night": 100, "max_guests": 2, "amenities": [],
+            "created_at": "2024-06-01T12:00:00",
+            "updated_at": "2024-06-02T12:00:00"
+        }
+        with patch.object(Place, 'check_attributes') as check_attributes:
+            self.assertEqual(Place.hydrate(place, None).to_dict(), place)
+        check_attributes.assert_not_called()
+
+    def test_load_does_not_run_uniqueness_checks(self):
+        self.write_data({"Amenity": {"amenity_1": self.amenity}})
+        with patch.object(DataManager, 'amenity_exists_with_name') as exists:
+            data_manager = DataManager(self.data_file)
+        exists.assert_not_called()
+        self.assertEqual(data_manager.get('amenity_1', 'Amenity').name,
+                         "WiFi")
+        self.assertTrue(data_manager.amenity_exists_with_name("WiFi"))
+
+    def test_load_skips_malformed_records(self):
+        self.write_data({"Amenity": {"amenity_1": {"amenity_id": "x"}}})
+        data_manager = DataManager(self.data_file)
+        self.assertEqual(data_manager.storage['Amenity'], {})
+
+    def test_load_skips_records_an_index_rejects(self):
+        invalid = dict(self.review, review_id="review_2", rating=7)
+        self.write_data({"Review": {"review_2": invalid}})
+        data_manager = DataManager(self.data_file)
+        self.assertEqual(data_manager.get_all('Review'), [])
+        self.assertEqual(data_manager.get_reviews_by_place_id("place_1"), [])
+        self.assertEqual(data_manager.get_place_rating("place_1")['count'], 0)
+
+    def test_load_skips_records_with_null_fields(self):
+        place = {
+            "place_id": "place_1", "place_name": "Loft",
+            "description": "Nice", "address": "1 Main St",
+            "city_id": "city_1", "latitude": None, "longitude": 20,
+            "host_id": "host_1", "num_rooms": 2, "num_bathrooms": 1,
+            "price_per_night": 100, "max_guests": 2, "amenities": [],
+            "created_at": "2024-06-01T12:00:00",
+            "updated_at": "2024-06-02T12:00:00"
+        }
+        self.write_data({"Place": {"place_1": place}})
+        data_manager = DataManager(self.data_file)
+        self.assertEqual(data_manager.get_all('Place'), [])
+        self.assertEqual(data_manager.search_places("Loft"), [])
+
+    def test_verify_on_load_drops_invalid_and_duplicates(self):
+        duplicate = dict(self.amenity, amenity_id="amenity_2")
+        empty = dict(self.amenity, amenity_id="amenity_3", amenity_name="")
+        self.write_data({"Amenity": {"amenity_1": self.amenity,
+                                     "amenity_2": duplicate,
+                                     "amenity_3": empty}})
+        self.assertEqual(len(DataManager(self.data_file).storage['Amenity']),
+                         3)
+        data_manager = DataManager(self.data_file, verify_on_load=True)
+        self.assertEqual(list(data_manager.storage['Amenity']),
+                         ["amenity_1"])
+        self.assertTrue(data_manager.amenity_exists_with_name("WiFi"))
+
+    def test_validate(self):
+        amenity = Amenity.hydrate(dict(self.amenity, amenity_name=""), None)
+        with self.assertRaises(ValueError):
+            amenity.validate()
+        review = Review.hydrate(dict(self.review, rating=7), None)
+        with self.assertRaises(ValueError):
+            review.validate()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import json
+import os
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.identifiers import IdGenerator
+from persistence.data_manager import DataManager
+
+CLOCK = 'models.identifiers.time.time_ns'
+
+
+class TestIdGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = IdGenerator(time_ordered=True)
+
+    def test_random_ids_by_default(self):
+        entity_id = IdGenerator().new()
+        self.assertEqual(uuid.UUID(entity_id).version, 4)
+        self.assertIsNone(IdGenerator.timestamp(entity_id))
+
+    def test_time_ordered_ids_increase(self):
+        ids = [self.generator.new() for _ in range(10000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        for entity_id in ids[:10]:
+            value = uuid.UUID(entity_id)
+            self.assertEqual(value.version, 7)
+            self.assertEqual(value.variant, uuid.RFC_4122)
+
+    def test_counter_overflow_and_clock_going_back(self):
+        with patch(CLOCK, return_value=1717243200000 * 1000000) as clock:
+            ids = [self.generator.new() for _ in range(5000)]
+            clock.return_value -= 60 * 10 ** 9
+            ids.append(self.generator.new())
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(IdGenerator.timestamp(ids[0]),
+                         datetime.fromtimestamp(1717243200))
+        self.assertGreater(IdGenerator.timestamp(ids[-1]),
+                           IdGenerator.timestamp(ids[0]))
+
+    def test_timestamp_of_invalid_ids(self):
+        self.assertIsNone(IdGenerator.timestamp("amenity_1"))
+        self.assertIsNone(IdGenerator.timestamp(None))
+
+    def test_models_use_the_shared_generator(self):
+        with patch.object(BaseModel, 'id_generator', self.generator):
+            first, second = BaseModel(), BaseModel()
+        self.assertEqual(uuid.UUID(first.id).version, 7)
+        self.assertLess(first.id, second.id)
+
+
+class TestMixedIds(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_identifiers.json'
+        self.random_id = str(uuid.uuid4())
+        with open(self.data_file, 'w') as file:
+            json.dump({"Amenity": {self.random_id: {
+                "amenity_id": self.random_id,
+                "amenity_name": "WiFi",
+                "created_at": "2024-06-01T12:00:00",
+                "updated_at": "2024-06-01T12:00:00"
+            }}}, file)
+
+    def tearDown(self):
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+    def test_random_ids_load_alongside_time_ordered_ones(self):
+        data_manager = DataManager(self.data_file)
+        with patch.object(BaseModel, 'id_generator',
+                          IdGenerator(time_ordered=True)):
+            amenity = Amenity("Pool", data_manager)
+        data_manager.save(amenity)
+
+        reloaded = DataManager(self.data_file)
+        self.assertEqual(reloaded.get(self.random_id, 'Amenity').name,
+                         "WiFi")
+        self.assertEqual(reloaded.get(amenity.id, 'Amenity').name, "Pool")
+        entities, _ = reloaded.page('Amenity', limit=10)
+        self.assertEqual([entity.id for entity in entities],
+                         [self.random_id, amenity.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import unittest
+import os
+from persistence.data_manager import DataManager
+from persistence.indexes import HashIndex, OrderedIndex, creation_key
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+class TestHashIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = HashIndex(lambda entity: entity.name)
+
+    def make_entity(self, entity_id, name):
+        return type('Entity', (), {'id': entity_id, 'name': name})()
+
+    def test_add_and_get(self):
+        first = self.make_entity('1', 'a')
+        second = self.make_entity('2', 'a')
+        self.index.add(first)
+        self.index.add(second)
+        self.assertEqual(self.index.get('a'), [first, second])
+        self.assertIs(self.index.first('a'), first)
+        self.assertIsNone(self.index.first('b'))
+
+    def test_rekey(self):
+        entity = self.make_entity('1', 'a')
+        self.index.add(entity)
+        entity.name = 'b'
+        self.index.add(entity)
+        self.assertEqual(self.index.get('a'), [])
+        self.assertIs(self.index.first('b'), entity)
+
+    def test_discard(self):
+        entity = self.make_entity('1', 'a')
+        self.index.add(entity)
+        self.index.discard('1')
+        self.index.discard('unknown')
+        self.assertEqual(self.index.buckets, {})
+        self.assertEqual(self.index.keys, {})
+
+    def test_unhashable_key(self):
+        self.assertIsNone(self.index.first(['a']))
+        self.assertEqual(self.index.get(['a']), [])
+
+
+class TestOrderedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = OrderedIndex(lambda entity: (entity.rank, entity.id))
+
+    def make_entity(self, entity_id, rank):
+        return type('Entity', (), {'id': entity_id, 'rank': rank})()
+
+    def ids(self, entities):
+        return [entity.id for entity in entities]
+
+    def test_page(self):
+        for rank in range(5):
+            self.index.add(self.make_entity(str(rank), rank))
+        page, after = self.index.page(limit=2)
+        self.assertEqual(self.ids(page), ['0', '1'])
+        self.assertEqual(after, (1, '1'))
+        page, after = self.index.page(after, 2)
+        self.assertEqual(self.ids(page), ['2', '3'])
+        page, after = self.index.page(after, 2)
+        self.assertEqual(self.ids(page), ['4'])
+        self.assertIsNone(after)
+
+    def test_page_within_bounds(self):
+        for rank in (5, 1, 3, 3, 7, 9):
+            self.index.add(self.make_entity(f"{rank}-{len(self.index.keys)}",
+                                            rank))
+        page, after = self.index.page(limit=2, low=3, high=7)
+        self.assertEqual(self.ids(page), ['3-2', '3-3'])
+        page, after = self.index.page(after, 2, low=3, high=7)
+        self.assertEqual(self.ids(page), ['5-0', '7-4'])
+        self.assertIsNone(after)
+        self.assertEqual(self.ids(self.index.page(high=2)[0]), ['1-1'])
+        self.assertEqual(self.index.page(low=8, high=2), ([], None))
+
+    def test_out_of_order_additions(self):
+        for rank in (3, 1, 2, 0):
+            self.index.add(self.make_entity(str(rank), rank))
+        self.assertEqual(self.index.order(), [(0, '0'), (1, '1'), (2, '2'),
+                                              (3, '3')])
+        self.index.discard('2')
+        page, after = self.index.page()
+        self.assertEqual(self.ids(page), ['0', '1', '3'])
+
+    def test_lookups_do_not_modify_the_index(self):
+        for rank in (3, 1, 2):
+            self.index.add(self.make_entity(str(rank), rank))
+        order = self.index.order()
+        self.index.page()
+        self.index.add(self.make_entity('0', 0))
+        self.assertIs(self.index.order(), order)
+        self.assertEqual(self.ids(self.index.page()[0]), ['0', '1', '2', '3'])
+
+    def test_rekey_and_discard(self):
+        entity = self.make_entity('1', 1)
+        self.index.add(entity)
+        self.index.add(self.make_entity('2', 2))
+        entity.rank = 3
+        self.index.add(entity)
+        self.index.discard('unknown')
+        self.assertEqual(self.ids(self.index.page()[0]), ['2', '1'])
+        self.index.discard('1')
+        self.assertEqual(self.ids(self.index.page()[0]), ['2'])
+        self.index.clear()
+        self.assertEqual(self.index.page(), ([], None))
+
+
+class TestDataManagerIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.data_manager = DataManager('data/test_indexes.json')
+
+    def tearDown(self):
+        if os.path.exists('data/test_indexes.json'):
+            os.remove('data/test_indexes.json')
+
+    def test_save_update_delete_keep_index_in_sync(self):
+        amenity = Amenity("WiFi", self.data_manager)
+        self.data_manager.save(amenity)
+        self.assertTrue(self.data_manager.amenity_exists_with_name("WiFi"))
+
+        amenity._name = "Pool"
+        self.data_manager.update(amenity)
+        self.assertFalse(self.data_manager.amenity_exists_with_name("WiFi"))
+        self.assertTrue(self.data_manager.amenity_exists_with_name("Pool"))
+
+        self.data_manager.delete(amenity.id, 'Amenity')
+        self.assertFalse(self.data_manager.amenity_exists_with_name("Pool"))
+
+    def test_setter_rekeys_stored_entity(self):
+        city = City("Paris", "FR", self.data_manager)
+        self.data_manager.save(city)
+        city.name = "Lyon"
+        self.assertFalse(self.data_manager.city_exists_with_name_and_country(
+            "Paris", "FR"))
+        self.assertTrue(self.data_manager.city_exists_with_name_and_country(
+            "Lyon", "FR"))
+
+    def test_setter_ignores_unsaved_entity(self):
+        amenity = Amenity("WiFi", self.data_manager)
+        amenity.name = "Pool"
+        self.assertFalse(self.data_manager.amenity_exists_with_name("Pool"))
+
+    def test_reviews_by_place_and_user(self):
+        first = Review("place_1", "user_1", 5, "Great", self.data_manager)
+        self.data_manager.save(first)
+        second = Review("place_1", "user_2", 4, "Good", self.data_manager)
+        self.data_manager.save(second)
+        self.assertEqual(self.data_manager.get_reviews_by_place_id("place_1"),
+                         [first, second])
+        self.assertEqual(self.data_manager.get_reviews_by_user_id("user_2"),
+                         [second])
+        self.assertTrue(self.data_manager.review_exists_with_attributes(
+            "place_1", "user_1"))
+        with self.assertRaises(ValueError):
+            Review("place_1", "user_1", 3, "Again", self.data_manager)
+
+    def test_page_by_creation_date(self):
+        amenities = [Amenity(f"Amenity {i}", self.data_manager)
+                     for i in range(5)]
+        for amenity in reversed(amenities):
+            self.data_manager.save(amenity)
+        self.data_manager.delete(amenities[1].id, 'Amenity')
+        page, after = self.data_manager.page('Amenity', 2)
+        self.assertEqual(page, [amenities[0], amenities[2]])
+        self.assertEqual(after, creation_key(amenities[2]))
+        page, after = self.data_manager.page('Amenity', 2, after)
+        self.assertEqual(page, [amenities[3], amenities[4]])
+        self.assertIsNone(after)
+        self.assertEqual(self.data_manager.page('Unknown', 2), ([], None))
+
+    def test_sorted_page_follows_price_setter(self):
+        places = [Place(f"Place {price}", "Nice", "1 Main St", "city_1",
+                        1.0, 1.0, "host_1", 1, 1, price, 2, [],
+                        self.data_manager)
+                  for price in (300, 100, 200)]
+        for place in places:
+            self.data_manager.save(place)
+        places[0].price_per_night = 50
+        page, after = self.data_manager.sorted_page(
+            'Place', 'price_per_night', 2)
+        self.assertEqual([place.price_per_night for place in page],
+                         [50, 100])
+        page, after = self.data_manager.sorted_page(
+            'Place', 'price_per_night', 2, after)
+        self.assertEqual([place.price_per_night for place in page], [200])
+        self.assertIsNone(after)
+        page, _ = self.data_manager.sorted_page(
+            'Place', 'price_per_night', low=60, high=250)
+        self.assertEqual([place.price_per_night for place in page],
+                         [100, 200])
+        scanned, _ = super(DataManager, self.data_manager).sorted_page(
+            'Place', 'price_per_night', low=60, high=250)
+        self.assertEqual(scanned, page)
+
+    def test_assigning_storage_rebuilds_indexes(self):
+        self.data_manager.save(Amenity("WiFi", self.data_manager))
+        self.data_manager.storage = {}
+        self.assertFalse(self.data_manager.amenity_exists_with_name("WiFi"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import os
+from models.country import Country
+from models.iso_countries import ISO_COUNTRIES, TABLE_FILE, CountryTable, \
+    normalize
+from persistence.data_manager import DataManager
+
+
+class TestCountryTable(unittest.TestCase):
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Côte d'IVOIRE "), "cote d ivoire")
+
+    def test_shipped_table_matches_pycountry(self):
+        self.assertTrue(os.path.exists(TABLE_FILE))
+        self.assertEqual(ISO_COUNTRIES.countries,
+                         CountryTable.from_pycountry().countries)
+
+    def test_by_code(self):
+        for code in ("FR", "fr", "FRA", "250"):
+            self.assertEqual(ISO_COUNTRIES.by_code(code).name, "France")
+        self.assertIsNone(ISO_COUNTRIES.by_code("XX"))
+        self.assertEqual(ISO_COUNTRIES.normalize_code("deu"), "DE")
+        self.assertEqual(ISO_COUNTRIES.normalize_code("TC"), "TC")
+
+    def test_resolve(self):
+        for text in ("France", "FRANCE", "french republic", "Fran"):
+            self.assertEqual(ISO_COUNTRIES.resolve(text).alpha_2, "FR")
+        self.assertEqual(ISO_COUNTRIES.resolve("Cote d'Ivoire").alpha_2,
+                         "CI")
+        self.assertEqual(ISO_COUNTRIES.resolve("Taiwan").alpha_2, "TW")
+        self.assertIsNone(ISO_COUNTRIES.resolve("United"))
+        self.assertIsNone(ISO_COUNTRIES.resolve("Atlantis"))
+
+    def test_search(self):
+        names = [country.name for country in ISO_COUNTRIES.search("united")]
+        self.assertIn("United Kingdom", names)
+        self.assertIn("United States", names)
+        self.assertEqual(len(ISO_COUNTRIES.search("united", limit=2)), 2)
+        self.assertEqual(ISO_COUNTRIES.search(" "), [])
+
+    def test_encoded(self):
+        countries = json.loads(ISO_COUNTRIES.encoded)
+        self.assertEqual(len(countries), len(ISO_COUNTRIES.countries))
+        self.assertEqual(countries[0]['alpha_2'], "AD")
+
+
+class TestCountryResolution(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_iso_countries.json'
+        self.data_manager = DataManager(self.data_file)
+
+    def tearDown(self):
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+    def test_country_code_ignores_case_and_accents(self):
+        self.assertEqual(Country("spain").code, "ES")
+        self.assertEqual(Country("Åland Islands").code, "AX")
+        self.assertEqual(Country("Aland").code, "AX")
+
+    def test_get_country_by_code_accepts_any_iso_code(self):
+        france = self.data_manager.save(Country("France"))
+        custom = self.data_manager.save(Country("Testland", "tl"))
+        for code in ("FR", "fr", "FRA"):
+            self.assertIs(self.data_manager.get_country_by_code(code), france)
+        self.assertIs(self.data_manager.get_country_by_code("tl"), custom)
+        self.assertIsNone(self.data_manager.get_country_by_code("DE"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import json
+import os
+from persistence.data_manager import DataManager
+from unittest.mock import patch
+from persistence.journal import Journal
+from models.amenity import Amenity
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_journal.json'
+        self.journal_file = self.data_file + '.journal'
+        self.data_manager = DataManager(self.data_file, journal=True,
+                                        checkpoint_interval=100)
+
+    def tearDown(self):
+        self.data_manager.journal.close()
+        for path in (self.data_file, self.journal_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_append_and_replay(self):
+        journal = Journal(self.journal_file)
+        journal.append('save', 'Amenity', 'a1', {'amenity_name': 'WiFi'})
+        journal.append('delete', 'Amenity', 'a1')
+        journal.close()
+        records = journal.replay()
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['data'], {'amenity_name': 'WiFi'})
+        self.assertNotIn('data', records[1])
+
+    def test_replay_ignores_torn_record(self):
+        with open(self.journal_file, 'w') as file:
+            file.write(Journal.encode('delete', 'Amenity', 'a1'))
+            file.write('{"op":"save","type":"Ame')
+        self.assertEqual(len(Journal(self.journal_file).replay()), 1)
+
+    def test_append_after_torn_record(self):
+        self.data_manager.journal.close()
+        with open(self.journal_file, 'w') as file:
+            file.write('{"op":"save","type":"Ame')
+        wifi = Amenity("WiFi", self.data_manager)
+        self.data_manager.save(wifi)
+        self.data_manager.journal.close()
+
+        restarted = DataManager(self.data_file, journal=True)
+        restarted.journal.close()
+        self.assertEqual(restarted.get(wifi.id, 'Amenity').name, "WiFi")
+
+    def test_replay_ignores_undecodable_last_line(self):
+        with open(self.journal_file, 'w') as file:
+            file.write(Journal.encode('delete', 'Amenity', 'a1'))
+            file.write('{"op":"save","type":"Ame{"op":"delete"}\n')
+        self.assertEqual(len(Journal(self.journal_file).replay()), 1)
+        with open(self.journal_file, 'a') as file:
+            file.write(Journal.encode('delete', 'Amenity', 'a2'))
+        with self.assertRaises(ValueError):
+            Journal(self.journal_file).replay()
+
+    def test_save_appends_instead_of_rewriting(self):
+        amenity = Amenity("WiFi", self.data_manager)
+        self.data_manager.save(amenity)
+        self.assertFalse(os.path.exists(self.data_file))
+        with open(self.journal_file) as file:
+            record = json.loads(file.readline())
+        self.assertEqual(record['op'], 'save')
+        self.assertEqual(record['id'], amenity.id)
+
+    def test_restart_replays_snapshot_and_journal(self):
+        wifi = Amenity("WiFi", self.data_manager)
+        pool = Amenity("Pool", self.data_manager)
+        self.data_manager.save(wifi)
+        self.data_manager.checkpoint()
+        self.data_manager.save(pool)
+        pool.name = "Heated pool"
+        self.data_manager.update(pool)
+        self.data_manager.delete(wifi.id, 'Amenity')
+        self.data_manager.journal.close()
+
+        restarted = DataManager(self.data_file, journal=True)
+        restarted.journal.close()
+        self.assertIsNone(restarted.get(wifi.id, 'Amenity'))
+        self.assertEqual(restarted.get(pool.id, 'Amenity').name,
+                         "Heated pool")
+        self.assertEqual(restarted.journal_records, 3)
+
+    def test_records_are_fsynced_by_default(self):
+        self.assertTrue(self.data_manager.journal.fsync)
+        with patch('persistence.journal.os.fsync') as fsync:
+            self.data_manager.save(Amenity("WiFi", self.data_manager))
+        fsync.assert_called_once()
+        unsynced = DataManager(self.data_file, journal=True,
+                               journal_fsync=False)
+        with patch('persistence.journal.os.fsync') as fsync:
+            unsynced.save(Amenity("Pool", unsynced))
+        unsynced.journal.close()
+        fsync.assert_not_called()
+
+    def test_checkpoint_interval(self):
+        self.data_manager.checkpoint_interval = 2
+        self.data_manager.save(Amenity("WiFi", self.data_manager))
+        self.data_manager.save(Amenity("Pool", self.data_manager))
+        self.assertEqual(self.data_manager.journal_records, 0)
+        self.assertEqual(Journal(self.journal_file).replay(), [])
+        with open(self.data_file) as file:
+            self.assertEqual(len(json.load(file)['Amenity']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import gc
+import tracemalloc
+import unittest
+from models.amenity import Amenity
+from models.city import City
+from models.country import Country
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+COUNT = 5000
+REVIEW = {
+    "place_id": "place_1",
+    "user_id": "user_1",
+    "rating": 4,
+    "text": "Nice",
+    "created_at": "2024-06-01T12:00:00",
+    "updated_at": "2024-06-02T12:00:00"
+}
+
+
+class DictReview(Review):
+    """
+    A Review keeping its attributes in a __dict__, as models did before
+    they declared __slots__.
+    """
+
+
+def bytes_per_entity(cls, count=COUNT):
+    """
+    Measures the memory taken by each hydrated review of a class.
+
+    Args:
+        cls (type): Review or a subclass of it.
+        count (int, optional): The number of reviews measured.
+        Defaults to COUNT.
+
+    Returns:
+        float: The number of bytes allocated per review.
+    """
+    records = [dict(REVIEW, review_id=f"review_{i:08d}")
+               for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        reviews = [cls.new_hydrated(record['review_id'],
+                                    record['created_at'],
+                                    record['updated_at'])
+                   for record in records]
+        for review, record in zip(reviews, records):
+            review._place_id = record['place_id']
+            review._user_id = record['user_id']
+            review._rating = record['rating']
+            review._text = record['text']
+        used = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return used / count
+
+
+class TestMemory(unittest.TestCase):
+
+    def test_models_have_no_instance_dict(self):
+        for cls in (Amenity, City, Country, Place, Review, User):
+            instance = cls.new_hydrated("entity_1", REVIEW['created_at'],
+                                        REVIEW['updated_at'])
+            self.assertFalse(hasattr(instance, '__dict__'), cls.__name__)
+
+    def test_unknown_attributes_are_rejected(self):
+        review = Review("place_1", "user_1", 4, "Nice")
+        with self.assertRaises(AttributeError):
+            review.ratting = 5
+
+    def test_slots_take_less_memory_than_a_dict(self):
+        self.assertLess(bytes_per_entity(Review),
+                        bytes_per_entity(DictReview))
+
+
+if __name__ == '__main__':
+    for cls in (DictReview, Review):
+        print(f"{cls.__name__}: {bytes_per_entity(cls, 20000):.0f} bytes"
+              " per review")
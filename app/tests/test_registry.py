@@ -0,0 +1,104 @@
+import unittest
+import json
+import os
+from app import app
+from persistence.data_manager import DataManager
+from persistence.registry import Registry
+from persistence.snapshot import Snapshot
+from models.amenity import Amenity
+from models.city import City
+from models.country import Country
+from models.place import Place
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.data_files = {
+            'Place': 'data/test_registry_places.json',
+            'City': 'data/test_registry_cities.json',
+            'Country': 'data/test_registry_countries.json',
+            'Amenity': 'data/test_registry_amenities.json',
+        }
+        self.registry = Registry({
+            entity_type: DataManager(path)
+            for entity_type, path in self.data_files.items()})
+        self.country = self.registry.save(Country("France", "FR"))
+        self.city = self.registry.save(City("Paris", "FR", self.registry))
+        self.wifi = self.registry.save(Amenity("WiFi", self.registry))
+        self.place = self.registry.save(Place(
+            name="Test Place", description="A nice place to stay",
+            address="123 Test St", city_id=self.city.id, latitude=48.85,
+            longitude=2.35, host_id="host_456", num_rooms=3,
+            num_bathrooms=2, price_per_night=100, max_guests=4,
+            amenities=[self.wifi.id, "missing"],
+            data_manager=self.registry))
+
+    def tearDown(self):
+        for path in self.data_files.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_entities_are_stored_in_their_shard(self):
+        self.assertEqual(list(Snapshot(self.data_files['City']).read()),
+                         ['City'])
+        self.assertIs(self.registry.shard('Place').get(self.place.id,
+                                                       'Place'), self.place)
+        self.assertIsNone(self.registry.shard('City').get(self.place.id,
+                                                          'Place'))
+
+    def test_joins_resolve_across_shards(self):
+        city = self.registry.get(self.place.city_id, 'City')
+        self.assertIs(city, self.city)
+        self.assertIs(self.registry.get_country_by_code(city.country_id),
+                      self.country)
+        self.assertEqual(self.registry.repository('Amenity').get_many(
+            self.place.amenities), [self.wifi])
+
+    def test_uniqueness_checks_use_the_owning_shard(self):
+        with self.assertRaises(ValueError):
+            City("Paris", "FR", self.registry)
+        self.assertTrue(self.registry.amenity_exists_with_name("WiFi"))
+
+    def test_repository(self):
+        places = self.registry.repository('Place')
+        self.assertIs(places, self.registry.repository('Place'))
+        self.assertEqual(places.all(), [self.place])
+        self.assertTrue(places.delete(self.place.id))
+        self.assertIsNone(places.get(self.place.id))
+
+    def test_unknown_type(self):
+        self.assertIsNone(self.registry.get('id', 'User'))
+        self.assertEqual(self.registry.get_all('User'), [])
+        with self.assertRaises(ValueError):
+            self.registry.repository('User')
+
+    def test_lock_metrics(self):
+        metrics = self.registry.lock_metrics()
+        self.assertEqual(set(metrics), set(self.data_files))
+        self.assertEqual(metrics['Place']['write']['acquisitions'], 1)
+
+    def test_shared_manager_is_listed_once(self):
+        data_manager = self.registry.shard('Place')
+        registry = Registry({'Place': data_manager, 'City': data_manager})
+        self.assertEqual(registry.managers(), [data_manager])
+
+    def test_place_route_joins_city_country_and_amenities(self):
+        client = app.test_client()
+        saved = {key: app.config[key] for key in
+                 ('DATA_MANAGER_PLACES', 'DATA_MANAGER_COUNTRIES')}
+        app.config['DATA_MANAGER_PLACES'] = self.registry
+        app.config['DATA_MANAGER_COUNTRIES'] = self.registry
+        try:
+            response = client.get(f'/places/{self.place.id}')
+        finally:
+            app.config.update(saved)
+        place = json.loads(response.data)
+        self.assertEqual(place['city']['city_id'], self.city.id)
+        self.assertEqual(place['city']['country']['code'], "FR")
+        self.assertEqual([amenity['amenity_id']
+                          for amenity in place['amenities']], [self.wifi.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+import unittest
+import os
+import threading
+import time
+from persistence.data_manager import DataManager
+from persistence.rwlock import RWLock
+from models.amenity import Amenity
+
+
+class TestRWLock(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = RWLock()
+
+    def run_thread(self, target):
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread
+
+    def test_readers_share_the_lock(self):
+        inside = threading.Barrier(2, timeout=5)
+
+        def read():
+            with self.lock.read():
+                inside.wait()
+
+        threads = [self.run_thread(read) for _ in range(2)]
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.lock.metrics()['read']['acquisitions'], 2)
+
+    def test_writer_excludes_readers(self):
+        events = []
+
+        def read():
+            with self.lock.read():
+                events.append('read')
+
+        self.lock.acquire_write()
+        reader = self.run_thread(read)
+        time.sleep(0.05)
+        self.assertEqual(events, [])
+        self.lock.release_write()
+        reader.join()
+        self.assertEqual(events, ['read'])
+        self.assertEqual(self.lock.metrics()['read']['contended'], 1)
+        self.assertGreater(self.lock.metrics()['read']['wait_total'], 0)
+
+    def test_waiting_writer_blocks_new_readers(self):
+        events = []
+        self.lock.acquire_read()
+
+        def write():
+            with self.lock.write():
+                events.append('write')
+
+        def read():
+            with self.lock.read():
+                events.append('read')
+
+        writer = self.run_thread(write)
+        while not self.lock._writers_waiting:
+            time.sleep(0.001)
+        reader = self.run_thread(read)
+        time.sleep(0.05)
+        self.assertEqual(events, [])
+        self.lock.release_read()
+        writer.join()
+        reader.join()
+        self.assertEqual(events, ['write', 'read'])
+
+    def test_back_to_back_writers_let_readers_in(self):
+        stop = threading.Event()
+        self.lock.acquire_write()
+
+        def write():
+            while not stop.is_set():
+                with self.lock.write():
+                    pass
+
+        def read():
+            with self.lock.read():
+                stop.set()
+
+        writer = self.run_thread(write)
+        reader = self.run_thread(read)
+        while not self.lock._readers_waiting:
+            time.sleep(0.001)
+        self.lock.release_write()
+        reader.join(timeout=5)
+        stop.set()
+        writer.join()
+        self.assertFalse(reader.is_alive())
+
+    def test_reentrancy(self):
+        with self.lock.write():
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        with self.lock.read():
+            with self.lock.read():
+                with self.assertRaises(RuntimeError):
+                    self.lock.acquire_write()
+        with self.lock.write():
+            pass
+        self.assertEqual(self.lock.metrics()['write']['acquisitions'], 2)
+
+
+class TestDataManagerConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_rwlock.json'
+        self.data_manager = DataManager(self.data_file, journal=True)
+
+    def tearDown(self):
+        self.data_manager.close()
+        for path in (self.data_file, self.data_file + '.journal'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_concurrent_reads_and_writes(self):
+        errors = []
+
+        def write(prefix):
+            for i in range(200):
+                self.data_manager.save(
+                    Amenity(f"{prefix}{i}", self.data_manager))
+
+        def read():
+            try:
+                for _ in range(200):
+                    for amenity in self.data_manager.get_all('Amenity'):
+                        amenity.to_dict()
+                    self.data_manager.encode_storage()
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(prefix,))
+                   for prefix in "ab"]
+        threads += [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.data_manager.get_all('Amenity')), 400)
+
+    def test_transaction_holds_the_write_lock(self):
+        events = []
+        with self.data_manager.transaction():
+            reader = threading.Thread(target=lambda: events.append(
+                self.data_manager.get_all('Amenity')))
+            reader.start()
+            self.data_manager.save(Amenity("WiFi", self.data_manager))
+            time.sleep(0.05)
+            self.assertEqual(events, [])
+        reader.join()
+        self.assertEqual(len(events[0]), 1)
+
+
+class TestCopyOnWriteSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_rwlock.json'
+        self.data_manager = DataManager(self.data_file)
+        self.wifi = self.data_manager.save(Amenity("WiFi", self.data_manager))
+
+    def tearDown(self):
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+    def test_snapshot_is_shared_until_a_write(self):
+        snapshot = self.data_manager.snapshot('Amenity')
+        self.assertIs(self.data_manager.snapshot('Amenity'), snapshot)
+        self.assertEqual(snapshot, (self.wifi,))
+        pool = self.data_manager.save(Amenity("Pool", self.data_manager))
+        self.assertEqual(self.data_manager.snapshot('Amenity'),
+                         (self.wifi, pool))
+        self.assertEqual(snapshot, (self.wifi,))
+
+    def test_readers_do_not_wait_for_writers(self):
+        self.data_manager.snapshot('Amenity')
+        results = []
+        self.data_manager.rwlock.acquire_write()
+        try:
+            self.data_manager.storage['Amenity']['x'] = None
+            self.data_manager.touch('Amenity')
+            reader = threading.Thread(target=lambda: results.append(
+                self.data_manager.get_all('Amenity')))
+            reader.start()
+            reader.join(timeout=5)
+            self.assertEqual(results, [[self.wifi]])
+        finally:
+            del self.data_manager.storage['Amenity']['x']
+            self.data_manager.rwlock.release_write()
+        self.assertEqual(self.data_manager.get_all('Amenity'), [self.wifi])
+
+    def test_transaction_sees_its_writes_without_publishing_them(self):
+        self.data_manager.snapshot('Amenity')
+        with self.data_manager.transaction():
+            pool = self.data_manager.save(Amenity("Pool", self.data_manager))
+            self.assertEqual(self.data_manager.get_all('Amenity'),
+                             [self.wifi, pool])
+            self.assertEqual(self.data_manager.snapshots['Amenity'][1],
+                             (self.wifi,))
+        self.assertEqual(self.data_manager.get_all('Amenity'),
+                         [self.wifi, pool])
+
+    def test_storage_replacement_drops_snapshots(self):
+        self.data_manager.snapshot('Amenity')
+        self.data_manager.storage = {}
+        self.assertEqual(self.data_manager.get_all('Amenity'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import os
+from unittest.mock import patch
+from persistence.data_manager import DataManager
+from persistence.registry import Registry
+from persistence.search import InvertedIndex, tokenize
+from models.place import Place
+
+
+class TestInvertedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = InvertedIndex(lambda entity: (entity.name,
+                                                   entity.text))
+
+    def make_entity(self, entity_id, name, text):
+        entity = type('Entity', (), {'id': entity_id, 'name': name,
+                                     'text': text})()
+        self.index.add(entity)
+        return entity
+
+    def ids(self, results):
+        return [entity.id for _, entity in results]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Château de l'Île, 2 rooms!"),
+                         ['chateau', 'de', 'l', 'ile', '2', 'rooms'])
+
+    def test_search_ranks_with_bm25(self):
+        self.make_entity('loft', "Loft", "A sunny loft by the sea")
+        self.make_entity('cabin', "Cabin", "A cabin in the woods")
+        self.make_entity('villa', "Sea villa", "Sea view, sea breeze")
+        self.assertEqual(self.ids(self.index.search("sea")),
+                         ['villa', 'loft'])
+        self.assertEqual(self.ids(self.index.search("woods cabin")),
+                         ['cabin'])
+        self.assertEqual(self.index.search("castle"), [])
+        self.assertEqual(len(self.index.search("a", limit=1)), 1)
+
+    def test_update_and_discard(self):
+        loft = self.make_entity('loft', "Loft", "By the sea")
+        loft.text = "In the mountains"
+        self.index.add(loft)
+        self.assertEqual(self.index.search("sea"), [])
+        self.assertEqual(self.ids(self.index.search("mountains")), ['loft'])
+        self.index.discard('loft')
+        self.assertEqual(self.index.postings, {})
+        self.assertEqual(self.index.total_length, 0)
+
+    def test_restore_skips_unchanged_documents(self):
+        self.make_entity('loft', "Loft", "By the sea")
+        self.make_entity('cabin', "Cabin", "In the woods")
+        saved = self.index.dump()
+        restored = InvertedIndex(self.index.fields)
+        restored.restore(saved)
+        with patch('persistence.search.tokenize',
+                   wraps=tokenize) as tokenizer:
+            for entity in self.index.entities.values():
+                restored.add(entity)
+            self.assertEqual(tokenizer.call_count, 0)
+            changed = type('Entity', (), {'id': 'loft', 'name': "Loft",
+                                          'text': "Near the lake"})()
+            restored.restore(saved)
+            restored.clear()
+            restored.add(changed)
+            self.assertEqual(tokenizer.call_count, 1)
+        self.assertEqual(self.ids(restored.search("lake")), ['loft'])
+
+
+class TestDataManagerSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_search.json'
+        self.data_manager = DataManager(self.data_file)
+
+    def tearDown(self):
+        for path in (self.data_file, self.data_file + '.search'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def make_place(self, name, description):
+        return self.data_manager.save(Place(
+            name, description, f"{name} St", "city_1", 1.0, 1.0, "host_1",
+            1, 1, 100, 2, [], self.data_manager))
+
+    def names(self, results):
+        return [place.name for _, place in results]
+
+    def test_search_follows_setters_and_deletes(self):
+        loft = self.make_place("Loft", "Sunny loft by the sea")
+        cabin = self.make_place("Cabin", "Quiet cabin in the woods")
+        self.assertEqual(self.names(self.data_manager.search_places("sea")),
+                         ["Loft"])
+        cabin.description = "Cabin on the sea shore"
+        self.assertEqual(
+            sorted(self.names(self.data_manager.search_places("sea"))),
+            ["Cabin", "Loft"])
+        self.data_manager.delete(loft.id, 'Place')
+        self.assertEqual(self.names(self.data_manager.search_places("sea")),
+                         ["Cabin"])
+        registry = Registry({'Place': self.data_manager})
+        self.assertEqual(self.names(registry.search_places("shore")),
+                         ["Cabin"])
+        scanned = super(DataManager, self.data_manager).search_places("sea")
+        self.assertEqual(self.names(scanned), ["Cabin"])
+
+    def test_index_is_restored_after_restart(self):
+        self.make_place("Loft", "Sunny loft by the sea")
+        self.make_place("Cabin", "Quiet cabin in the woods")
+        self.data_manager.close()
+        self.assertTrue(os.path.exists(self.data_file + '.search'))
+        with patch('persistence.search.tokenize',
+                   wraps=tokenize) as tokenizer:
+            restarted = DataManager(self.data_file)
+            self.assertEqual(tokenizer.call_count, 0)
+        self.assertEqual(self.names(restarted.search_places("woods")),
+                         ["Cabin"])
+        self.assertEqual(restarted.indexes['Place']['text'].restored, {})
+
+    def test_damaged_index_file_is_rebuilt(self):
+        self.make_place("Loft", "Sunny loft by the sea")
+        with open(self.data_file + '.search', 'w') as file:
+            file.write('{"Place": ')
+        restarted = DataManager(self.data_file)
+        self.assertEqual(self.names(restarted.search_places("sunny")),
+                         ["Loft"])
+
+
+if __name__ == '__main__':
+    unittest.main()
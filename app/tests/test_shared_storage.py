@@ -0,0 +1,86 @@
+import unittest
+import os
+from persistence.data_manager import DataManager
+from models.amenity import Amenity
+
+
+class TestSharedStorage(unittest.TestCase):
+    """Two DataManagers on the same files stand in for two workers."""
+
+    def setUp(self):
+        self.data_file = 'data/test_shared.json'
+        self.worker_1 = DataManager(self.data_file, shared=True)
+        self.worker_2 = DataManager(self.data_file, shared=True)
+
+    def tearDown(self):
+        self.worker_1.journal.close()
+        self.worker_2.journal.close()
+        for suffix in ('', '.journal', '.lock'):
+            if os.path.exists(self.data_file + suffix):
+                os.remove(self.data_file + suffix)
+
+    def test_shared_implies_journal(self):
+        self.assertIsNotNone(self.worker_1.journal)
+        self.assertIsNotNone(self.worker_1.lock)
+
+    def test_refresh_applies_other_worker_writes(self):
+        amenity = Amenity("WiFi", self.worker_1)
+        self.worker_1.save(amenity)
+        self.assertIsNone(self.worker_2.get(amenity.id, 'Amenity'))
+        self.worker_2.refresh()
+        self.assertEqual(self.worker_2.get(amenity.id, 'Amenity').name,
+                         "WiFi")
+        self.assertTrue(self.worker_2.amenity_exists_with_name("WiFi"))
+
+        self.worker_1.delete(amenity.id, 'Amenity')
+        self.worker_2.refresh()
+        self.assertIsNone(self.worker_2.get(amenity.id, 'Amenity'))
+
+    def test_refresh_is_noop_without_changes(self):
+        self.worker_1.save(Amenity("WiFi", self.worker_1))
+        self.worker_2.refresh()
+        offset = self.worker_2.journal_offset
+        self.worker_2.refresh()
+        self.assertEqual(self.worker_2.journal_offset, offset)
+
+    def test_write_catches_up_first(self):
+        wifi = Amenity("WiFi", self.worker_1)
+        self.worker_1.save(wifi)
+        pool = Amenity("Pool", self.worker_2)
+        self.worker_2.save(pool)
+        self.assertIsNotNone(self.worker_2.get(wifi.id, 'Amenity'))
+        self.worker_2.checkpoint()
+
+        restarted = DataManager(self.data_file, shared=True)
+        restarted.journal.close()
+        self.assertEqual(len(restarted.storage['Amenity']), 2)
+
+    def test_unique_keys_are_checked_after_catching_up(self):
+        wifi = Amenity("WiFi", self.worker_1)
+        self.worker_1.save(wifi)
+        self.assertFalse(self.worker_2.amenity_exists_with_name("WiFi"))
+        duplicate = Amenity("WiFi", self.worker_2)
+        with self.assertRaises(ValueError):
+            with self.worker_2.transaction('Amenity'):
+                self.worker_2.save(duplicate)
+        with self.assertRaises(ValueError):
+            self.worker_2.save(Amenity("WiFi", self.worker_2))
+        self.assertEqual([amenity.id for amenity in
+                          self.worker_2.get_all('Amenity')], [wifi.id])
+        self.assertEqual(len(self.worker_2.journal.replay()), 1)
+
+    def test_refresh_after_other_worker_checkpoint(self):
+        wifi = Amenity("WiFi", self.worker_1)
+        self.worker_1.save(wifi)
+        self.worker_1.checkpoint()
+        pool = Amenity("Pool", self.worker_1)
+        self.worker_1.save(pool)
+        self.worker_2.refresh()
+        self.assertIsNotNone(self.worker_2.get(wifi.id, 'Amenity'))
+        self.assertIsNotNone(self.worker_2.get(pool.id, 'Amenity'))
+        self.assertEqual(self.worker_2.journal_generation,
+                         self.worker_1.journal_generation)
+
+
+if __name__ == '__main__':
+    unittest.main()
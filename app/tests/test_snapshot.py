@@ -0,0 +1,118 @@
+import unittest
+import json
+import os
+from unittest.mock import patch
+from persistence.data_manager import DataManager
+from persistence.snapshot import Snapshot
+from models.amenity import Amenity
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_snapshot.json'
+        self.snapshot = Snapshot(self.data_file)
+
+    def tearDown(self):
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+    def test_write_and_read(self):
+        data = {"Amenity": {"a1": {"amenity_name": "WiFi"}}}
+        self.snapshot.write(data)
+        self.assertEqual(self.snapshot.read(), data)
+        with open(self.data_file) as file:
+            self.assertIn(Snapshot.CHECKSUM_KEY, json.load(file))
+
+    def test_empty_snapshot(self):
+        self.snapshot.write({})
+        self.assertEqual(self.snapshot.read(), {})
+
+    def test_no_temporary_file_left(self):
+        self.snapshot.write({"Amenity": {}})
+        self.assertEqual([name for name in os.listdir('data')
+                          if name.startswith('test_snapshot.json')],
+                         ['test_snapshot.json'])
+
+    def test_file_without_checksum_is_accepted(self):
+        with open(self.data_file, 'w') as file:
+            json.dump({"Amenity": {}}, file)
+        self.assertEqual(self.snapshot.read(), {"Amenity": {}})
+
+    def test_corrupted_content_is_detected(self):
+        self.snapshot.write({"Amenity": {"a1": {"amenity_name": "WiFi"}}})
+        with open(self.data_file) as file:
+            content = file.read()
+        with open(self.data_file, 'w') as file:
+            file.write(content.replace("WiFi", "Pool"))
+        with self.assertRaises(ValueError):
+            self.snapshot.read()
+
+    def test_truncated_file_is_detected(self):
+        self.snapshot.write({"Amenity": {"a1": {"amenity_name": "WiFi"}}})
+        with open(self.data_file, 'r+') as file:
+            file.truncate(20)
+        with self.assertRaises(ValueError):
+            self.snapshot.read()
+
+    def test_data_manager_round_trip(self):
+        data_manager = DataManager(self.data_file)
+        amenity = Amenity("WiFi", data_manager)
+        data_manager.save(amenity)
+        restarted = DataManager(self.data_file)
+        self.assertEqual(restarted.get(amenity.id, 'Amenity').name, "WiFi")
+
+
+class TestIncrementalEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_snapshot.json'
+        self.data_manager = DataManager(self.data_file)
+        self.wifi = Amenity("WiFi", self.data_manager)
+        self.pool = Amenity("Pool", self.data_manager)
+        self.data_manager.save(self.wifi)
+        self.data_manager.save(self.pool)
+
+    def tearDown(self):
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+    def expected(self):
+        return json.dumps({
+            entity_type: {entity_id: entity.to_dict()
+                          for entity_id, entity in entities.items()}
+            for entity_type, entities in self.data_manager.storage.items()
+        }, indent=4).encode()
+
+    def test_matches_full_encoding(self):
+        self.assertEqual(self.data_manager.encode_storage(), self.expected())
+        self.data_manager.storage['City'] = {}
+        self.assertEqual(self.data_manager.encode_storage(), self.expected())
+
+    def test_only_changed_entities_are_encoded(self):
+        self.data_manager.encode_storage()
+        self.pool.name = "Heated pool"
+        with patch.object(Amenity, 'to_dict',
+                          autospec=True,
+                          side_effect=Amenity.to_dict) as to_dict:
+            content = self.data_manager.encode_storage()
+        self.assertEqual([call.args[0] for call in to_dict.call_args_list],
+                         [self.pool])
+        self.assertIn(b'Heated pool', content)
+
+    def test_update_marks_entity_dirty(self):
+        self.data_manager.encode_storage()
+        self.wifi._name = "Fast WiFi"
+        self.data_manager.update(self.wifi)
+        self.assertIn(b'Fast WiFi', self.data_manager.encode_storage())
+
+    def test_deleted_entity_is_dropped(self):
+        self.data_manager.encode_storage()
+        self.data_manager.delete(self.wifi.id, 'Amenity')
+        self.assertNotIn(self.wifi.id,
+                         self.data_manager.fragments['Amenity'])
+        self.assertEqual(self.data_manager.encode_storage(), self.expected())
+
+
+if __name__ == '__main__':
+    unittest.main()
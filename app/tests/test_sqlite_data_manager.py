@@ -0,0 +1,172 @@
+import unittest
+import json
+import os
+import threading
+from persistence.snapshot import Snapshot
+from persistence.sqlite_data_manager import SQLiteDataManager
+from models.amenity import Amenity
+from models.city import City
+from models.country import Country
+from models.place import Place
+from models.review import Review
+
+
+class TestSQLiteDataManager(unittest.TestCase):
+
+    def setUp(self):
+        self.database = 'data/test_hbnb.db'
+        self.data_manager = SQLiteDataManager(self.database)
+
+    def tearDown(self):
+        self.data_manager.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.database + suffix):
+                os.remove(self.database + suffix)
+        if os.path.exists('data/test_sqlite_import.json'):
+            os.remove('data/test_sqlite_import.json')
+
+    def make_place(self):
+        return Place(
+            name="Test Place", description="A nice place to stay",
+            address="123 Test St", city_id="city_123", latitude=37.7749,
+            longitude=-122.4194, host_id="host_456", num_rooms=3,
+            num_bathrooms=2, price_per_night=100, max_guests=4,
+            data_manager=self.data_manager)
+
+    def test_wal_mode(self):
+        mode = self.data_manager.connection().execute(
+            'PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_save_get_update_delete(self):
+        amenity = Amenity("WiFi", self.data_manager)
+        self.data_manager.save(amenity)
+        retrieved = self.data_manager.get(amenity.id, 'Amenity')
+        self.assertEqual(retrieved.to_dict(), amenity.to_dict())
+
+        amenity.name = "Pool"
+        self.assertIs(self.data_manager.update(amenity), amenity)
+        self.assertEqual(self.data_manager.get(amenity.id, 'Amenity').name,
+                         "Pool")
+        self.assertFalse(self.data_manager.amenity_exists_with_name("WiFi"))
+
+        self.assertTrue(self.data_manager.delete(amenity.id, 'Amenity'))
+        self.assertFalse(self.data_manager.delete(amenity.id, 'Amenity'))
+        self.assertIsNone(self.data_manager.get(amenity.id, 'Amenity'))
+        self.assertIsNone(self.data_manager.update(amenity))
+
+    def test_get_all(self):
+        first = self.data_manager.save(City("Paris", "FR", self.data_manager))
+        second = self.data_manager.save(City("Lyon", "FR", self.data_manager))
+        self.assertEqual([city.id for city in
+                          self.data_manager.get_all('City')],
+                         [first.id, second.id])
+
+    def test_page(self):
+        cities = [self.data_manager.save(City(f"City {i}", "FR",
+                                              self.data_manager))
+                  for i in range(5)]
+        page, after = self.data_manager.page('City', 2)
+        self.assertEqual([city.id for city in page],
+                         [city.id for city in cities[:2]])
+        page, after = self.data_manager.page('City', 2, after)
+        page, after = self.data_manager.page('City', 2, after)
+        self.assertEqual([city.id for city in page], [cities[4].id])
+        self.assertIsNone(after)
+        plan = self.data_manager.connection().execute(
+            'EXPLAIN QUERY PLAN SELECT data FROM "City" ORDER BY '
+            f'{self.data_manager.CREATED_AT}, id LIMIT 3').fetchall()
+        self.assertIn('idx_City_created', str(plan))
+
+    def test_sorted_page(self):
+        for price in (300, 100, 200, 150):
+            place = self.make_place()
+            place.name = f"Place {price}"
+            place.price_per_night = price
+            self.data_manager.save(place)
+        page, after = self.data_manager.sorted_page(
+            'Place', 'price_per_night', 2, low=120)
+        self.assertEqual([place.price_per_night for place in page],
+                         [150, 200])
+        page, after = self.data_manager.sorted_page(
+            'Place', 'price_per_night', 2, after, low=120)
+        self.assertEqual([place.price_per_night for place in page], [300])
+        self.assertIsNone(after)
+
+    def test_lookups(self):
+        country = self.data_manager.save(Country("France", "FR"))
+        self.assertEqual(self.data_manager.get_country_by_code("FR").id,
+                         country.id)
+        self.assertEqual(self.data_manager.get_country_by_code("fra").id,
+                         country.id)
+        self.data_manager.save(City("Paris", "FR", self.data_manager))
+        self.assertTrue(self.data_manager.city_exists_with_name_and_country(
+            "Paris", "FR"))
+        with self.assertRaises(ValueError):
+            City("Paris", "FR", self.data_manager)
+
+        place = self.data_manager.save(self.make_place())
+        self.assertTrue(self.data_manager.place_exists_with_attributes(
+            "Test Place", "123 Test St", "city_123", "host_456", 3, 2,
+            100.0, 4))
+        with self.assertRaises(ValueError):
+            self.make_place()
+
+        review = Review(place.id, "user_1", 5, "Great", self.data_manager)
+        self.data_manager.save(review)
+        self.assertTrue(self.data_manager.review_exists_with_attributes(
+            place.id, "user_1"))
+        self.assertEqual(
+            [r.id for r in self.data_manager.get_reviews_by_place_id(
+                place.id)], [review.id])
+        self.assertEqual(
+            [r.id for r in self.data_manager.get_reviews_by_user_id(
+                "user_1")], [review.id])
+
+    def test_rating_summaries(self):
+        place = self.data_manager.save(self.make_place())
+        for user_id, rating in (("user_1", 5), ("user_2", 3)):
+            self.data_manager.save(Review(place.id, user_id, rating, "Ok",
+                                          self.data_manager))
+        summary = self.data_manager.get_place_rating(place.id)
+        self.assertEqual((summary['count'], summary['sum'],
+                          summary['average']), (2, 8, 4))
+        self.assertEqual(summary['histogram'],
+                         {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+        self.assertEqual(self.data_manager.get_user_rating("user_2")['sum'],
+                         3)
+        self.assertEqual(self.data_manager.get_user_rating("nobody")['count'],
+                         0)
+
+    def test_indexes_are_used(self):
+        plan = self.data_manager.connection().execute(
+            'EXPLAIN QUERY PLAN SELECT data FROM "Review" '
+            'WHERE user_id = ?', ('user_1',)).fetchall()
+        self.assertIn('idx_Review_user_id', str(plan))
+
+    def test_connection_per_thread(self):
+        connections = []
+        thread = threading.Thread(
+            target=lambda: connections.append(self.data_manager.connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(connections[0], self.data_manager.connection())
+
+    def test_import_json(self):
+        amenity = Amenity("WiFi", self.data_manager)
+        with open('data/test_sqlite_import.json', 'w') as file:
+            json.dump({"Amenity": {amenity.id: amenity.to_dict()}}, file)
+        self.assertEqual(
+            self.data_manager.import_json('data/test_sqlite_import.json'), 1)
+        self.assertTrue(self.data_manager.amenity_exists_with_name("WiFi"))
+
+    def test_import_json_with_checksum(self):
+        amenity = Amenity("WiFi", self.data_manager)
+        Snapshot('data/test_sqlite_import.json').write(
+            {"Amenity": {amenity.id: amenity.to_dict()}})
+        self.assertEqual(
+            self.data_manager.import_json('data/test_sqlite_import.json'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+import unittest
+import os
+from unittest.mock import patch
+from persistence.data_manager import DataManager
+from persistence.journal import Journal
+from persistence.registry import Registry
+from persistence.sqlite_data_manager import SQLiteDataManager
+from models.amenity import Amenity
+from models.city import City
+from models.country import Country
+
+
+class TestTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_transaction.json'
+        self.journal_file = self.data_file + '.journal'
+        self.data_manager = DataManager(self.data_file, journal=True)
+        self.wifi = self.data_manager.save(Amenity("WiFi", self.data_manager))
+
+    def tearDown(self):
+        self.data_manager.close()
+        for path in (self.data_file, self.journal_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def journal_records(self):
+        return Journal(self.journal_file).replay()
+
+    def test_mutations_are_persisted_with_one_write(self):
+        with patch.object(Journal, 'write', autospec=True,
+                          side_effect=Journal.write) as write:
+            with self.data_manager.transaction():
+                pool = self.data_manager.save(
+                    Amenity("Pool", self.data_manager))
+                self.data_manager.save(Amenity("Sauna", self.data_manager))
+                self.assertIs(self.data_manager.get(pool.id, 'Amenity'),
+                              pool)
+                self.assertEqual(len(self.journal_records()), 1)
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(len(self.journal_records()), 3)
+
+    def test_only_last_mutation_of_entity_is_persisted(self):
+        with self.data_manager.transaction():
+            pool = self.data_manager.save(Amenity("Pool", self.data_manager))
+            pool.name = "Heated pool"
+            self.data_manager.update(pool)
+            self.data_manager.delete(self.wifi.id, 'Amenity')
+        records = self.journal_records()[1:]
+        self.assertEqual([(record['op'], record['id']) for record in records],
+                         [('update', pool.id), ('delete', self.wifi.id)])
+        self.assertEqual(records[0]['data']['amenity_name'], "Heated pool")
+
+    def test_rollback_on_exception(self):
+        with self.assertRaises(RuntimeError):
+            with self.data_manager.transaction():
+                self.wifi.name = "Fast WiFi"
+                self.data_manager.update(self.wifi)
+                pool = self.data_manager.save(
+                    Amenity("Pool", self.data_manager))
+                raise RuntimeError("abort")
+        self.assertEqual(len(self.journal_records()), 1)
+        self.assertIsNone(self.data_manager.get(pool.id, 'Amenity'))
+        self.assertEqual(self.data_manager.get(self.wifi.id, 'Amenity').name,
+                         "WiFi")
+        self.assertTrue(self.data_manager.amenity_exists_with_name("WiFi"))
+        self.assertFalse(self.data_manager.in_transaction())
+
+    def test_rollback_restores_touched_entities_only(self):
+        pool = self.data_manager.save(Amenity("Pool", self.data_manager))
+        with patch.object(self.data_manager, 'reload') as reload, \
+                self.assertRaises(TypeError):
+            with self.data_manager.transaction():
+                self.wifi.name = "Fast WiFi"
+                self.wifi.name = []
+        reload.assert_not_called()
+        self.assertEqual(self.wifi.name, "WiFi")
+        self.assertIs(self.data_manager.get(self.wifi.id, 'Amenity'),
+                      self.wifi)
+        self.assertEqual(self.data_manager.indexes['Amenity']['name'].get(
+            "WiFi"), [self.wifi])
+        self.assertEqual(self.data_manager.indexes['Amenity']['name'].get(
+            "Fast WiFi"), [])
+        self.assertIs(self.data_manager.get(pool.id, 'Amenity'), pool)
+
+    def test_rollback_restores_deleted_entities(self):
+        with self.assertRaises(RuntimeError):
+            with self.data_manager.transaction():
+                self.data_manager.delete(self.wifi.id, 'Amenity')
+                raise RuntimeError("abort")
+        self.assertIs(self.data_manager.get(self.wifi.id, 'Amenity'),
+                      self.wifi)
+        self.assertTrue(self.data_manager.amenity_exists_with_name("WiFi"))
+
+    def test_unique_indexes_are_checked_once(self):
+        pool = self.data_manager.save(Amenity("Pool", self.data_manager))
+        with self.assertRaises(ValueError):
+            with self.data_manager.transaction():
+                pool.name = "WiFi"
+                self.data_manager.update(pool)
+        self.assertEqual(self.data_manager.get(pool.id, 'Amenity').name,
+                         "Pool")
+        self.assertEqual(len(self.journal_records()), 2)
+
+    def test_nested_transactions_join_the_outer_one(self):
+        with self.data_manager.transaction():
+            with self.data_manager.transaction():
+                self.data_manager.save(Amenity("Pool", self.data_manager))
+            self.assertTrue(self.data_manager.in_transaction())
+            self.assertEqual(len(self.journal_records()), 1)
+        self.assertEqual(len(self.journal_records()), 2)
+
+    def test_snapshot_mode_writes_once(self):
+        data_manager = DataManager(self.data_file + '.plain')
+        try:
+            with patch.object(data_manager, 'save_to_json') as save_to_json:
+                with data_manager.transaction():
+                    data_manager.save(Amenity("Pool", data_manager))
+                    data_manager.save(Amenity("Sauna", data_manager))
+            save_to_json.assert_called_once_with()
+        finally:
+            if os.path.exists(self.data_file + '.plain'):
+                os.remove(self.data_file + '.plain')
+
+    def test_registry_transaction_spans_shards(self):
+        cities = DataManager(self.data_file + '.cities', journal=True)
+        registry = Registry({'Amenity': self.data_manager, 'City': cities})
+        try:
+            with self.assertRaises(RuntimeError):
+                with registry.transaction():
+                    registry.save(City("Paris", "FR", registry))
+                    registry.delete(self.wifi.id, 'Amenity')
+                    raise RuntimeError("abort")
+            self.assertEqual(cities.get_all('City'), [])
+            self.assertIsNotNone(registry.get(self.wifi.id, 'Amenity'))
+        finally:
+            cities.close()
+            for suffix in ('.cities', '.cities.journal'):
+                if os.path.exists(self.data_file + suffix):
+                    os.remove(self.data_file + suffix)
+
+    def test_registry_locks_only_declared_shards(self):
+        cities = DataManager(self.data_file + '.cities', journal=True)
+        registry = Registry({'Amenity': self.data_manager, 'City': cities})
+        try:
+            with registry.transaction('Amenity'):
+                self.assertTrue(self.data_manager.in_transaction())
+                self.assertFalse(cities.in_transaction())
+                self.assertTrue(cities.rwlock.acquire_read(blocking=False))
+                cities.rwlock.release_read()
+                with self.assertRaises(RuntimeError):
+                    registry.save(City("Paris", "FR", registry))
+            self.assertFalse(registry.in_transaction())
+        finally:
+            cities.close()
+            for suffix in ('.cities', '.cities.journal'):
+                if os.path.exists(self.data_file + suffix):
+                    os.remove(self.data_file + suffix)
+
+    def test_registry_commits_every_shard_or_none(self):
+        amenities = DataManager(self.data_file + '.amenities')
+        countries = DataManager(self.data_file + '.countries')
+        registry = Registry({'Amenity': amenities, 'Country': countries})
+        try:
+            with patch.object(countries, 'save_to_json',
+                              side_effect=OSError("disk full")), \
+                    self.assertRaises(OSError):
+                with registry.transaction():
+                    registry.save(Amenity("Pool", registry))
+                    registry.save(Country("France", "FR"))
+            self.assertEqual(amenities.get_all('Amenity'), [])
+            self.assertEqual(countries.get_all('Country'), [])
+            self.assertEqual(
+                DataManager(self.data_file + '.amenities').get_all(
+                    'Amenity'), [])
+            for manager in (amenities, countries):
+                self.assertFalse(manager.in_transaction())
+                self.assertEqual(manager.rwlock._write_depth, 0)
+        finally:
+            for suffix in ('.amenities', '.countries'):
+                if os.path.exists(self.data_file + suffix):
+                    os.remove(self.data_file + suffix)
+
+    def test_registry_unlocks_shards_when_begin_fails(self):
+        countries = DataManager(self.data_file + '.countries')
+        registry = Registry({'Amenity': self.data_manager,
+                             'Country': countries})
+        with patch.object(countries, 'begin', side_effect=OSError):
+            with self.assertRaises(OSError):
+                with registry.transaction():
+                    pass
+        self.assertFalse(registry.in_transaction())
+        self.assertFalse(self.data_manager.in_transaction())
+        self.assertEqual(self.data_manager.rwlock._write_depth, 0)
+
+    def test_rollback_keeps_earlier_write_behind_mutations(self):
+        for journal in (False, True):
+            data_file = self.data_file + '.behind'
+            data_manager = DataManager(data_file, journal=journal,
+                                       write_behind=True, flush_interval=60)
+            try:
+                wifi = data_manager.save(Amenity("WiFi", data_manager))
+                with self.assertRaises(RuntimeError):
+                    with data_manager.transaction():
+                        pool = data_manager.save(
+                            Amenity("Pool", data_manager))
+                        raise RuntimeError("abort")
+                self.assertIsNotNone(data_manager.get(wifi.id, 'Amenity'))
+                self.assertIsNone(data_manager.get(pool.id, 'Amenity'))
+            finally:
+                data_manager.close()
+                for path in (data_file, data_file + '.journal'):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def test_begin_does_not_wait_for_write_behind(self):
+        data_file = self.data_file + '.behind'
+        data_manager = DataManager(data_file, write_behind=True,
+                                   flush_interval=60)
+        try:
+            data_manager.save(Amenity("WiFi", data_manager))
+            with patch.object(data_manager, 'save_to_json') as save_to_json:
+                with data_manager.transaction():
+                    save_to_json.assert_not_called()
+                    data_manager.save(Amenity("Pool", data_manager))
+                save_to_json.assert_not_called()
+        finally:
+            data_manager.close()
+            if os.path.exists(data_file):
+                os.remove(data_file)
+
+
+class TestSQLiteTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.database = 'data/test_transaction.db'
+        self.data_manager = SQLiteDataManager(self.database)
+
+    def tearDown(self):
+        self.data_manager.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.database + suffix):
+                os.remove(self.database + suffix)
+
+    def test_commit_and_rollback(self):
+        with self.data_manager.transaction():
+            self.data_manager.save(Amenity("WiFi", self.data_manager))
+        with self.assertRaises(RuntimeError):
+            with self.data_manager.transaction():
+                self.data_manager.save(Amenity("Pool", self.data_manager))
+                raise RuntimeError("abort")
+        self.assertEqual([amenity.name for amenity in
+                          self.data_manager.get_all('Amenity')], ["WiFi"])
+
+
+if __name__ == '__main__':
+    unittest.main()
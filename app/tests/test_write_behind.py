@@ -0,0 +1,128 @@
+import unittest
+import json
+import os
+import time
+from unittest.mock import patch
+from persistence.data_manager import DataManager
+from persistence.journal import Journal
+from persistence.flusher import Flusher
+from models.amenity import Amenity
+
+
+class TestWriteBehind(unittest.TestCase):
+
+    def setUp(self):
+        self.data_file = 'data/test_write_behind.json'
+        self.journal_file = self.data_file + '.journal'
+
+    def tearDown(self):
+        for path in (self.data_file, self.journal_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def read_amenities(self):
+        with open(self.data_file) as file:
+            return json.load(file).get('Amenity', {})
+
+    def test_save_does_not_wait_for_disk(self):
+        data_manager = DataManager(self.data_file, write_behind=True,
+                                   flush_interval=60)
+        amenity = Amenity("WiFi", data_manager)
+        data_manager.save(amenity)
+        self.assertFalse(os.path.exists(self.data_file))
+        data_manager.flush()
+        self.assertIn(amenity.id, self.read_amenities())
+        data_manager.close()
+
+    def test_flush_after_interval(self):
+        data_manager = DataManager(self.data_file, write_behind=True,
+                                   flush_interval=0.05)
+        data_manager.save(Amenity("WiFi", data_manager))
+        deadline = time.time() + 5
+        while not os.path.exists(self.data_file) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.read_amenities()), 1)
+        data_manager.close()
+
+    def test_close_flushes_pending_mutations(self):
+        data_manager = DataManager(self.data_file, write_behind=True,
+                                   flush_interval=60)
+        wifi = Amenity("WiFi", data_manager)
+        data_manager.save(wifi)
+        data_manager.save(Amenity("Pool", data_manager))
+        data_manager.delete(wifi.id, 'Amenity')
+        data_manager.close()
+        self.assertEqual([a['amenity_name'] for a in
+                          self.read_amenities().values()], ["Pool"])
+
+    def test_journal_group_commit(self):
+        data_manager = DataManager(self.data_file, journal=True,
+                                   write_behind=True, flush_interval=60)
+        for name in ("WiFi", "Pool", "Sauna"):
+            data_manager.save(Amenity(name, data_manager))
+        self.assertEqual(Journal(self.journal_file).replay(), [])
+        data_manager.flush()
+        self.assertEqual(len(Journal(self.journal_file).replay()), 3)
+        self.assertEqual(data_manager.journal_records, 3)
+        data_manager.close()
+
+        restarted = DataManager(self.data_file, journal=True)
+        restarted.close()
+        self.assertEqual(len(restarted.get_all('Amenity')), 3)
+
+    def test_failed_journal_write_is_retried(self):
+        data_manager = DataManager(self.data_file, journal=True,
+                                   write_behind=True, flush_interval=60)
+        data_manager.save(Amenity("WiFi", data_manager))
+        data_manager.save(Amenity("Pool", data_manager))
+        with patch.object(data_manager.journal, 'write',
+                          side_effect=OSError("disk full")):
+            data_manager.flush()
+        self.assertEqual(Journal(self.journal_file).replay(), [])
+        self.assertEqual(len(data_manager.pending_records), 2)
+        data_manager.save(Amenity("Sauna", data_manager))
+        data_manager.flush()
+        self.assertEqual([record['data']['amenity_name'] for record in
+                          Journal(self.journal_file).replay()],
+                         ["WiFi", "Pool", "Sauna"])
+        data_manager.close()
+
+    def test_shared_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            DataManager(self.data_file, shared=True, write_behind=True)
+
+
+class TestFlusher(unittest.TestCase):
+
+    def test_max_pending_triggers_flush(self):
+        flushed = []
+        flusher = Flusher(lambda: flushed.append(True), interval=60,
+                          max_pending=3)
+        for _ in range(3):
+            flusher.notify()
+        deadline = time.time() + 5
+        while not flushed and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(flushed), 1)
+        flusher.stop()
+
+    def test_failed_flush_is_retried(self):
+        calls = []
+
+        def callback():
+            calls.append(True)
+            if len(calls) == 1:
+                raise OSError("disk full")
+
+        flusher = Flusher(callback, interval=60)
+        flusher.notify()
+        flusher.flush()
+        flusher.flush()
+        self.assertEqual(len(calls), 2)
+        flusher.flush()
+        self.assertEqual(len(calls), 2)
+        flusher.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()